@@ -0,0 +1,85 @@
+"""
+Auto-scheduler benchmark: plans a month containing thousands of Rigid
+and Dynamic events, then times the incremental re-plan of one day
+after an edit.
+
+Run from the repository root:
+    python benchmarks/autoScheduler.py --events 5000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.EventsClass import Events, LEGACY_DATE_FORMAT  # noqa: E402
+from scheduler.AutoSchedulerClass import AutoScheduler  # noqa: E402
+
+MONTH_START = datetime(2025, 3, 1)
+MONTH_END = datetime(2025, 4, 1)
+LOCATIONS = ["Laidlaw Library", "Edge", "Home", "Parkinson", "Brotherton"]
+
+
+def syntheticMonth(count, seed=0):
+    """
+    Yields insertMany dicts spread over the month, 60% Rigid.
+    """
+    rng = random.Random(seed)
+    days = (MONTH_END - MONTH_START).days
+    for index in range(count):
+        start = MONTH_START + timedelta(days=rng.randrange(days),
+                                        minutes=15 * rng.randrange(32, 88))
+        yield {
+            "name": f"Event {index}",
+            "date": start.strftime(LEGACY_DATE_FORMAT),
+            "rigidity": "Rigid" if rng.random() < 0.6 else "Dynamic",
+            "location": rng.choice(LOCATIONS),
+            "endDate": start + timedelta(minutes=15 * rng.randrange(1, 5)),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tempDir:
+        events = Events(os.path.join(tempDir, "events.db"))
+        events.insertMany(syntheticMonth(args.events))
+        scheduler = AutoScheduler(events)
+
+        monthTimes = []
+        for _ in range(args.runs):
+            startedAt = time.perf_counter()
+            plans = scheduler.planRange(MONTH_START, MONTH_END)
+            monthTimes.append(time.perf_counter() - startedAt)
+
+        # edit one event, only its day should be re-planned
+        events.insertEvent("Edit", "15-03-2025 12:00", "Rigid", "Edge")
+        startedAt = time.perf_counter()
+        replanned = scheduler.replanDirty()
+        incrementalTime = time.perf_counter() - startedAt
+        events.close()
+
+    placed = sum(len(plan.placements) for plan in plans.values())
+    unplaced = sum(len(plan.unplaced) for plan in plans.values())
+    result = {
+        "benchmark": "autoScheduler",
+        "events": args.events,
+        "monthPlanSeconds": min(monthTimes),
+        "incrementalDays": len(replanned),
+        "incrementalSeconds": incrementalTime,
+        "placed": placed,
+        "unplaced": unplaced,
+    }
+    print(json.dumps(result, indent=2))
+    sys.exit(0 if result["monthPlanSeconds"] < 1.0 else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Category classifier benchmark: trains on categorised events as they
+are inserted, then classifies a month of uncategorised events both one
+event at a time and in one batched call, plus a whole classifyRange
+(range query included).
+
+Run from the repository root:
+    python benchmarks/categoryClassifier.py --train 20000 --classify 5000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.EventsClass import Events, LEGACY_DATE_FORMAT  # noqa: E402
+from ml.CategoryClassifierClass import CategoryClassifier, numpy  # noqa: E402
+
+MONTH_START = datetime(2025, 3, 1)
+MONTH_END = datetime(2025, 4, 1)
+# category -> (name words, locations) the synthetic events are drawn from
+VOCABULARY = {
+    "Study": (["Lecture", "Seminar", "Tutorial", "Revision", "Lab"],
+              ["Laidlaw Library", "Parkinson", "Roger Stevens"]),
+    "Sport": (["Gym", "Swim", "Football", "Climbing", "Run"],
+              ["Edge", "Sports Centre", "Park"]),
+    "Social": (["Dinner", "Drinks", "Party", "Coffee", "Film"],
+               ["Union", "Home", "Town"]),
+    "Work": (["Shift", "Meeting", "Interview", "Standup", "Call"],
+             ["Office", "Home", "Cafe"]),
+}
+
+
+def syntheticEvents(count, seed, labelled):
+    """
+    Yields insertMany dicts over the month; the category is only set
+    when labelled.
+    """
+    rng = random.Random(seed)
+    days = (MONTH_END - MONTH_START).days
+    for index in range(count):
+        category = rng.choice(list(VOCABULARY))
+        words, locations = VOCABULARY[category]
+        start = MONTH_START + timedelta(days=rng.randrange(days),
+                                        minutes=15 * rng.randrange(96))
+        yield {
+            "name": f"{rng.choice(words)} {rng.choice(words).lower()} {index}",
+            "date": start.strftime(LEGACY_DATE_FORMAT),
+            "rigidity": "Rigid",
+            "location": rng.choice(locations),
+            "category": category if labelled else None,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--train", type=int, default=20000)
+    parser.add_argument("--classify", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tempDir:
+        events = Events(os.path.join(tempDir, "events.db"))
+        classifier = CategoryClassifier(events)
+
+        startedAt = time.perf_counter()
+        events.insertMany(syntheticEvents(args.train, 0, labelled=True))
+        trainTime = time.perf_counter() - startedAt
+
+        truth = {}
+        for event in syntheticEvents(args.classify, 1, labelled=True):
+            truth[event["name"]] = event["category"]
+        events.insertMany(syntheticEvents(args.classify, 1, labelled=False))
+        rows = [row for row in events.fetchRangeEvents(MONTH_START, MONTH_END)
+                if not row[8]]
+
+        startedAt = time.perf_counter()
+        single = [classifier.classify(row[1], row[4]) for row in rows]
+        singleTime = time.perf_counter() - startedAt
+
+        startedAt = time.perf_counter()
+        batched = dict(zip((row[0] for row in rows), classifier.classifyMany(rows)))
+        batchTime = time.perf_counter() - startedAt
+
+        startedAt = time.perf_counter()
+        classifier.classifyRange(MONTH_START, MONTH_END)
+        rangeTime = time.perf_counter() - startedAt
+
+        correct = sum(1 for row in rows if batched[row[0]] == truth[row[1]])
+        agree = sum(1 for row, category in zip(rows, single)
+                    if batched[row[0]] == category)
+        classifier.save()
+        modelBytes = os.path.getsize(classifier.modelPath)
+        events.close()
+
+    print(json.dumps({
+        "benchmark": "categoryClassifier",
+        "numpy": numpy is not None,
+        "trained": args.train,
+        "classified": len(rows),
+        "trainSeconds": trainTime,
+        "singleSeconds": singleTime,
+        "batchSeconds": batchTime,
+        "rangeSeconds": rangeTime,
+        "batchSpeedup": singleTime / batchTime if batchTime else None,
+        "accuracy": correct / len(rows) if rows else None,
+        "batchAgreesWithSingle": agree == len(rows),
+        "modelBytes": modelBytes,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
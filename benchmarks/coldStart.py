@@ -0,0 +1,99 @@
+"""
+Cold-start benchmark: times importing the GUI modules, building
+CalenWindow and its first paint in fresh interpreters.
+
+Run from the repository root:
+    python benchmarks/coldStart.py --runs 5 --output benchmarks/results/coldStart.jsonl
+
+Every run prints one JSON object, --output appends it to a JSON-lines file
+so startup time can be tracked over time.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Executed in a fresh interpreter for every run, so imports are really cold.
+CHILD_SCRIPT = r"""
+import json, sys, time
+startedAt = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+from PyQt6.QtCore import QTimer
+from PyQt6.QtWidgets import QApplication
+from database.EventsClass import sharedEvents
+from gui.CalenWindowClass import CalenWindow
+importedAt = time.perf_counter()
+
+app = QApplication([])
+events = sharedEvents(sys.argv[2])
+window = CalenWindow(events=events)
+constructedAt = time.perf_counter()
+window.show()
+timings = {}
+
+
+def painted():
+    # runs once the event loop has processed the first show/paint events
+    timings["firstPaint"] = time.perf_counter() - startedAt
+    app.quit()
+
+
+QTimer.singleShot(0, painted)
+app.exec()
+window.close()
+print(json.dumps({
+    "import": importedAt - startedAt,
+    "construct": constructedAt - importedAt,
+    "firstPaint": timings["firstPaint"],
+}))
+"""
+
+
+def runOnce(databasePath):
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD_SCRIPT, REPO_ROOT, databasePath],
+        check=True, capture_output=True, text=True, env=env, cwd=REPO_ROOT)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--database", default=None,
+                        help="events.db to start against, defaults to an empty one")
+    parser.add_argument("--output", default=None,
+                        help="JSON-lines file the result is appended to")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tempDir:
+        databasePath = args.database or os.path.join(tempDir, "events.db")
+        runs = [runOnce(databasePath) for _ in range(args.runs)]
+
+    result = {
+        "benchmark": "coldStart",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "runs": args.runs,
+    }
+    for key in ("import", "construct", "firstPaint"):
+        values = [run[key] for run in runs]
+        result[key] = {"median": statistics.median(values),
+                       "min": min(values), "max": max(values)}
+    print(json.dumps(result, indent=2))
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "a") as outputFile:
+            outputFile.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
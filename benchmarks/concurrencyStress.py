@@ -0,0 +1,158 @@
+"""
+Stress test for the pooled Events connections: several reader threads
+hammer fetchDayEvents/fetchDayCounts while one writer thread inserts,
+all through one shared Events instance. Runs once with a single reader
+as the baseline, then with --readers, and reports both.
+
+Run from the repository root:
+    python benchmarks/concurrencyStress.py --readers 4 --seconds 5
+
+Exits non-zero if any thread hit an error (e.g. "database is locked"),
+a reader never completed a read, a committed write is missing at the
+end, or the readers together read slower than one reader alone.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.EventsClass import Events, LEGACY_DATE_FORMAT  # noqa: E402
+
+FIRST_DAY = datetime(2025, 1, 1)
+DAYS = 365
+
+
+def syntheticEvents(count, seed=0):
+    """
+    Yields (name, date, rigidity, location) tuples spread over DAYS days.
+    """
+    rng = random.Random(seed)
+    for index in range(count):
+        start = FIRST_DAY + timedelta(days=rng.randrange(DAYS),
+                                      minutes=15 * rng.randrange(96))
+        yield (f"Event {index}", start.strftime(LEGACY_DATE_FORMAT),
+               rng.choice(("Rigid", "Dynamic")), f"Room {rng.randrange(50)}")
+
+
+def reader(events, stopAt, stats, errors, seed):
+    rng = random.Random(seed)
+    reads = 0
+    try:
+        while time.perf_counter() < stopAt:
+            day = FIRST_DAY + timedelta(days=rng.randrange(DAYS))
+            events.fetchDayEvents(day)
+            events.fetchDayCounts(day, day + timedelta(days=31))
+            reads += 1
+    except Exception as error:
+        errors.append(f"reader {seed}: {error!r}")
+    finally:
+        events.releaseConnection()
+    stats.append(reads)
+
+
+def writer(events, stopAt, batchSize, written, errors):
+    batches = 0
+    try:
+        while time.perf_counter() < stopAt:
+            written[0] += events.insertMany(
+                syntheticEvents(batchSize, seed=1000 + batches), batchSize)
+            events.insertEvent("Single", FIRST_DAY.strftime(LEGACY_DATE_FORMAT),
+                               "Rigid", "Room 0")
+            written[0] += 1
+            batches += 1
+    except Exception as error:
+        errors.append(f"writer: {error!r}")
+    finally:
+        events.releaseConnection()
+
+
+def stress(readers, seconds, initial, batch):
+    """
+    One run with readers reader threads next to the writer on a fresh
+    calendar. Returns its throughput and everything that went wrong.
+    """
+    with tempfile.TemporaryDirectory() as tempDir:
+        events = Events(os.path.join(tempDir, "events.db"), poolSize=readers + 2)
+        events.insertMany(syntheticEvents(initial))
+
+        stopAt = time.perf_counter() + seconds
+        readCounts, readerErrors, writerErrors, written = [], [], [], [0]
+        threads = [threading.Thread(target=reader,
+                                    args=(events, stopAt, readCounts, readerErrors, seed))
+                   for seed in range(readers)]
+        threads.append(threading.Thread(
+            target=writer, args=(events, stopAt, batch, written, writerErrors)))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        rows = sum(1 for _ in events.iterEvents())
+        events.close()
+
+    errors = readerErrors + writerErrors
+    return {
+        "readers": readers,
+        "readsPerSecond": sum(readCounts) / seconds,
+        "rowsWrittenPerSecond": written[0] / seconds,
+        # every committed write must be there once the threads are done
+        "expectedRows": initial + written[0],
+        "rows": rows,
+        "idleReaders": sum(1 for reads in readCounts if not reads),
+        "readerErrors": readerErrors,
+        "writerErrors": writerErrors,
+        "lockedErrors": sum("database is locked" in error for error in errors),
+    }
+
+
+def failures(run):
+    """
+    What a run got wrong, empty if nothing.
+    """
+    found = [*run["readerErrors"], *run["writerErrors"]]
+    if run["rows"] != run["expectedRows"]:
+        found.append(f"{run['readers']} readers: expected {run['expectedRows']} rows, found {run['rows']}")
+    if run["idleReaders"]:
+        found.append(f"{run['readers']} readers: {run['idleReaders']} never finished a read")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--initial", type=int, default=50000,
+                        help="events in the calendar before the test starts")
+    parser.add_argument("--batch", type=int, default=200,
+                        help="rows per insertMany call of the writer")
+    parser.add_argument("--min-scaling", type=float, default=0.9,
+                        help="lowest accepted reads/sec of --readers over one reader's")
+    args = parser.parse_args()
+
+    baseline = stress(1, args.seconds, args.initial, args.batch)
+    concurrent = stress(args.readers, args.seconds, args.initial, args.batch)
+    scaling = concurrent["readsPerSecond"] / baseline["readsPerSecond"]
+    errors = failures(baseline) + failures(concurrent)
+    if scaling < args.min_scaling:
+        errors.append(f"{args.readers} readers read {scaling:.2f}x as fast as one")
+
+    print(json.dumps({
+        "benchmark": "concurrencyStress",
+        "seconds": args.seconds,
+        "cpus": os.cpu_count(),
+        "singleReader": baseline,
+        "concurrentReaders": concurrent,
+        "readScaling": scaling,
+        "errors": errors,
+    }, indent=2))
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Conflict detection benchmark: a calendar of hour long events plus some
+lasting several days and a few multi-day weekly series, checked with
+ConflictDetector at random times. Every check is compared against the
+events that really overlap it (found by reading every event starting
+up to MAX_DAYS before it), and the window loads and checks are timed.
+
+Run from the repository root:
+    python benchmarks/conflicts.py --events 100000 --checks 200
+
+Exits non-zero if a check misses an overlapping event or reports one
+that doesn't overlap.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.EventsClass import Events, LEGACY_DATE_FORMAT, toTimestamp  # noqa: E402
+from scheduler.ConflictsClass import ConflictDetector  # noqa: E402
+
+FIRST_DAY = datetime(2025, 1, 1)
+DAYS = 365
+# Longest generated event, brute force looks back this far.
+MAX_DAYS = 20
+
+
+def syntheticEvents(count, rng):
+    for index in range(count):
+        start = FIRST_DAY + timedelta(days=rng.randrange(DAYS), minutes=15 * rng.randrange(96))
+        length = timedelta(hours=1)
+        if index % 100 == 0:
+            # trips, conferences: longer than ConflictDetector's window
+            length = timedelta(days=rng.randrange(2, MAX_DAYS), hours=rng.randrange(24))
+        event = {
+            "name": f"Event {index}",
+            "date": start.strftime(LEGACY_DATE_FORMAT),
+            "endDate": start + length,
+            "rigidity": rng.choice(("Rigid", "Dynamic")),
+        }
+        if index % 5000 == 1:
+            event["endDate"] = start + timedelta(days=3)
+            event["rrule"] = "FREQ=WEEKLY;COUNT=20"
+        yield event
+
+
+def overlapping(events, start, end):
+    """
+    (id, startTime) of the events running in [start, end), the slow way.
+    """
+    return {(row.id, row.startTime)
+            for row in events.fetchRangeEvents(start - timedelta(days=MAX_DAYS), end)
+            if row.startTime < toTimestamp(end) and row.endTime > toTimestamp(start)}
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=100000)
+    parser.add_argument("--checks", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as tempDir:
+        events = Events(os.path.join(tempDir, "events.db"))
+        events.insertMany(syntheticEvents(args.events, rng))
+        detector = ConflictDetector(events)
+        loadTimes, checkTimes, wrong = [], [], 0
+        for _ in range(args.checks):
+            start = FIRST_DAY + timedelta(days=rng.randrange(DAYS), minutes=15 * rng.randrange(96))
+            end = start + timedelta(hours=rng.choice((1, 2, 30)))
+            window = detector.windowFor(start, end)
+            if window is not None:
+                startedAt = time.perf_counter()
+                detector.loadWindow(*window)
+                loadTimes.append(time.perf_counter() - startedAt)
+            startedAt = time.perf_counter()
+            found = {(conflict.row.id, conflict.row.startTime)
+                     for conflict in detector.check(start, end, "Rigid")}
+            checkTimes.append(time.perf_counter() - startedAt)
+            wrong += found != overlapping(events, start, end)
+        events.close()
+
+    print(json.dumps({
+        "benchmark": "conflicts",
+        "events": args.events,
+        "checks": args.checks,
+        "windowLoads": len(loadTimes),
+        "loadP50Ms": percentile(loadTimes, 0.5) * 1e3 if loadTimes else None,
+        "loadP95Ms": percentile(loadTimes, 0.95) * 1e3 if loadTimes else None,
+        "checkP50Ms": percentile(checkTimes, 0.5) * 1e3,
+        "wrongChecks": wrong,
+    }, indent=2))
+    sys.exit(1 if wrong else 0)
+
+
+if __name__ == "__main__":
+    main()
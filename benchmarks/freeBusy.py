@@ -0,0 +1,135 @@
+"""
+Free/busy benchmark: times first-free-slot and free-window queries over
+one to several months against the per-day bitset index, and against
+fetching the range and sweeping the sorted rows each time. Some events
+last several days, so a range can start inside one.
+
+Run from the repository root:
+    python benchmarks/freeBusy.py --events 100000 --queries 500
+
+Exits non-zero if the index and the sweep disagree on a first free slot.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.EventsClass import Events, LEGACY_DATE_FORMAT  # noqa: E402
+from database.FreeBusyIndexClass import FreeBusyIndex, SLOT  # noqa: E402
+
+FIRST_DAY = datetime(2020, 1, 1)
+DAYS = 3 * 365
+# Longest generated event, the sweep looks back this far.
+MAX_DAYS = 4
+
+
+def syntheticEvents(count, seed=0):
+    """
+    Yields insertMany dicts of 15 minute to 3 hour events, and one in
+    100 lasting up to MAX_DAYS.
+    """
+    rng = random.Random(seed)
+    for index in range(count):
+        start = FIRST_DAY + timedelta(days=rng.randrange(DAYS),
+                                      minutes=15 * rng.randrange(96))
+        length = timedelta(minutes=15 * rng.randint(1, 12))
+        if index % 100 == 0:
+            length = timedelta(days=rng.randrange(1, MAX_DAYS), hours=rng.randrange(24))
+        yield {
+            "name": f"Event {index}",
+            "date": start.strftime(LEGACY_DATE_FORMAT),
+            "rigidity": rng.choice(["Rigid", "Dynamic"]),
+            "location": "Library",
+            "endDate": start + length,
+        }
+
+
+def sweepFirstFree(events, start, end, duration):
+    """
+    The approach without the index: fetch the range, parse each row's
+    legacy date, sort and walk the gaps.
+    """
+    intervals = []
+    for row in events.fetchRangeEvents(start - timedelta(days=MAX_DAYS), end):
+        rowStart = datetime.strptime(row.date, LEGACY_DATE_FORMAT)
+        rowEnd = datetime.fromisoformat(row.endTime) if row.endTime else rowStart
+        intervals.append((rowStart, max(rowEnd, rowStart + SLOT)))
+    intervals.sort()
+    candidate = start
+    for rowStart, rowEnd in intervals:
+        if rowStart - candidate >= duration:
+            break
+        candidate = max(candidate, rowEnd)
+    return candidate if end - candidate >= duration else None
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def timeQueries(queries, function):
+    times = []
+    for query in queries:
+        startedAt = time.perf_counter()
+        function(*query)
+        times.append(time.perf_counter() - startedAt)
+    return {"p50Microseconds": percentile(times, 0.5) * 1e6,
+            "p99Microseconds": percentile(times, 0.99) * 1e6}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    queries = []
+    for _ in range(args.queries):
+        start = FIRST_DAY + timedelta(days=rng.randrange(DAYS - 90), hours=rng.randrange(24))
+        queries.append((start, start + timedelta(days=rng.randint(30, 90)),
+                        timedelta(minutes=15 * rng.randint(4, 16))))
+
+    with tempfile.TemporaryDirectory() as tempDir:
+        events = Events(os.path.join(tempDir, "events.db"))
+        events.insertMany(syntheticEvents(args.events))
+
+        index = FreeBusyIndex(events)
+        startedAt = time.perf_counter()
+        index.loadMonths(FIRST_DAY, FIRST_DAY + timedelta(days=DAYS))
+        buildTime = time.perf_counter() - startedAt
+
+        # the preloaded index, and fresh ones loading just the range asked,
+        # also from each month's first midnight where earlier events run in
+        checks = queries[:100] + [
+            (datetime(FIRST_DAY.year + month // 12, month % 12 + 1, 1),
+             datetime(FIRST_DAY.year + month // 12, month % 12 + 1, 8),
+             timedelta(hours=1))
+            for month in range(1, DAYS // 31)]
+        mismatches = sum(index.firstFree(*query) != sweepFirstFree(events, *query)
+                         or FreeBusyIndex(events).firstFree(*query) != sweepFirstFree(events, *query)
+                         for query in checks)
+        results = {
+            "benchmark": "freeBusy",
+            "events": args.events,
+            "buildSeconds": buildTime,
+            "mismatches": mismatches,
+            "indexFirstFree": timeQueries(queries, index.firstFree),
+            "indexFreeWindows": timeQueries(queries, index.freeWindows),
+            "sweepFirstFree": timeQueries(
+                queries, lambda *query: sweepFirstFree(events, *query)),
+        }
+        events.close()
+
+    print(json.dumps(results, indent=2))
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+.ics import/export round trip: writes a calendar of one-off events and
+weekly series whose exceptions are spread over several EXDATE lines
+(one per date, as many exporters write them, and comma separated),
+imports it, exports it and imports the export again. Times both
+imports and checks every series kept all of its exclusions, that the
+UIDs survive the round trip and that importing the export into the
+calendar it came from adds and changes nothing.
+
+Run from the repository root:
+    python benchmarks/icsRoundTrip.py --events 50000 --series 500
+
+Exits non-zero if an excluded occurrence shows up or one is missing,
+a UID changes or the second import duplicates events.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.EventsClass import Events  # noqa: E402
+from database.ICalendarClass import ICalendar, ICS_DATETIME_FORMAT  # noqa: E402
+
+FIRST_DAY = datetime(2025, 1, 6, 9, 0)
+DAYS = 365
+# Occurrences of every generated series, some of them excluded.
+SERIES_COUNT = 10
+
+
+def writeCalendar(path, events, series, rng):
+    """
+    Writes the .ics file, returns {series name: expected occurrence starts}.
+    """
+    expected = {}
+    with open(path, "w", encoding="utf-8", newline="") as icsFile:
+        icsFile.write("BEGIN:VCALENDAR\r\nVERSION:2.0\r\n")
+        for index in range(events):
+            start = FIRST_DAY + timedelta(days=rng.randrange(DAYS), minutes=15 * rng.randrange(40))
+            icsFile.write(
+                f"BEGIN:VEVENT\r\nUID:event-{index}\r\n"
+                f"DTSTART:{start.strftime(ICS_DATETIME_FORMAT)}\r\n"
+                f"DTEND:{(start + timedelta(hours=1)).strftime(ICS_DATETIME_FORMAT)}\r\n"
+                f"SUMMARY:Event {index}\r\nEND:VEVENT\r\n")
+        for index in range(series):
+            start = FIRST_DAY + timedelta(days=rng.randrange(DAYS), hours=rng.randrange(8))
+            starts = [start + timedelta(weeks=week) for week in range(SERIES_COUNT)]
+            excluded = rng.sample(starts[1:], rng.randrange(1, 4))
+            lines = [f"EXDATE:{exdate.strftime(ICS_DATETIME_FORMAT)}\r\n" for exdate in excluded]
+            if len(excluded) > 1 and index % 2:
+                # the last two as one comma separated line instead
+                lines[-2:] = ["EXDATE:" + ",".join(
+                    exdate.strftime(ICS_DATETIME_FORMAT) for exdate in excluded[-2:]) + "\r\n"]
+            name = f"Series {index}"
+            icsFile.write(
+                f"BEGIN:VEVENT\r\nUID:series-{index}\r\n"
+                f"DTSTART:{start.strftime(ICS_DATETIME_FORMAT)}\r\n"
+                f"SUMMARY:{name}\r\nRRULE:FREQ=WEEKLY;COUNT={SERIES_COUNT}\r\n"
+                + "".join(lines) + "END:VEVENT\r\n")
+            expected[name] = sorted(set(starts) - set(excluded))
+        icsFile.write("END:VCALENDAR\r\n")
+    return expected
+
+
+def mismatches(events, expected):
+    """
+    Series whose occurrences differ from the expected starts.
+    """
+    found = {}
+    for row in events.fetchRangeEvents(FIRST_DAY, FIRST_DAY + timedelta(days=DAYS + 7 * SERIES_COUNT)):
+        if row.name in expected:
+            found.setdefault(row.name, []).append(row.start)
+    return sum(sorted(found.get(name, [])) != starts for name, starts in expected.items())
+
+
+def storedUids(events):
+    return [uid for uid, in events.con.execute("SELECT uid FROM Events ORDER BY uid")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=50000)
+    parser.add_argument("--series", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tempDir:
+        icsPath = os.path.join(tempDir, "calendar.ics")
+        exportPath = os.path.join(tempDir, "export.ics")
+        expected = writeCalendar(icsPath, args.events, args.series, random.Random(1))
+
+        first = Events(os.path.join(tempDir, "first.db"))
+        startedAt = time.perf_counter()
+        imported = ICalendar(first).importFile(icsPath)
+        importTime = time.perf_counter() - startedAt
+        startedAt = time.perf_counter()
+        exported = ICalendar(first).exportFile(exportPath)
+        exportTime = time.perf_counter() - startedAt
+        second = Events(os.path.join(tempDir, "second.db"))
+        reimported = ICalendar(second).importFile(exportPath)
+        countBefore = len(storedUids(first))
+        startedAt = time.perf_counter()
+        importedAgain = ICalendar(first).importFile(exportPath)
+        importAgainTime = time.perf_counter() - startedAt
+
+        result = {
+            "benchmark": "icsRoundTrip",
+            "events": args.events,
+            "series": args.series,
+            "imported": imported,
+            "importRowsPerSecond": imported / importTime,
+            "exported": exported,
+            "exportRowsPerSecond": exported / exportTime,
+            "reimported": reimported,
+            "importedAgain": importedAgain,
+            "importAgainSeconds": importAgainTime,
+            "duplicatedOnImportAgain": len(storedUids(first)) - countBefore,
+            "uidsKept": storedUids(first) == storedUids(second),
+            "seriesWrongOnImport": mismatches(first, expected),
+            "seriesWrongOnReimport": mismatches(second, expected),
+        }
+        first.close()
+        second.close()
+
+    print(json.dumps(result, indent=2))
+    ok = (not result["seriesWrongOnImport"] and not result["seriesWrongOnReimport"]
+          and imported == exported == reimported == args.events + args.series
+          and not importedAgain and not result["duplicatedOnImportAgain"]
+          and result["uidsKept"])
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Change journal benchmark: seeds one database, clones it into a second
+through changesSince(0), then makes edits on both and syncs them both
+ways with deltas. Reports the bytes exchanged against copying events.db,
+undo/redo latency over a long history and what compaction removes.
+Undoing after a sync must only revert local edits, the events the
+other database added have to survive it.
+
+Run from the repository root:
+    python benchmarks/journalSync.py --events 100000 --edits 500
+
+Exits non-zero if the databases don't converge or undo reverts synced events.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.EventsClass import Events, LEGACY_DATE_FORMAT  # noqa: E402
+
+FIRST_DAY = datetime(2024, 1, 1)
+# Columns compared to check two databases hold the same events.
+STATE_SQL = "SELECT uid, name, date, rigidity, location, startTime, endTime, rrule, exdates, category FROM Events ORDER BY uid"
+# Events the second database inserted (and didn't rename), none of the
+# first's own undo steps touch them.
+REMOTE_SQL = "SELECT uid FROM Events WHERE name LIKE 'Second %' AND name NOT LIKE 'Second edit %' ORDER BY uid"
+
+
+def syntheticEvents(count, seed=0, prefix="Event"):
+    rng = random.Random(seed)
+    for index in range(count):
+        start = FIRST_DAY + timedelta(days=rng.randrange(730), minutes=15 * rng.randrange(96))
+        yield {
+            "name": f"{prefix} {index}",
+            "date": start.strftime(LEGACY_DATE_FORMAT),
+            "rigidity": rng.choice(["Rigid", "Dynamic"]),
+            "location": rng.choice(["Library", "Edge", "Home"]),
+        }
+
+
+def randomEdits(events, rng, count, prefix):
+    """
+    A mix of inserts, renames and deletes through the Events API.
+    """
+    for index in range(count):
+        choice = rng.random()
+        if choice < 0.4:
+            events.insertMany(syntheticEvents(1, seed=rng.random(), prefix=prefix))
+            continue
+        page = events.fetchEventsPage(
+            {"start": FIRST_DAY + timedelta(days=rng.randrange(730))}, pageSize=1)
+        if not page:
+            continue
+        if choice < 0.8:
+            events.updateEvent(page[0].id, name=f"{prefix} edit {index}")
+        else:
+            events.deleteEvent(page[0].id)
+
+
+def sync(source, target, cursor):
+    """
+    Sends source's changes after cursor to target, returns the new
+    cursor and the JSON bytes sent.
+    """
+    changes = source.journal.changesSince(cursor)
+    payload = json.dumps(changes)
+    target.journal.apply(json.loads(payload))
+    return (changes[-1]["seq"] if changes else cursor), len(payload)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=100000)
+    parser.add_argument("--edits", type=int, default=500)
+    parser.add_argument("--undos", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as tempDir:
+        first = Events(os.path.join(tempDir, "first.db"))
+        second = Events(os.path.join(tempDir, "second.db"))
+        startedAt = time.perf_counter()
+        first.insertMany(syntheticEvents(args.events))
+        insertRate = args.events / (time.perf_counter() - startedAt)
+        # fold the WAL back in, or the file misses most of what was inserted
+        first.cur.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        databaseBytes = os.path.getsize(first.path)
+
+        startedAt = time.perf_counter()
+        firstCursor, cloneBytes = sync(first, second, 0)
+        cloneTime = time.perf_counter() - startedAt
+        secondCursor = second.journal.lastSeq()  # the clone's own entries
+
+        randomEdits(first, rng, args.edits, "First")
+        randomEdits(second, rng, args.edits, "Second")
+        startedAt = time.perf_counter()
+        firstCursor, sentBytes = sync(first, second, firstCursor)
+        secondCursor, returnedBytes = sync(second, first, secondCursor)
+        # the second pass only carries the first one's echo, which applies as nothing
+        firstCursor, echoBytes = sync(first, second, firstCursor)
+        deltaTime = time.perf_counter() - startedAt
+        converged = (first.cur.execute(STATE_SQL).fetchall()
+                     == second.cur.execute(STATE_SQL).fetchall())
+
+        remoteBefore = first.cur.execute(REMOTE_SQL).fetchall()
+        undoTimes, redoTimes = [], []
+        for _ in range(args.undos):
+            startedAt = time.perf_counter()
+            first.journal.undo()
+            undoTimes.append(time.perf_counter() - startedAt)
+        remoteKept = first.cur.execute(REMOTE_SQL).fetchall() == remoteBefore
+        for _ in range(args.undos):
+            startedAt = time.perf_counter()
+            first.journal.redo()
+            redoTimes.append(time.perf_counter() - startedAt)
+
+        journalEntries = first.journal.lastSeq()
+        startedAt = time.perf_counter()
+        compacted = first.journal.compact()
+        compactTime = time.perf_counter() - startedAt
+        first.close()
+        second.close()
+
+    print(json.dumps({
+        "benchmark": "journalSync",
+        "events": args.events,
+        "editsEach": args.edits,
+        "insertRowsPerSecond": insertRate,
+        "databaseBytes": databaseBytes,
+        "cloneBytes": cloneBytes,
+        "cloneSeconds": cloneTime,
+        "deltaBytes": sentBytes + returnedBytes + echoBytes,
+        "deltaSeconds": deltaTime,
+        "converged": converged,
+        "remoteEvents": len(remoteBefore),
+        "remoteKeptAfterUndo": remoteKept,
+        "undoP50Microseconds": percentile(undoTimes, 0.5) * 1e6,
+        "redoP50Microseconds": percentile(redoTimes, 0.5) * 1e6,
+        "journalEntries": journalEntries,
+        "compactedEntries": compacted,
+        "compactSeconds": compactTime,
+    }, indent=2))
+    sys.exit(0 if converged and remoteKept else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Location suggestion benchmark: builds the (category, time of day,
+weekday) index over a large history, then times top-k lookups, the
+incremental listener update of single inserts, and a later start
+loading the saved snapshot and replaying the journal written since.
+
+Run from the repository root:
+    python benchmarks/locationSuggester.py --events 200000 --lookups 20000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.EventsClass import Events, LEGACY_DATE_FORMAT  # noqa: E402
+from ml.LocationSuggesterClass import LocationSuggester  # noqa: E402
+
+FIRST_DAY = datetime(2020, 1, 1)
+DAYS = 5 * 365
+CATEGORIES = ["Study", "Sport", "Social", "Work", None]
+# far more distinct places than a counter keeps, to exercise eviction
+LOCATIONS = [f"Place {index}" for index in range(2000)]
+
+
+def syntheticEvents(count, seed=0):
+    """
+    Yields insertMany dicts; locations are skewed so a few are common.
+    """
+    rng = random.Random(seed)
+    for index in range(count):
+        start = FIRST_DAY + timedelta(days=rng.randrange(DAYS),
+                                      minutes=15 * rng.randrange(96))
+        yield {
+            "name": f"Event {index}",
+            "date": start.strftime(LEGACY_DATE_FORMAT),
+            "rigidity": "Rigid",
+            "location": LOCATIONS[int(rng.paretovariate(1.2)) % len(LOCATIONS)],
+            "category": rng.choice(CATEGORIES),
+        }
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=200000)
+    parser.add_argument("--lookups", type=int, default=20000)
+    parser.add_argument("--inserts", type=int, default=500)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as tempDir:
+        events = Events(os.path.join(tempDir, "events.db"))
+        events.insertMany(syntheticEvents(args.events))
+
+        suggester = LocationSuggester(events)
+        startedAt = time.perf_counter()
+        suggester.ensureIndex()
+        buildTime = time.perf_counter() - startedAt
+
+        lookupTimes = []
+        for _ in range(args.lookups):
+            start = FIRST_DAY + timedelta(days=rng.randrange(DAYS),
+                                          minutes=15 * rng.randrange(96))
+            category = rng.choice(CATEGORIES)
+            startedAt = time.perf_counter()
+            suggester.suggest(category, start)
+            lookupTimes.append(time.perf_counter() - startedAt)
+
+        listenerTimes = []
+        for event in syntheticEvents(args.inserts, seed=2):
+            row = (0, event["name"], event["date"], "Rigid", event["location"],
+                   datetime.strptime(event["date"], LEGACY_DATE_FORMAT)
+                   .strftime("%Y-%m-%d %H:%M"), None, None, event["category"])
+            startedAt = time.perf_counter()
+            suggester.onEventsChanged("insert", [row])
+            listenerTimes.append(time.perf_counter() - startedAt)
+
+        # what the next launch does: snapshot plus journal catch-up,
+        # compared with counting the table again
+        snapshotPath = os.path.join(tempDir, "snapshot.index")
+        LocationSuggester(events, indexPath=snapshotPath).ensureIndex()
+        events.insertMany(syntheticEvents(args.inserts, seed=3))
+        events.deleteMany(rng.sample(range(1, args.events + 1), args.inserts))
+        startedAt = time.perf_counter()
+        reloaded = LocationSuggester(events, indexPath=snapshotPath)
+        loaded = reloaded.load()
+        loadTime = time.perf_counter() - startedAt
+        rebuilt = LocationSuggester(events, indexPath=os.path.join(tempDir, "rebuilt.index"))
+        rebuilt.ensureIndex()
+        matches = sum(reloaded.suggest(category, FIRST_DAY + timedelta(hours=hour))
+                      == rebuilt.suggest(category, FIRST_DAY + timedelta(hours=hour))
+                      for category in CATEGORIES for hour in range(24))
+        events.close()
+
+    print(json.dumps({
+        "benchmark": "locationSuggester",
+        "events": args.events,
+        "buildSeconds": buildTime,
+        "indexKeys": len(suggester.index),
+        "indexEntries": sum(len(counter.counts) for counter in suggester.index.values()),
+        "lookupP50Microseconds": percentile(lookupTimes, 0.5) * 1e6,
+        "lookupP99Microseconds": percentile(lookupTimes, 0.99) * 1e6,
+        "updateP99Microseconds": percentile(listenerTimes, 0.99) * 1e6,
+        "snapshotLoaded": loaded,
+        "snapshotLoadSeconds": loadTime,
+        "suggestionsMatchingRebuild": f"{matches}/{len(CATEGORIES) * 24}",
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
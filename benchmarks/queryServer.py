@@ -0,0 +1,159 @@
+"""
+Load test for the local query server: generates a calendar, starts
+`cli.py serve` on it as a separate process, then drives many concurrent
+keep-alive connections with a mix of day, range and search requests
+(plus a few inserts). Reports requests/sec and latency percentiles.
+Some events are weekly series, so range requests on the reader threads
+expand them through the shared OccurrenceCache, more months of them
+than it holds.
+
+Run from the repository root:
+    python benchmarks/queryServer.py --events 100000 --clients 64 --seconds 10
+
+Exits non-zero if any request fails.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from urllib.parse import quote
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.EventsClass import Events, LEGACY_DATE_FORMAT  # noqa: E402
+
+REPOSITORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIRST_DAY = datetime(2025, 1, 1)
+DAYS = 365
+WORDS = ("Maths", "Physics", "Lecture", "Gym", "Lunch", "Meeting", "Seminar", "Lab")
+LOCATIONS = ("Library", "Edge", "Home", "Lab 2", "Hall")
+# One event in this many is a weekly series.
+SERIES_EVERY = 100
+
+
+def syntheticEvents(count, seed=0):
+    rng = random.Random(seed)
+    for index in range(count):
+        start = FIRST_DAY + timedelta(days=rng.randrange(DAYS), minutes=15 * rng.randrange(96))
+        event = {
+            "name": f"{rng.choice(WORDS)} {rng.choice(WORDS)} {index}",
+            "date": start.strftime(LEGACY_DATE_FORMAT),
+            "rigidity": rng.choice(("Rigid", "Dynamic")),
+            "location": rng.choice(LOCATIONS),
+        }
+        if index % SERIES_EVERY == SERIES_EVERY - 1:
+            event["rrule"] = "FREQ=WEEKLY;COUNT=52"
+        yield event
+
+
+def randomRequest(rng, writeShare):
+    """
+    One (method, target, body) of the request mix.
+    """
+    day = FIRST_DAY + timedelta(days=rng.randrange(DAYS))
+    choice = rng.random()
+    if choice < writeShare:
+        body = json.dumps(next(syntheticEvents(1, seed=rng.random()))).encode()
+        return "POST", "/events", body
+    if choice < 0.6:
+        return "GET", f"/day?date={day.date().isoformat()}", b""
+    if choice < 0.85:
+        return "GET", f"/range?start={day.date().isoformat()}&end={(day + timedelta(days=7)).date().isoformat()}", b""
+    return "GET", f"/search?q={quote(rng.choice(WORDS)[:3].lower())}&limit=20", b""
+
+
+async def client(port, stopAt, writeShare, seed, latencies, errors):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        while time.perf_counter() < stopAt:
+            method, target, body = randomRequest(rng, writeShare)
+            startedAt = time.perf_counter()
+            writer.write(f"{method} {target} HTTP/1.1\r\nHost: localhost\r\n"
+                         f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+            status = int((await reader.readline()).split()[1])
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line == b"\r\n":
+                    break
+                name, _, value = line.decode().partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - startedAt)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def load(port, clients, seconds, writeShare):
+    latencies, errors = [], []
+    stopAt = time.perf_counter() + seconds
+    startedAt = time.perf_counter()
+    await asyncio.gather(*(client(port, stopAt, writeShare, seed, latencies, errors)
+                           for seed in range(clients)))
+    return latencies, errors, time.perf_counter() - startedAt
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=100000)
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writes", type=float, default=0.02,
+                        help="share of requests that insert an event")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tempDir:
+        path = os.path.join(tempDir, "events.db")
+        events = Events(path)
+        events.insertMany(syntheticEvents(args.events))
+        events.close()
+
+        server = subprocess.Popen(
+            [sys.executable, "cli.py", "serve", "--db", path, "--port", "0",
+             "--readers", str(args.readers)],
+            cwd=REPOSITORY, stdout=subprocess.PIPE, text=True)
+        try:
+            line = server.stdout.readline()
+            if not line.startswith("Serving on"):
+                sys.exit(f"Server didn't start: {line!r}")
+            port = int(line.rsplit(":", 1)[1])
+            latencies, errors, elapsed = asyncio.run(
+                load(port, args.clients, args.seconds, args.writes))
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(json.dumps({
+        "benchmark": "queryServer",
+        "events": args.events,
+        "series": args.events // SERIES_EVERY,
+        "clients": args.clients,
+        "readers": args.readers,
+        "writeShare": args.writes,
+        "requests": len(latencies),
+        "requestsPerSecond": len(latencies) / elapsed,
+        "p50Ms": percentile(latencies, 0.5) * 1e3,
+        "p99Ms": percentile(latencies, 0.99) * 1e3,
+        "maxMs": max(latencies) * 1e3,
+        "errors": len(errors),
+    }, indent=2))
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
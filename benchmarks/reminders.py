@@ -0,0 +1,127 @@
+"""
+Reminder scheduler demo on a fake clock: thousands of events over a
+week, with inserts and deletes while it runs. The clock jumps straight
+to each armed deadline (plus some timer lateness), so a simulated week
+takes a moment. Checks every reminder fires once, in order, within the
+latency bound, and counts the wakeups and queries it took.
+
+Run from the repository root:
+    python benchmarks/reminders.py --events 5000 --days 7
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.EventsClass import Events, LEGACY_DATE_FORMAT  # noqa: E402
+from database.InstrumentationClass import instrumentation  # noqa: E402
+from scheduler.ReminderSchedulerClass import ReminderScheduler, DEFAULT_LEAD  # noqa: E402
+
+START = datetime(2025, 3, 3, 7, 0)
+# Simulated lateness of the timer when it fires.
+MAX_TIMER_LATENESS = timedelta(milliseconds=20)
+
+
+class FakeClock():
+    """
+    Callable clock that only moves when told to.
+    """
+
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def randomEvent(rng, index, days, after):
+    start = after + timedelta(minutes=rng.randrange(days * 24 * 60))
+    return {
+        "name": f"Event {index}",
+        "date": start.strftime(LEGACY_DATE_FORMAT),
+        "rigidity": "Rigid",
+        "location": "Library",
+        "endDate": start + timedelta(minutes=30),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--changes", type=int, default=200,
+                        help="inserts and deletes made while running")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    clock = FakeClock(START)
+    armed = []
+    instrumentation.enable()
+    with tempfile.TemporaryDirectory() as tempDir:
+        events = Events(os.path.join(tempDir, "events.db"))
+        events.insertMany(randomEvent(rng, index, args.days, START)
+                          for index in range(args.events))
+        scheduler = ReminderScheduler(events, arm=armed.append, clock=clock)
+        instrumentation.reset()
+        scheduler.load()
+
+        end = START + timedelta(days=args.days) + DEFAULT_LEAD
+        fired, deleted = [], set()
+        wakeups = changes = 0
+        while clock.now < end:
+            clock.now = max(clock.now, scheduler.armedFor) + timedelta(
+                microseconds=rng.randrange(int(MAX_TIMER_LATENESS / timedelta(microseconds=1))))
+            wakeups += 1
+            for reminder in scheduler.popDue():
+                fired.append((clock.now, reminder.fireAt, reminder.row))
+            # edits between wakeups go through the listener
+            if changes < args.changes and rng.random() < 0.2:
+                changes += 1
+                if rng.random() < 0.5:
+                    events.insertMany([randomEvent(rng, args.events + changes, 1, clock.now)])
+                else:
+                    upcoming = events.fetchEventsPage(
+                        {"start": clock.now + timedelta(hours=1),
+                         "end": clock.now + timedelta(days=1)}, pageSize=50)
+                    if upcoming:
+                        row = rng.choice(upcoming)
+                        events.deleteEvent(row.id)
+                        deleted.add(row.id)
+
+        rangeQueries = instrumentation.snapshot()["timings"].get(
+            "Events.fetchRangeEvents", {}).get("calls", 0)
+        expected = {row.id for row in events.fetchRangeEvents(
+            START + DEFAULT_LEAD, START + timedelta(days=args.days))}
+        events.close()
+
+    firedIds = [row.id for _, _, row in fired]
+    latencies = [(firedAt - dueAt).total_seconds() * 1e3 for firedAt, dueAt, _ in fired]
+    result = {
+        "benchmark": "reminders",
+        "events": args.events,
+        "simulatedDays": args.days,
+        "changes": changes,
+        "fired": len(fired),
+        "missing": len(expected - set(firedIds)),
+        "duplicates": len(firedIds) - len(set(firedIds)),
+        "firedAfterDelete": len(deleted & set(firedIds)),
+        "outOfOrder": sum(fired[index][1] < fired[index - 1][1]
+                          for index in range(1, len(fired))),
+        "maxLatencyMs": max(latencies, default=0),
+        "wakeups": wakeups,
+        "timerArms": len(armed),
+        "rangeQueries": rangeQueries,
+    }
+    print(json.dumps(result, indent=2))
+    ok = (not result["missing"] and not result["duplicates"] and not result["outOfOrder"]
+          and not result["firedAfterDelete"]
+          and result["maxLatencyMs"] <= MAX_TIMER_LATENESS / timedelta(milliseconds=1))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
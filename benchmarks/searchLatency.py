@@ -0,0 +1,104 @@
+"""
+Search latency benchmark: bulk inserts a large calendar (timing the
+insert, which also fills the FTS5 index), then times Events.search for
+as-you-type queries, every prefix of a few names and locations plus
+two word queries. Checks the p95 against the latency budget.
+
+Run from the repository root:
+    python benchmarks/searchLatency.py --events 500000 --budget-ms 10
+
+Exits non-zero if any query length's p95 is over the budget.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.EventsClass import Events, LEGACY_DATE_FORMAT  # noqa: E402
+
+FIRST_DAY = datetime(2024, 1, 1)
+DAYS = 3 * 365
+WORDS = ["Lecture", "Lab", "Seminar", "Gym", "Lunch", "Meeting", "Revision",
+         "Tutorial", "Football", "Library", "Shift", "Dinner"]
+# Distinct locations, so location prefixes like "loc1" match many terms.
+LOCATIONS = 2000
+
+
+def syntheticEvents(count, seed=0):
+    rng = random.Random(seed)
+    for index in range(count):
+        start = FIRST_DAY + timedelta(days=rng.randrange(DAYS), minutes=15 * rng.randrange(96))
+        yield {
+            "name": f"{rng.choice(WORDS)} e{index}",
+            "date": start.strftime(LEGACY_DATE_FORMAT),
+            "rigidity": rng.choice(("Rigid", "Dynamic")),
+            "location": f"loc{rng.randrange(LOCATIONS)}",
+        }
+
+
+def typedQueries(rng, count):
+    """
+    What a search box sees while typing: each prefix of a word, and of
+    a second word after a complete first one.
+    """
+    for _ in range(count):
+        words = [rng.choice(WORDS).lower(), f"loc{rng.randrange(LOCATIONS)}",
+                 f"e{rng.randrange(1, 10 ** rng.randrange(1, 6))}"]
+        first, second = rng.sample(words, 2)
+        for length in range(1, len(first) + 1):
+            yield first[:length]
+        for length in range(1, len(second) + 1):
+            yield f"{first} {second[:length]}"
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=500000)
+    parser.add_argument("--queries", type=int, default=200,
+                        help="words typed out, each one prefix at a time")
+    parser.add_argument("--budget-ms", type=float, default=10.0)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    byLength = {}
+    with tempfile.TemporaryDirectory() as tempDir:
+        events = Events(os.path.join(tempDir, "events.db"))
+        startedAt = time.perf_counter()
+        events.insertMany(syntheticEvents(args.events))
+        insertSeconds = time.perf_counter() - startedAt
+        for query in typedQueries(rng, args.queries):
+            startedAt = time.perf_counter()
+            events.search(query)
+            byLength.setdefault(len(query.split()[-1]), []).append(
+                time.perf_counter() - startedAt)
+        events.close()
+
+    lengths = {str(length): {"queries": len(times),
+                             "p50Ms": percentile(times, 0.5) * 1e3,
+                             "p95Ms": percentile(times, 0.95) * 1e3}
+               for length, times in sorted(byLength.items())}
+    worst = max(result["p95Ms"] for result in lengths.values())
+    print(json.dumps({
+        "benchmark": "searchLatency",
+        "events": args.events,
+        "insertSeconds": insertSeconds,
+        "insertRowsPerSecond": args.events / insertSeconds,
+        "budgetMs": args.budget_ms,
+        "worstP95Ms": worst,
+        "byPrefixLength": lengths,
+    }, indent=2))
+    sys.exit(0 if worst <= args.budget_ms else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""
+Benchmark suite for the Events data layer and the calendar's hot paths.
+For every calendar size a synthetic events.db is generated, then
+insertEvent, fetchDayEvents, fetchRangeEvents, fetchAllEvents, deletes
+and CalenWidget month rendering (offscreen Qt) are timed.
+
+Run from the repository root:
+    python benchmarks/suite.py --sizes 1000,100000,1000000 --output benchmarks/results/suite.json
+    python benchmarks/suite.py --baseline benchmarks/results/suite.json
+    python benchmarks/suite.py --sizes 100000 --profile
+
+--baseline adds each scenario's median as a ratio of the baseline's
+(above 1 is slower). --profile runs every scenario under cProfile and
+tracemalloc and reports its hottest functions and allocation peak;
+timings taken while profiling are inflated and marked as such.
+"""
+import argparse
+import cProfile
+import contextlib
+import json
+import os
+import platform
+import pstats
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.EventsClass import Events, LEGACY_DATE_FORMAT  # noqa: E402
+
+DEFAULT_SIZES = "1000,100000,1000000"
+FIRST_DAY = datetime(2024, 1, 1)
+DAYS = 3 * 365
+LOCATIONS = ["Laidlaw Library", "Edge", "Home", "Parkinson", "Brotherton"]
+CATEGORIES = ["Study", "Sport", "Social", "Work", None]
+# Functions listed per scenario in --profile mode.
+PROFILE_TOP = 10
+
+
+def syntheticEvents(count, seed=0):
+    """
+    Yields insertMany dicts spread over DAYS days, about 1 in 200 is a
+    weekly recurring series.
+    """
+    rng = random.Random(seed)
+    for index in range(count):
+        start = FIRST_DAY + timedelta(days=rng.randrange(DAYS),
+                                      minutes=15 * rng.randrange(32, 88))
+        yield {
+            "name": f"Event {index}",
+            "date": start.strftime(LEGACY_DATE_FORMAT),
+            "rigidity": rng.choice(("Rigid", "Dynamic")),
+            "location": rng.choice(LOCATIONS),
+            "endDate": start + timedelta(minutes=15 * rng.randrange(1, 8)),
+            "rrule": "FREQ=WEEKLY;COUNT=20" if rng.random() < 0.005 else None,
+            "category": rng.choice(CATEGORIES),
+        }
+
+
+def randomDay(rng):
+    return FIRST_DAY + timedelta(days=rng.randrange(DAYS))
+
+
+def summarise(durations):
+    """
+    Per-call statistics of one scenario, in seconds.
+    """
+    ordered = sorted(durations)
+    return {
+        "calls": len(ordered),
+        "median": statistics.median(ordered),
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "total": sum(ordered),
+    }
+
+
+def profileReport(profiler, memoryPeak, snapshot):
+    stats = pstats.Stats(profiler)
+    hotSpots = []
+    for (filename, line, function), (_, calls, ownTime, cumulative, _) in sorted(
+            stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:PROFILE_TOP]:
+        hotSpots.append({
+            "function": f"{os.path.basename(filename)}:{line}({function})",
+            "calls": calls,
+            "ownSeconds": ownTime,
+            "cumulativeSeconds": cumulative,
+        })
+    allocations = [{"line": str(stat.traceback[0]), "bytes": stat.size, "blocks": stat.count}
+                   for stat in snapshot.statistics("lineno")[:PROFILE_TOP]]
+    return {"hotSpots": hotSpots, "memoryPeakBytes": memoryPeak,
+            "topAllocations": allocations}
+
+
+def runScenario(calls, profile):
+    """
+    Times every callable in calls separately. With profile the whole
+    scenario also runs under cProfile and tracemalloc.
+    """
+    profiler = None
+    if profile:
+        tracemalloc.start()
+        profiler = cProfile.Profile()
+        profiler.enable()
+    durations = []
+    for call in calls:
+        startedAt = time.perf_counter()
+        call()
+        durations.append(time.perf_counter() - startedAt)
+    result = summarise(durations)
+    if profile:
+        profiler.disable()
+        _, memoryPeak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        result["profile"] = profileReport(profiler, memoryPeak, snapshot)
+    return result
+
+
+def monthRenderer(events):
+    """
+    Returns a callable that shows and paints a random month of a
+    CalenWidget offscreen, or None when PyQt6 isn't installed.
+    """
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    try:
+        from PyQt6.QtWidgets import QApplication
+        from gui.CalenWidgetClass import CalenWidget
+    except ImportError:
+        return None
+    app = QApplication.instance() or QApplication([])
+    widget = CalenWidget(events=events)
+    widget.resize(800, 600)
+    rng = random.Random(3)
+
+    def render():
+        day = randomDay(rng)
+        widget.setCurrentPage(day.year, day.month)  # loads the day counts
+        widget.grab()  # paints every cell
+        app.processEvents()
+    render.widget = widget
+    return render
+
+
+def runSize(size, tempDir, args):
+    path = os.path.join(tempDir, f"events-{size}.db")
+    events = Events(path)
+    rng = random.Random(size)
+    results = {}
+    profile = args.profile
+
+    startedAt = time.perf_counter()
+    events.insertMany(syntheticEvents(size))
+    results["generate"] = {"seconds": time.perf_counter() - startedAt,
+                           "rowsPerSecond": events.lastInsertRate}
+
+    results["fetchDayEvents"] = runScenario(
+        [lambda day=randomDay(rng): events.fetchDayEvents(day)
+         for _ in range(args.repeats)], profile)
+    results["fetchRangeEvents"] = runScenario(
+        [lambda day=randomDay(rng): events.fetchRangeEvents(day, day + timedelta(days=31))
+         for _ in range(args.repeats)], profile)
+    results["fetchAllEvents"] = runScenario(
+        [events.fetchAllEvents for _ in range(max(1, args.repeats // 50))], profile)
+
+    render = monthRenderer(events)
+    if render is None:
+        results["renderMonth"] = {"skipped": "PyQt6 is not installed"}
+    else:
+        results["renderMonth"] = runScenario([render] * args.repeats, profile)
+        events.removeListener(render.widget.onEventsChanged)
+
+    newEvents = list(syntheticEvents(args.repeats, seed=size + 1))
+    results["insertEvent"] = runScenario(
+        [lambda event=event: events.insertEvent(
+            event["name"], event["date"], event["rigidity"], event["location"],
+            event["endDate"], category=event["category"])
+         for event in newEvents], profile)
+
+    ids = rng.sample(range(1, size + 1), min(size, args.repeats * 2))
+    results["deleteEvent"] = runScenario(
+        [lambda eventId=eventId: events.deleteEvent(eventId)
+         for eventId in ids[:args.repeats]], profile)
+    results["deleteMany"] = runScenario(
+        [lambda: events.deleteMany(ids[args.repeats:])], profile)
+    events.close()
+    return results
+
+
+def compareBaseline(results, baseline):
+    """
+    Adds baselineRatio (median / baseline median) to every scenario
+    the baseline also measured.
+    """
+    for size, scenarios in results.items():
+        for name, result in scenarios.items():
+            previous = baseline.get("results", {}).get(size, {}).get(name, {})
+            if "median" in result and previous.get("median"):
+                result["baselineRatio"] = result["median"] / previous["median"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help="comma separated numbers of events per calendar")
+    parser.add_argument("--repeats", type=int, default=200,
+                        help="calls timed per scenario")
+    parser.add_argument("--profile", action="store_true",
+                        help="report cProfile hot spots and tracemalloc peaks")
+    parser.add_argument("--baseline", default=None,
+                        help="earlier --output file to compare against")
+    parser.add_argument("--output", default=None,
+                        help="file the JSON results are written to")
+    args = parser.parse_args()
+
+    results = {}
+    # Events prints while creating tables, keep stdout for the JSON
+    with tempfile.TemporaryDirectory() as tempDir, \
+            contextlib.redirect_stdout(sys.stderr):
+        for size in (int(size) for size in args.sizes.split(",")):
+            print(f"Running {size} events", file=sys.stderr)
+            results[str(size)] = runSize(size, tempDir, args)
+
+    if args.baseline:
+        with open(args.baseline) as baselineFile:
+            compareBaseline(results, json.load(baselineFile))
+    report = {
+        "benchmark": "suite",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "profiled": args.profile,
+        "results": results,
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as outputFile:
+            json.dump(report, outputFile, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Travel time benchmark: registers hundreds of places, then times adding
+one more (its matrix row), travelMinutes lookups on free-text locations,
+conflict checks with travel gaps and planning a month with real travel
+times instead of the flat buffer. One place is out of town, so
+travel times have to stay capped at MAX_TRAVEL_MINUTES.
+
+Run from the repository root:
+    python benchmarks/travelTime.py --places 500 --events 5000
+
+Exits non-zero if the largest travel time goes over the cap.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.EventsClass import Events, LEGACY_DATE_FORMAT  # noqa: E402
+from scheduler.AutoSchedulerClass import AutoScheduler  # noqa: E402
+from scheduler.ConflictsClass import ConflictDetector  # noqa: E402
+from scheduler.LocationRegistryClass import LocationRegistry, MAX_TRAVEL_MINUTES  # noqa: E402
+
+MONTH_START = datetime(2025, 3, 1)
+MONTH_END = datetime(2025, 4, 1)
+# places are scattered a few kilometres around here
+CENTRE = (53.806, -1.555)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def typedLocation(rng, places):
+    """
+    A location as it might be typed: any case, maybe with a room.
+    """
+    name = rng.choice(places)
+    variant = rng.randrange(3)
+    if variant == 1:
+        name = name.upper()
+    elif variant == 2:
+        name = f"{name}, Room {rng.randrange(100)}"
+    return name
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--places", type=int, default=500)
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--lookups", type=int, default=100000)
+    parser.add_argument("--checks", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    names = [f"Building {index}" for index in range(args.places)]
+    registry = LocationRegistry()
+    startedAt = time.perf_counter()
+    for name in names:
+        registry.addPlace(name, CENTRE[0] + rng.uniform(-0.03, 0.03),
+                          CENTRE[1] + rng.uniform(-0.05, 0.05))
+    buildTime = time.perf_counter() - startedAt
+
+    startedAt = time.perf_counter()
+    registry.addPlace("One More", *CENTRE)
+    addTime = time.perf_counter() - startedAt
+    # a couple of hundred kilometres away, days on foot
+    registry.addPlace("Out Of Town", CENTRE[0] + 2, CENTRE[1])
+
+    pairs = [(typedLocation(rng, names), typedLocation(rng, names))
+             for _ in range(args.lookups)]
+    startedAt = time.perf_counter()
+    for fromLocation, toLocation in pairs:
+        registry.travelMinutes(fromLocation, toLocation)
+    lookupTime = (time.perf_counter() - startedAt) / args.lookups
+
+    with tempfile.TemporaryDirectory() as tempDir:
+        events = Events(os.path.join(tempDir, "events.db"))
+        days = (MONTH_END - MONTH_START).days
+        events.insertMany({
+            "name": f"Event {index}",
+            "date": (start := MONTH_START + timedelta(
+                days=rng.randrange(days), minutes=15 * rng.randrange(32, 88))
+            ).strftime(LEGACY_DATE_FORMAT),
+            "rigidity": "Rigid" if rng.random() < 0.6 else "Dynamic",
+            "location": typedLocation(rng, names),
+            "endDate": start + timedelta(minutes=15 * rng.randrange(1, 5)),
+        } for index in range(args.events))
+
+        detector = ConflictDetector(events, registry=registry)
+        checkTimes, travelConflicts = [], 0
+        for _ in range(args.checks):
+            start = MONTH_START + timedelta(days=rng.randrange(days),
+                                            minutes=15 * rng.randrange(32, 88))
+            startedAt = time.perf_counter()
+            conflicts = detector.check(start, start + timedelta(hours=1), "Rigid",
+                                       location=typedLocation(rng, names))
+            checkTimes.append(time.perf_counter() - startedAt)
+            travelConflicts += sum(conflict.kind == "travel" for conflict in conflicts)
+
+        plans = {}
+        for label, scheduler in (("flat", AutoScheduler(events)),
+                                 ("registry", AutoScheduler(
+                                     events, travelTime=registry.travelMinutes))):
+            startedAt = time.perf_counter()
+            planned = scheduler.planRange(MONTH_START, MONTH_END)
+            plans[label] = {
+                "seconds": time.perf_counter() - startedAt,
+                "placed": sum(len(plan.placements) for plan in planned.values()),
+                "unplaced": sum(len(plan.unplaced) for plan in planned.values()),
+            }
+        events.close()
+
+    print(json.dumps({
+        "benchmark": "travelTime",
+        "places": args.places,
+        "matrixBuildSeconds": buildTime,
+        "addPlaceMicroseconds": addTime * 1e6,
+        "maxTravelMinutes": registry.maxTravelMinutes(),
+        "lookupMicroseconds": lookupTime * 1e6,
+        "checkP50Microseconds": percentile(checkTimes, 0.5) * 1e6,
+        "checkP99Microseconds": percentile(checkTimes, 0.99) * 1e6,
+        "travelConflicts": travelConflicts,
+        "monthPlans": plans,
+    }, indent=2))
+    sys.exit(1 if registry.maxTravelMinutes() > MAX_TRAVEL_MINUTES else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Headless entry point to the calendar, next to main.py's window.
+`serve` runs the local query server; `import`/`export` read and write
+.ics files on events.db directly; the other commands go through a
+running server, or open events.db directly when none is listening.
+
+    python cli.py serve
+    python cli.py day 2025-03-03
+    python cli.py range "2025-03-03" "2025-03-10 12:00"
+    python cli.py search "maths lib"
+    python cli.py add "Maths lecture" "2025-03-03 09:00" --location Library
+    python cli.py delete 42
+    python cli.py undo
+    python cli.py import calendar.ics
+    python cli.py export calendar.ics
+"""
+import argparse
+from datetime import datetime
+import json
+import logging
+import sys
+from urllib.parse import urlencode
+from database.EventRecordClass import Event, EVENT_FIELDS
+from database.EventsClass import Events, DEFAULT_PATH, LEGACY_DATE_FORMAT
+from database.ICalendarClass import ICalendar
+from server.QueryClientClass import QueryClient
+from server.QueryServerClass import (QueryServer, DEFAULT_HOST, DEFAULT_PORT,
+                                     DEFAULT_READERS, DEFAULT_BATCH_SIZE)
+
+
+def parseArguments():
+    # options every command takes, after the command name
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--host", default=DEFAULT_HOST)
+    common.add_argument("--port", type=int, default=DEFAULT_PORT,
+                        help="0 picks a free port")
+    common.add_argument("--unix", help="Unix socket path instead of TCP")
+    common.add_argument("--db", default=DEFAULT_PATH,
+                        help="events.db opened by serve or when no server runs")
+    common.add_argument("--json", action="store_true", help="print raw JSON")
+    parser = argparse.ArgumentParser(description="Calen without the window.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def command(name, help):
+        return commands.add_parser(name, help=help, parents=[common])
+
+    serve = command("serve", "run the local query server")
+    serve.add_argument("--readers", type=int, default=DEFAULT_READERS)
+    serve.add_argument("--batch", type=int, default=DEFAULT_BATCH_SIZE)
+
+    day = command("day", "events on a day")
+    day.add_argument("date", type=datetime.fromisoformat)
+    span = command("range", "events between two times")
+    span.add_argument("start", type=datetime.fromisoformat)
+    span.add_argument("end", type=datetime.fromisoformat)
+    search = command("search", "events by name or location")
+    search.add_argument("query")
+    search.add_argument("--limit", type=int, default=20)
+
+    add = command("add", "add an event")
+    add.add_argument("name")
+    add.add_argument("start", type=datetime.fromisoformat)
+    add.add_argument("--end", type=datetime.fromisoformat)
+    add.add_argument("--rigidity", default="Rigid")
+    add.add_argument("--location")
+    add.add_argument("--category")
+    add.add_argument("--rrule", help='e.g. "FREQ=WEEKLY;BYDAY=MO"')
+    delete = command("delete", "delete an event by id")
+    delete.add_argument("id", type=int)
+    # the undo history lives in the server, there's none without one
+    command("undo", "undo the last change made through the server")
+    command("redo", "redo the last change undone through the server")
+    # files are read and written here, not by the server
+    importFile = command("import", "import an .ics file, events already imported are updated")
+    importFile.add_argument("path")
+    exportFile = command("export", "export every event to an .ics file")
+    exportFile.add_argument("path")
+    return parser.parse_args()
+
+
+def request(arguments):
+    """
+    The (method, path, params, data) a command sends to the server.
+    """
+    command = arguments.command
+    if command == "day":
+        return "GET", "/day", {"date": arguments.date.isoformat(" ")}, None
+    if command == "range":
+        return "GET", "/range", {"start": arguments.start.isoformat(" "),
+                                 "end": arguments.end.isoformat(" ")}, None
+    if command == "search":
+        return "GET", "/search", {"q": arguments.query, "limit": arguments.limit}, None
+    if command == "add":
+        return "POST", "/events", None, {
+            "name": arguments.name,
+            "date": arguments.start.strftime(LEGACY_DATE_FORMAT),
+            "rigidity": arguments.rigidity,
+            "location": arguments.location,
+            "endDate": arguments.end.isoformat(" ") if arguments.end else None,
+            "rrule": arguments.rrule,
+            "category": arguments.category,
+        }
+    if command == "delete":
+        return "DELETE", f"/events/{arguments.id}", None, None
+    return "POST", f"/{command}", None, None
+
+
+def send(arguments, method, path, params, data):
+    """
+    Sends the request to a running server, or runs it here on the
+    database when none is listening. Returns the JSON payload.
+    """
+    client = QueryClient(arguments.host, arguments.port, arguments.unix)
+    try:
+        return client.request(method, path, params, data)
+    except ConnectionError:
+        logging.info("No server running, opening %s directly", arguments.db)
+    finally:
+        client.close()
+    events = Events(arguments.db)
+    try:
+        target = path + ("?" + urlencode(params) if params else "")
+        body = b"" if data is None else json.dumps(data).encode()
+        status, payload = QueryServer(events).call(method, target, body)
+    finally:
+        events.close()
+    if status != 200:
+        raise RuntimeError(payload["error"])
+    return payload
+
+
+def transfer(arguments):
+    """
+    Runs import/export on the database, the server can't see the file.
+    """
+    events = Events(arguments.db)
+    try:
+        calendar = ICalendar(events)
+        if arguments.command == "import":
+            print(f"Imported {calendar.importFile(arguments.path)} events")
+        else:
+            print(f"Exported {calendar.exportFile(arguments.path)} events")
+    except (OSError, ValueError) as error:
+        print(f"Error: {error}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        events.close()
+
+
+def show(command, payload):
+    if isinstance(payload, list):
+        if not payload:
+            print("No events")
+        for event in payload:
+            row = Event(*[event[field] for field in EVENT_FIELDS])
+            print(f"{row.id:>6}  {row.label(showDate=command != 'day')}")
+    elif command == "add":
+        print(f"Added event {payload['id']}")
+    elif command == "delete":
+        print("Deleted" if payload["deleted"] else "No such event")
+    else:
+        print("Done" if payload[command] else f"Nothing to {command}")
+
+
+def main():
+    arguments = parseArguments()
+    if arguments.command == "serve":
+        # one pooled connection per reader, the writer and this thread
+        events = Events(arguments.db, poolSize=arguments.readers + 2)
+        try:
+            QueryServer(events, arguments.host, arguments.port, arguments.unix,
+                        arguments.readers, arguments.batch).run()
+        finally:
+            events.close()
+        return
+    if arguments.command in ("import", "export"):
+        transfer(arguments)
+        return
+    try:
+        payload = send(arguments, *request(arguments))
+    except RuntimeError as error:
+        print(f"Error: {error}", file=sys.stderr)
+        sys.exit(1)
+    if arguments.json:
+        print(json.dumps(payload, indent=2))
+    else:
+        show(arguments.command, payload)
+
+
+if __name__ == "__main__":
+    main()
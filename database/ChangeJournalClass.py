@@ -0,0 +1,228 @@
+from collections import deque
+import json
+import logging
+import threading
+from database.InstrumentationClass import timed
+
+# Stored Events columns captured in each journal image, besides uid.
+JOURNAL_COLUMNS = ("id", "name", "date", "rigidity", "location", "startTime",
+                   "endTime", "rrule", "exdates", "recurUntil", "category")
+# Undo steps remembered, the oldest are forgotten beyond this.
+DEFAULT_UNDO_LIMIT = 100
+# Journal entries written between automatic compactions.
+DEFAULT_COMPACT_EVERY = 5000
+
+
+def imageSql(prefix):
+    """
+    json_object(...) of a trigger's old/new row, for the journal.
+    """
+    return "json_object(" + ", ".join(
+        f"'{column}', {prefix}.{column}" for column in JOURNAL_COLUMNS) + ")"
+
+
+class ChangeJournal():
+    """
+    Undo/redo and delta sync over the EventsJournal table.
+    Triggers (Events.migrateJournal) append every insert, update and
+    delete of an Events row to the journal inside the writing
+    transaction, with a sequence number and the row's old and new
+    images, keyed by the row's uid (ids differ between databases).
+    Events tells the journal how many rows each write touched, so the
+    entries of one outermost transaction form one undo step without
+    reading the journal back. Undo replays a step's old images, redo
+    undoes the undo; both cost the size of the step, not the history.
+    changesSince/apply exchange entries between two databases, and
+    compact drops entries superseded by a later one for the same uid,
+    so changesSince(0) stays a full export of the current state.
+    """
+
+    def __init__(self, events, undoLimit=DEFAULT_UNDO_LIMIT,
+                 compactEvery=DEFAULT_COMPACT_EVERY):
+        self.events = events
+        self.undoStack = deque(maxlen=undoLimit)  # (first seq, last seq)
+        self.redoStack = deque(maxlen=undoLimit)
+        self.compactEvery = compactEvery
+        self.sinceCompact = 0
+        # per thread (first seq, last seq) of the open transaction, and
+        # whether it is an undo, redo or sync being written
+        self.local = threading.local()
+
+    def lastSeq(self):
+        cursor = self.events.cur
+        cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'EventsJournal'")
+        row = cursor.fetchone()
+        return row[0] if row else 0
+
+    def recordWrites(self, count):
+        """
+        Called by Events after writing count rows (so count entries),
+        while the transaction still holds the write lock.
+        """
+        if not count:
+            return
+        last = self.lastSeq()
+        group = getattr(self.local, "group", None)
+        self.local.group = (last - count + 1 if group is None else group[0], last)
+
+    def commitGroup(self):
+        """
+        Called by Events once the outermost transaction committed, the
+        entries it wrote become one undo (or redo) step.
+        Returns True when enough has been written to compact.
+        """
+        group = getattr(self.local, "group", None)
+        replaying = getattr(self.local, "replaying", None)
+        self.local.group = None
+        if group is None:
+            return False
+        if replaying == "sync":
+            pass  # another database's changes, not a step to undo here
+        elif replaying == "undo":
+            self.redoStack.append(group)
+        else:
+            self.undoStack.append(group)
+            if replaying != "redo":
+                self.redoStack.clear()
+        self.sinceCompact += group[1] - group[0] + 1
+        return self.sinceCompact >= self.compactEvery
+
+    def discardGroup(self):
+        self.local.group = None
+
+    def entries(self, first, last):
+        cursor = self.events.cur
+        cursor.execute(
+            "SELECT seq, action, uid, old, new FROM EventsJournal WHERE seq BETWEEN ? AND ? ORDER BY seq",
+            (first, last))
+        return cursor.fetchall()
+
+    @timed("ChangeJournal.undo")
+    def undo(self):
+        """
+        Reverts the last undo step. Returns False if there is none.
+        """
+        return self.replay(self.undoStack, "undo")
+
+    @timed("ChangeJournal.redo")
+    def redo(self):
+        """
+        Reapplies the last undone step. Returns False if there is none.
+        """
+        return self.replay(self.redoStack, "redo")
+
+    def replay(self, stack, replaying):
+        if not stack:
+            return False
+        first, last = stack.pop()
+        entries = self.entries(first, last)
+        if len(entries) != last - first + 1:
+            logging.warning("Journal entries %d-%d were compacted, can't %s",
+                            first, last, replaying)
+            return False
+        self.local.replaying = replaying
+        try:
+            with self.events.transaction():
+                self.recordWrites(sum(
+                    self.writeImage(uid, json.loads(old) if old else None, keepId=True)
+                    for _, _, uid, old, _ in reversed(entries)))
+        except BaseException:
+            stack.append((first, last))
+            raise
+        finally:
+            self.local.replaying = None
+        return True
+
+    def writeImage(self, uid, image, keepId=False):
+        """
+        Makes the row with uid match image (None deletes it), queueing
+        the change for the Events listeners. The caller records the
+        journal entries written with recordWrites.
+        Returns True if anything was written.
+        """
+        events = self.events
+        cursor = events.cur
+        cursor.execute(
+            f"SELECT {', '.join(JOURNAL_COLUMNS)} FROM Events WHERE uid = ?", (uid,))
+        current = cursor.fetchone()
+        values = None if image is None else [image[column] for column in JOURNAL_COLUMNS[1:]]
+        if current is None and image is None:
+            return False
+        if current is not None and list(current[1:]) == values:
+            return False  # already there, e.g. a change syncing back
+        if current is not None and events.listeners:
+            events.queueChange("delete", events.fetchEventsById(current[0], current[0]))
+        if image is None:
+            cursor.execute("DELETE FROM Events WHERE id = ?", (current[0],))
+            return True
+        if current is not None:
+            eventId = current[0]
+            cursor.execute(
+                f"UPDATE Events SET {', '.join(column + ' = ?' for column in JOURNAL_COLUMNS[1:])} WHERE id = ?",
+                (*values, eventId))
+        else:
+            # another database's ids mean nothing here, only undo keeps them
+            eventId = image["id"] if keepId else None
+            cursor.execute(
+                f"INSERT INTO Events (id, uid, {', '.join(JOURNAL_COLUMNS[1:])}) VALUES (?, ?{', ?' * len(values)})",
+                (eventId, uid, *values))
+            eventId = cursor.lastrowid
+        if events.listeners:
+            events.queueChange("insert", events.fetchEventsById(eventId, eventId))
+        return True
+
+    @timed("ChangeJournal.changesSince")
+    def changesSince(self, seq, limit=None):
+        """
+        Journal entries after seq, oldest first, as JSON-ready dicts of
+        seq, at, action, uid and the new image (None for deletes).
+        Pass the last seq received back in to fetch only what's new.
+        """
+        cursor = self.events.cur
+        cursor.execute(
+            "SELECT seq, at, action, uid, new FROM EventsJournal WHERE seq > ? ORDER BY seq LIMIT ?",
+            (seq, -1 if limit is None else limit))
+        return [{"seq": entrySeq, "at": at, "action": action, "uid": uid,
+                 "new": json.loads(new) if new else None}
+                for entrySeq, at, action, uid, new in cursor.fetchall()]
+
+    @timed("ChangeJournal.apply")
+    def apply(self, changes):
+        """
+        Applies changesSince output from another database in one
+        transaction, the later change to a uid wins. Changes that are
+        already true here (such as our own coming back) write nothing,
+        so two databases syncing both ways settle.
+        The changes don't become an undo step and leave redo alone, undo
+        keeps stepping through this database's own edits.
+        Returns the number of changes that wrote something.
+        """
+        self.local.replaying = "sync"
+        try:
+            with self.events.transaction():
+                applied = sum(self.writeImage(change["uid"], change["new"])
+                              for change in changes)
+                self.recordWrites(applied)
+        finally:
+            self.local.replaying = None
+        return applied
+
+    @timed("ChangeJournal.compact")
+    def compact(self):
+        """
+        Deletes the entries a later entry for the same uid supersedes,
+        leaving the ones undo/redo still need. Deltas stay correct for
+        any seq since the latest entry of each uid is kept.
+        Returns the number of entries removed.
+        """
+        steps = list(self.undoStack) + list(self.redoStack)
+        keepFrom = min((first for first, _ in steps), default=self.lastSeq() + 1)
+        with self.events.transaction():
+            cursor = self.events.cur
+            cursor.execute(
+                "DELETE FROM EventsJournal WHERE seq < ? AND EXISTS (SELECT 1 FROM EventsJournal later WHERE later.uid = EventsJournal.uid AND later.seq > EventsJournal.seq)",
+                (keepFrom,))
+            removed = cursor.rowcount
+        self.sinceCompact = 0
+        logging.info("Compacted %d journal entries", removed)
+        return removed
@@ -0,0 +1,156 @@
+import sqlite3
+import threading
+import queue
+import logging
+
+# Upper bound on open connections, one per concurrently active thread.
+DEFAULT_POOL_SIZE = 8
+# Seconds a thread waits for a free connection before giving up.
+DEFAULT_ACQUIRE_TIMEOUT = 30.0
+# Pragmas applied to every new connection. WAL lets readers carry on
+# while a writer commits, NORMAL sync is safe in WAL mode and only
+# fsyncs on checkpoints.
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA cache_size = -16000",  # negative means KiB, so 16MB
+    "PRAGMA mmap_size = 268435456",  # 256MB
+    "PRAGMA temp_store = MEMORY",
+)
+
+
+class ThreadLease():
+    """
+    Holds the connection lent to one thread. Stored in a threading.local,
+    so when the thread exits and its locals are dropped the connection
+    goes back to the pool instead of leaking.
+    """
+
+    def __init__(self, pool, con):
+        self.pool = pool
+        self.con = con
+        self.cur = con.cursor()
+
+    def __del__(self):
+        if self.con is not None:
+            self.pool.release(self.con)
+            self.con = None
+
+
+class ConnectionPool():
+    """
+    Small pool of SQLite connections to one database file.
+    Every thread is lent its own connection (and cursor) on first use,
+    so threads never share a cursor and WAL lets them read and write
+    concurrently.
+    """
+
+    def __init__(self, path, maxSize=DEFAULT_POOL_SIZE, timeout=DEFAULT_ACQUIRE_TIMEOUT):
+        self.path = path
+        self.timeout = timeout
+        self.idle = queue.LifoQueue()
+        self.slots = threading.BoundedSemaphore(maxSize)
+        self.lock = threading.Lock()
+        self.connections = []  # every open connection, for closeAll
+        self.local = threading.local()
+        self.closed = False
+        self.traceCallback = None  # given every executed SQL statement
+
+    def connect(self):
+        # connections move between threads through the pool, but only
+        # ever one thread uses a connection at a time
+        con = sqlite3.connect(self.path, check_same_thread=False)
+        for pragma in CONNECTION_PRAGMAS:
+            con.execute(pragma)
+        with self.lock:
+            self.connections.append(con)
+            con.set_trace_callback(self.traceCallback)
+        return con
+
+    def acquire(self):
+        """
+        Takes an idle connection, opening a new one while under maxSize.
+        Blocks up to self.timeout seconds when every slot is in use.
+        """
+        if self.closed:
+            raise sqlite3.ProgrammingError("Connection pool is closed")
+        if not self.slots.acquire(timeout=self.timeout):
+            raise sqlite3.OperationalError(
+                f"No free connection to {self.path} after {self.timeout}s")
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            try:
+                return self.connect()
+            except BaseException:
+                self.slots.release()
+                raise
+
+    def release(self, con):
+        """
+        Returns a connection to the pool, rolling back anything left open.
+        """
+        if self.closed:
+            return
+        try:
+            if con.in_transaction:
+                logging.warning("Rolling back uncommitted work on released connection")
+                con.rollback()
+            self.idle.put(con)
+        except sqlite3.ProgrammingError:
+            pass  # closed underneath us
+        finally:
+            self.slots.release()
+
+    def lease(self):
+        """
+        Returns the ThreadLease of the calling thread, acquiring one
+        on first use.
+        """
+        lease = getattr(self.local, "lease", None)
+        if lease is None:
+            lease = ThreadLease(self, self.acquire())
+            self.local.lease = lease
+        return lease
+
+    def threadConnection(self):
+        return self.lease().con
+
+    def threadCursor(self):
+        return self.lease().cur
+
+    def releaseThread(self):
+        """
+        Gives the calling thread's connection back early, e.g. at the
+        end of a thread pool task. The next use acquires one again.
+        """
+        lease = getattr(self.local, "lease", None)
+        if lease is not None:
+            self.local.lease = None
+            lease.cur.close()
+            self.release(lease.con)
+            lease.con = None
+
+    def setTraceCallback(self, callback):
+        """
+        Sets (or with None clears) the trace callback of every open and
+        future connection.
+        """
+        with self.lock:
+            self.traceCallback = callback
+            for con in self.connections:
+                con.set_trace_callback(callback)
+
+    def closeAll(self):
+        """
+        Closes every connection the pool has opened.
+        """
+        self.closed = True
+        with self.lock:
+            connections, self.connections = self.connections, []
+        for con in connections:
+            try:
+                con.close()
+            except sqlite3.ProgrammingError:
+                pass
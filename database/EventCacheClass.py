@@ -0,0 +1,165 @@
+from collections import OrderedDict
+from datetime import datetime
+from database.EventsClass import LEGACY_DAY_FORMAT
+
+# How many months are kept in memory before the least recently used is dropped.
+DEFAULT_MAX_MONTHS = 12
+# Months either side of the requested one loaded by the same range query.
+DEFAULT_NEIGHBOURS = 1
+
+
+def shiftMonth(year, month, offset):
+    """
+    Returns the (year, month) offset months away from (year, month).
+    """
+    index = year * 12 + (month - 1) + offset
+    return index // 12, index % 12 + 1
+
+
+class EventCache():
+    """
+    Month-bucketed, LRU-evicted cache in front of Events.
+    A miss loads the month and its neighbours with one range query,
+    later day lookups in those months are served from memory.
+    Registers itself as an Events listener so inserts and deletes
+    update the cached buckets instead of leaving them stale.
+    """
+
+    def __init__(self, events, maxMonths=DEFAULT_MAX_MONTHS, neighbours=DEFAULT_NEIGHBOURS):
+        self.events = events
+        self.maxMonths = maxMonths
+        self.neighbours = neighbours
+        # (year, month) -> {"yyyy-MM-dd": [rows ordered by start]}
+        self.months = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # bumped on every change so results fetched elsewhere (e.g. on
+        # a worker thread) can tell whether they raced with a write
+        self.version = 0
+        self.events.addListener(self.onEventsChanged)
+
+    def fetchDayEvents(self, date):
+        """
+        Same contract as Events.fetchDayEvents, date is a datetime
+        or a "dd-MM-yyyy" string.
+        """
+        rows = self.peekDayEvents(date)
+        if rows is None:
+            if not isinstance(date, datetime):
+                date = datetime.strptime(date, LEGACY_DAY_FORMAT)
+            self.loadMonth(date.year, date.month)
+            rows = self.peekDayEvents(date, countStats=False)
+        return rows
+
+    def peekDayEvents(self, date, countStats=True):
+        """
+        Returns the day's rows if its month is cached, otherwise None
+        without querying the database.
+        """
+        if not isinstance(date, datetime):
+            date = datetime.strptime(date, LEGACY_DAY_FORMAT)
+        key = (date.year, date.month)
+        if key not in self.months:
+            if countStats:
+                self.misses += 1
+            return None
+        if countStats:
+            self.hits += 1
+        self.months.move_to_end(key)
+        return list(self.months[key].get(date.strftime("%Y-%m-%d"), ()))
+
+    def loadMonth(self, year, month):
+        """
+        Loads (year, month) and the uncached neighbouring months
+        with a single Events.fetchRangeEvents call.
+        """
+        missing = self.missingMonths(year, month)
+        if missing:
+            self.storeMonths(missing, self.events.fetchRangeEvents(
+                *self.monthsRange(missing)))
+        self.touchMonth(year, month)
+
+    def missingMonths(self, year, month):
+        """
+        Returns the uncached months out of (year, month) and its neighbours.
+        """
+        wanted = [shiftMonth(year, month, offset)
+                  for offset in range(-self.neighbours, self.neighbours + 1)]
+        return [key for key in wanted if key not in self.months]
+
+    def monthsRange(self, months):
+        """
+        Returns the [start, end) datetimes covering the sorted months.
+        """
+        firstYear, firstMonth = months[0]
+        lastYear, lastMonth = shiftMonth(*months[-1], 1)
+        return datetime(firstYear, firstMonth, 1), datetime(lastYear, lastMonth, 1)
+
+    def storeMonths(self, months, rows):
+        """
+        Buckets the rows fetched for monthsRange(months) by day
+        and caches them.
+        """
+        buckets = {key: {} for key in months}
+        for row in rows:
+            bucket = buckets.get(self.monthKey(row.startTime))
+            if bucket is not None:  # already cached months in the gap
+                bucket.setdefault(row.startTime[:10], []).append(row)
+        for key in months:
+            self.months[key] = buckets[key]
+        self.evict()
+
+    def touchMonth(self, year, month):
+        """
+        Marks (year, month) as the most recently used month.
+        """
+        if (year, month) in self.months:
+            self.months.move_to_end((year, month))
+        self.evict()
+
+    def evict(self):
+        while len(self.months) > self.maxMonths:
+            self.months.popitem(last=False)
+
+    def monthKey(self, startTime):
+        return int(startTime[:4]), int(startTime[5:7])
+
+    def onEventsChanged(self, action, rows):
+        """
+        Events listener, applies committed inserts and deletes
+        to the cached months they fall in.
+        """
+        self.version += 1
+        if any(row.rrule for row in rows):
+            # a series has occurrences in many months, reload them all
+            self.months.clear()
+            return
+        for row in rows:
+            startTime = row.startTime
+            if not startTime:
+                continue
+            month = self.months.get(self.monthKey(startTime))
+            if month is None:  # not cached, it'll be loaded fresh
+                continue
+            day = month.setdefault(startTime[:10], [])
+            if action == "insert":
+                day.append(row)
+                day.sort(key=lambda cached: cached.startTime)
+            else:
+                day[:] = [cached for cached in day if cached.id != row.id]
+
+    def invalidate(self):
+        self.version += 1
+        self.months.clear()
+
+    def stats(self):
+        """
+        Returns the hit/miss counters and number of cached months.
+        """
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": self.hits / total if total else 0.0,
+            "months": len(self.months),
+        }
@@ -0,0 +1,137 @@
+from datetime import datetime
+from sys import intern
+
+# Field names in EVENT_COLUMNS order, an Event indexes like the old tuples.
+EVENT_FIELDS = ("id", "name", "date", "rigidity", "location",
+                "startTime", "endTime", "rrule", "category")
+
+
+def parseTimestamp(timestamp):
+    """
+    Parses a TIMESTAMP_FORMAT value by slicing, None stays None.
+    """
+    if not timestamp:
+        return None
+    return datetime(int(timestamp[0:4]), int(timestamp[5:7]), int(timestamp[8:10]),
+                    int(timestamp[11:13]), int(timestamp[14:16]))
+
+
+class Event():
+    """
+    One event row in EVENT_COLUMNS order.
+    Slots instead of a per-instance dict, and the few distinct values of
+    rigidity/location/rrule/category are interned so a calendar of rows
+    shares one copy of each.
+    Still indexes, unpacks and compares like the tuple it replaces,
+    so row[5] and `eventId, name, ... = row` keep working.
+    start/end datetimes and the display strings are computed on first
+    use and kept, so views and the scheduler don't re-parse on every
+    paint.
+    """
+
+    __slots__ = EVENT_FIELDS + ("startCache", "endCache", "labelCache",
+                                "datedLabelCache", "tooltipCache")
+
+    def __init__(self, eventId, name, date, rigidity, location,
+                 startTime, endTime, rrule, category):
+        self.id = eventId
+        self.name = name
+        self.date = date
+        self.rigidity = intern(rigidity) if type(rigidity) is str else rigidity
+        self.location = intern(location) if location else location
+        self.startTime = startTime
+        self.endTime = endTime
+        self.rrule = intern(rrule) if rrule else rrule
+        self.category = intern(category) if category else category
+        self.startCache = self.endCache = None
+        self.labelCache = self.datedLabelCache = self.tooltipCache = None
+
+    @property
+    def start(self):
+        """
+        startTime as a datetime, parsed once.
+        """
+        if self.startCache is None:
+            self.startCache = parseTimestamp(self.startTime)
+        return self.startCache
+
+    @property
+    def end(self):
+        if self.endCache is None:
+            self.endCache = parseTimestamp(self.endTime)
+        return self.endCache
+
+    @property
+    def allDay(self):
+        return len(self.date) == len("dd-MM-yyyy")
+
+    def label(self, showDate=False):
+        """
+        One line description for lists, "HH:mm  name @ location",
+        with the date in front when showDate.
+        """
+        label = self.datedLabelCache if showDate else self.labelCache
+        if label is None:
+            startTime = self.startTime
+            if not startTime:
+                time = self.date
+            elif showDate:
+                time = f"{startTime[8:10]}-{startTime[5:7]}-{startTime[:4]} {startTime[11:16]}"
+            else:
+                time = startTime[11:16]
+            label = f"{time}  {self.name}"
+            if self.location:
+                label += f" @ {self.location}"
+            if self.rrule:
+                label += " ↻"  # marks occurrences of a recurring series
+            if showDate:
+                self.datedLabelCache = label
+            else:
+                self.labelCache = label
+        return label
+
+    def tooltip(self):
+        if self.tooltipCache is None:
+            tooltip = (f"{self.name}\n{self.startTime} - {self.endTime}\n"
+                       f"{self.rigidity}\n{self.location}")
+            if self.rrule:
+                tooltip += f"\nRepeats: {self.rrule}"
+            if self.category:
+                tooltip += f"\nCategory: {self.category}"
+            self.tooltipCache = tooltip
+        return self.tooltipCache
+
+    def asTuple(self):
+        return (self.id, self.name, self.date, self.rigidity, self.location,
+                self.startTime, self.endTime, self.rrule, self.category)
+
+    def __getitem__(self, index):
+        if type(index) is int:
+            return getattr(self, EVENT_FIELDS[index])
+        return self.asTuple()[index]
+
+    def __len__(self):
+        return len(EVENT_FIELDS)
+
+    def __iter__(self):
+        return iter(self.asTuple())
+
+    def __eq__(self, other):
+        if isinstance(other, Event):
+            other = other.asTuple()
+        if isinstance(other, tuple):
+            return self.asTuple() == other
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.asTuple())
+
+    def __repr__(self):
+        return f"Event{self.asTuple()!r}"
+
+
+def eventRow(cursor, row):
+    """
+    sqlite3 row factory building an Event from an EVENT_COLUMNS row.
+    """
+    return Event(*row)
@@ -1,15 +1,175 @@
 import sqlite3
-from datetime import datetime
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from itertools import islice
 import logging
+import threading
+import time
+from database.ChangeJournalClass import ChangeJournal, imageSql
+from database.ConnectionPoolClass import ConnectionPool, DEFAULT_POOL_SIZE
+from database.EventRecordClass import Event, eventRow
+from database.InstrumentationClass import instrumentation, timed
+from database.RecurrenceClass import OccurrenceCache, RecurrenceRule
+
+# Format written by AddEventGUI.getAllData and stored in the `date` column.
+LEGACY_DATE_FORMAT = "%d-%m-%Y %H:%M"
+LEGACY_DAY_FORMAT = "%d-%m-%Y"
+# Sortable ISO-8601 format stored in the startTime/endTime columns.
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M"
+# Events with no explicit end are treated as lasting this long.
+DEFAULT_DURATION = timedelta(hours=1)
+# Bumped whenever a new entry is appended to Events.migrations.
+SCHEMA_VERSION = 8
+# Rows handed to a single executemany call by Events.insertMany.
+DEFAULT_BATCH_SIZE = 1000
+# Fields of an event that Events.updateEvent accepts.
+UPDATABLE_FIELDS = ("name", "date", "rigidity", "location", "endDate",
+                    "rrule", "exdates", "category")
+# Rows fetched per query by Events.iterEvents and fetchEventsPage.
+DEFAULT_PAGE_SIZE = 500
+# Filters accepted by Events.iterEvents, key -> WHERE clause.
+EVENT_FILTERS = {
+    "start": "startTime >= ?",
+    "end": "startTime < ?",
+    "rigidity": "rigidity = ?",
+    "location": "location = ?",
+    "category": "category = ?",
+}
+# Column order of every row returned by the fetch methods.
+EVENT_COLUMNS = "id, name, date, rigidity, location, startTime, endTime, rrule, category"
+# Columns written by INSERT, in insertValues order. Events without a
+# uid of their own (one kept from an .ics UID) are given a random one.
+INSERT_EVENT = "INSERT INTO Events (name, date, rigidity, location, startTime, endTime, rrule, exdates, recurUntil, category, uid) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, coalesce(?, lower(hex(randomblob(16)))))"
+# FTS5 table behind Events.search. The prefix indexes cover 2-4 letter
+# prefixes, longer ones expand to few enough terms to stay cheap.
+CREATE_SEARCH_INDEX = "CREATE VIRTUAL TABLE IF NOT EXISTS EventsSearch USING fts5(name, location, content='Events', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3 4')"
+# Per row insert triggers, dropped by insertMany while bulk loading.
+# INSERT_EVENT always sets a uid, the other two are replaced by one
+# INSERT ... SELECT over the new rows.
+UID_DEFAULT_TRIGGER = (
+    "CREATE TRIGGER IF NOT EXISTS events_uid_default AFTER INSERT ON Events WHEN new.uid IS NULL BEGIN "
+    "UPDATE Events SET uid = lower(hex(randomblob(16))) WHERE id = new.id; END")
+SEARCH_INSERT_TRIGGER = (
+    "CREATE TRIGGER IF NOT EXISTS events_search_insert AFTER INSERT ON Events BEGIN "
+    "INSERT INTO EventsSearch (rowid, name, location) VALUES (new.id, new.name, new.location); END")
+JOURNAL_INSERT_TRIGGER = (
+    "CREATE TRIGGER IF NOT EXISTS events_journal_insert AFTER INSERT ON Events WHEN new.uid IS NOT NULL BEGIN "
+    f"INSERT INTO EventsJournal (action, uid, new) VALUES ('insert', new.uid, {imageSql('new')}); END")
+BULK_INSERT_TRIGGERS = {"events_uid_default": UID_DEFAULT_TRIGGER,
+                        "events_search_insert": SEARCH_INSERT_TRIGGER,
+                        "events_journal_insert": JOURNAL_INSERT_TRIGGER}
+# Search words shorter than this match whole words only: the prefix
+# indexes start at 2 letters and a 1 letter prefix expands to most of
+# the vocabulary.
+MIN_PREFIX_LENGTH = 2
+# insertMany calls with at least this many rows in their first batch
+# index them in bulk rather than through the per row triggers.
+BULK_INDEX_ROWS = 500
+# Events lasting longer than this are "long", idx_events_long finds
+# the ones running into a range from before it, the others are found
+# through idx_events_start within this much of the range.
+LONG_EVENT = timedelta(days=1)
+LONG_EVENT_CLAUSE = f"julianday(endTime) - julianday(startTime) > {LONG_EVENT.days}"
+DEFAULT_PATH = "database/events.db"
+
+# The Events instance shared by the GUI, created on first use by sharedEvents.
+_sharedEvents = None
+
+
+def parseLegacyDate(date):
+    """
+    Parses a `date` column value ("dd-MM-yyyy HH:mm" or "dd-MM-yyyy")
+    into a (start, end) pair of datetimes.
+    Date-only values become all-day events.
+    Returns (None, None) if the value can't be parsed.
+    """
+    try:
+        # slicing the fixed-width format is much faster than strptime,
+        # which matters when importing thousands of rows
+        if len(date) == 16 and date[2] == date[5] == "-" and date[10] == " ":
+            start = datetime(int(date[6:10]), int(date[3:5]), int(date[0:2]),
+                             int(date[11:13]), int(date[14:16]))
+        else:
+            start = datetime.strptime(date, LEGACY_DATE_FORMAT)
+        return start, start + DEFAULT_DURATION
+    except (TypeError, ValueError):
+        pass
+    try:
+        start = datetime.strptime(date, LEGACY_DAY_FORMAT)
+        return start, start + timedelta(days=1)
+    except (TypeError, ValueError):
+        return None, None
+
+
+def toTimestamp(value):
+    """
+    Converts a datetime, or an already formatted timestamp string,
+    into the sortable TIMESTAMP_FORMAT used for range queries.
+    """
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            # same text as strftime(TIMESTAMP_FORMAT), a few times faster
+            return value.isoformat(" ", "minutes")
+        return value.strftime(TIMESTAMP_FORMAT)
+    return value
+
+
+def eventValues(event):
+    """
+    Normalises an event into the (name, date, rigidity, location,
+    startTime, endTime, rrule, exdates, recurUntil, category) values
+    inserted into the Events table.
+    event is either a dict shaped like AddEventGUI.getAllData
+    (optionally with "endDate", "rrule", "exdates" and "category")
+    or a (name, date, rigidity, location) tuple.
+    """
+    rrule = exdates = category = None
+    if isinstance(event, dict):
+        name, date = event["name"], event["date"]
+        rigidity, location = event.get("rigidity"), event.get("location")
+        endDate = event.get("endDate")
+        rrule, exdates = event.get("rrule"), event.get("exdates")
+        category = event.get("category") or None
+    else:
+        name, date, rigidity, location = event
+        endDate = None
+    start, end = parseLegacyDate(date)
+    if endDate is not None:
+        end = endDate
+
+    recurUntil = None
+    if rrule:
+        rule = RecurrenceRule.parse(str(rrule))  # ValueError if unsupported
+        rrule = str(rule)
+        if start is not None:
+            recurUntil = toTimestamp(rule.lastOccurrence(start))
+    else:
+        rrule = None
+    if exdates and not isinstance(exdates, str):
+        exdates = ",".join(sorted(toTimestamp(value) for value in exdates))
+    return (name, date, rigidity, location,
+            toTimestamp(start), toTimestamp(end), rrule, exdates or None, recurUntil,
+            category)
+
+
+def insertValues(event):
+    """
+    eventValues plus the event's "uid" (None for a tuple or a dict
+    without one), the parameters of INSERT_EVENT.
+    """
+    uid = event.get("uid") if isinstance(event, dict) else None
+    return (*eventValues(event), uid)
 
 
 class Events():
     """
     Events class to create an SQLite Database (events.db).
     Handles querying and creation of database.
+    One instance can be shared between threads, each thread is given
+    its own pooled connection and cursor through self.con/self.cur.
     """
 
-    def __init__(self):
+    def __init__(self, path=DEFAULT_PATH, poolSize=DEFAULT_POOL_SIZE):
         """
         Handles connecting to events.db and
         inital creation of table and
@@ -17,34 +177,420 @@ class Events():
         """
         self.now = datetime.now()
         self.dateTimeNow = self.now.strftime("%d/%m/%Y, %H:%M:%S")
-        self.con = sqlite3.connect(
-            "database/events.db")  # connects to database
-        self.cur = self.con.cursor()  # allows SQL executions
-        if (self.checkTables() is []):
+        self.path = path
+        self.pool = ConnectionPool(path, poolSize)  # connects to database
+        instrumentation.watchPool(self.pool)
+        # per thread transaction state, see self.transaction()
+        self.local = threading.local()
+        self.lastInsertRate = None  # rows/sec of the last insertMany
+        self.listeners = []  # called with (action, rows) after each change
+        self.occurrenceCache = OccurrenceCache()  # recurring series by month
+        self.journal = ChangeJournal(self)  # undo/redo and sync deltas
+        if ("Events",) not in self.checkTables():
             print("Attempting creation")
             logging.warning(
                 "No previous Tables found, attempting creation of new")
             self.initialCreation()
+        self.migrate()
+
+    @property
+    def con(self):
+        """
+        The calling thread's connection.
+        """
+        return self.pool.threadConnection()
+
+    @property
+    def cur(self):
+        """
+        The calling thread's cursor, allows SQL executions.
+        """
+        return self.pool.threadCursor()
+
+    @property
+    def transactionDepth(self):
+        # > 0 while the calling thread is inside self.transaction()
+        return getattr(self.local, "transactionDepth", 0)
+
+    @transactionDepth.setter
+    def transactionDepth(self, depth):
+        self.local.transactionDepth = depth
+
+    @property
+    def pendingChanges(self):
+        # changes waiting for the calling thread's transaction to commit
+        if not hasattr(self.local, "pendingChanges"):
+            self.local.pendingChanges = []
+        return self.local.pendingChanges
+
+    @pendingChanges.setter
+    def pendingChanges(self, changes):
+        self.local.pendingChanges = changes
+
+    def releaseConnection(self):
+        """
+        Returns the calling thread's connection to the pool,
+        for threads that are done with the database for now.
+        """
+        self.pool.releaseThread()
 
     def initialCreation(self):
         """
-        Runs if self.checkTables returns an empty tuple ie no tables created.
+        Runs if self.checkTables doesn't find the Events table.
         Creates the inital table with required headers.
         """
         print('Creating tables')
         self.cur.execute(
-            "CREATE TABLE Events (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, date TEXT NOT NULL, rigidity INTEGER, location TEXT);")
+            "CREATE TABLE IF NOT EXISTS Events (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, date TEXT NOT NULL, rigidity INTEGER, location TEXT);")
+        self.con.commit()
+
+    def schemaVersion(self):
+        """
+        Returns the schema version stored in the database header.
+        """
+        self.cur.execute("PRAGMA user_version")
+        return self.cur.fetchone()[0]
+
+    def migrate(self):
+        """
+        Runs every migration newer than the database's user_version,
+        each one in its own transaction so a failure leaves
+        the previous version intact. A database written by a newer
+        Calen (user_version above SCHEMA_VERSION) is refused rather than
+        run against a schema this code doesn't know.
+        """
+        version = self.schemaVersion()
+        if version > SCHEMA_VERSION:
+            raise sqlite3.DatabaseError(
+                f"{self.path} has schema version {version}, newer than the "
+                f"{SCHEMA_VERSION} this version of Calen supports")
+        for targetVersion, migration in enumerate(self.migrations(), start=1):
+            if version >= targetVersion:
+                continue
+            try:
+                # take the write lock before re-reading the version so two
+                # connections opening at once don't both run the migration
+                self.cur.execute("BEGIN IMMEDIATE")
+                version = self.schemaVersion()
+                if version >= targetVersion:
+                    self.con.commit()
+                    continue
+                logging.info("Migrating events.db to schema version %d",
+                             targetVersion)
+                migration()
+                # PRAGMA doesn't accept parameters, targetVersion is an int.
+                self.cur.execute(f"PRAGMA user_version = {targetVersion}")
+                self.con.commit()
+            except sqlite3.Error:
+                self.con.rollback()
+                logging.exception(
+                    "Migration to schema version %d failed", targetVersion)
+                raise
+            version = targetVersion
+
+    def migrations(self):
+        """
+        Ordered list of schema migrations, index + 1 is the version
+        each one brings the database up to.
+        """
+        return [
+            self.migrateTimestamps,
+            self.migrateNameIndex,
+            self.migrateSearchIndex,
+            self.migrateRecurrence,
+            self.migrateCategory,
+            self.migrateJournal,
+            self.migrateSearchPrefixes,
+            self.migrateLongEvents,
+        ]
+
+    def migrateTimestamps(self):
+        """
+        Version 1: adds sortable startTime/endTime columns with an index
+        on startTime and converts the existing `date` rows into them.
+        """
+        self.cur.execute("ALTER TABLE Events ADD COLUMN startTime TEXT")
+        self.cur.execute("ALTER TABLE Events ADD COLUMN endTime TEXT")
+        self.cur.execute(
+            "CREATE INDEX IF NOT EXISTS idx_events_start ON Events (startTime)")
+
+        self.cur.execute("SELECT id, date FROM Events")
+        converted = []
+        for eventId, date in self.cur.fetchall():
+            start, end = parseLegacyDate(date)
+            if start is None:
+                logging.warning(
+                    "Could not convert date %r of event %d", date, eventId)
+                continue
+            converted.append((toTimestamp(start), toTimestamp(end), eventId))
+        self.cur.executemany(
+            "UPDATE Events SET startTime = ?, endTime = ? WHERE id = ?",
+            converted)
 
-    def insertEvent(self, eventName="test", eventDate="testDate", rigidity="testRigidity", location="testLocation"):
+    def migrateNameIndex(self):
+        """
+        Version 2: indexes name for searching by event name.
+        """
+        self.cur.execute(
+            "CREATE INDEX IF NOT EXISTS idx_events_name ON Events (name)")
+
+    def migrateSearchIndex(self):
+        """
+        Version 3: FTS5 index over name and location, kept in sync with
+        Events by triggers, backing Events.search.
+        """
+        self.cur.execute(CREATE_SEARCH_INDEX)
+        self.cur.execute(SEARCH_INSERT_TRIGGER)
+        self.cur.execute(
+            "CREATE TRIGGER IF NOT EXISTS events_search_delete AFTER DELETE ON Events BEGIN "
+            "INSERT INTO EventsSearch (EventsSearch, rowid, name, location) VALUES ('delete', old.id, old.name, old.location); END")
+        self.cur.execute(
+            "CREATE TRIGGER IF NOT EXISTS events_search_update AFTER UPDATE OF name, location ON Events BEGIN "
+            "INSERT INTO EventsSearch (EventsSearch, rowid, name, location) VALUES ('delete', old.id, old.name, old.location); "
+            "INSERT INTO EventsSearch (rowid, name, location) VALUES (new.id, new.name, new.location); END")
+        # index the rows that existed before the triggers
+        self.cur.execute(
+            "INSERT INTO EventsSearch (EventsSearch) VALUES ('rebuild')")
+
+    def migrateRecurrence(self):
+        """
+        Version 4: recurrence rule, excluded occurrences and the start of
+        the last occurrence (NULL if endless) of recurring series.
+        The partial index only covers recurring rows, so finding the
+        series touching a range doesn't read one-off events.
+        """
+        self.cur.execute("ALTER TABLE Events ADD COLUMN rrule TEXT")
+        self.cur.execute("ALTER TABLE Events ADD COLUMN exdates TEXT")
+        self.cur.execute("ALTER TABLE Events ADD COLUMN recurUntil TEXT")
+        self.cur.execute(
+            "CREATE INDEX IF NOT EXISTS idx_events_recurring ON Events (startTime, recurUntil) WHERE rrule IS NOT NULL")
+
+    def migrateCategory(self):
+        """
+        Version 5: category label, given by the user or learnt by
+        CategoryClassifier.
+        """
+        self.cur.execute("ALTER TABLE Events ADD COLUMN category TEXT")
+
+    def migrateJournal(self):
+        """
+        Version 6: a uid per event that stays the same across databases,
+        and the append-only EventsJournal written by triggers in the same
+        transaction as every change (see ChangeJournal). Existing rows
+        are journalled as inserts so changesSince(0) exports everything.
+        Rows inserted without a uid (e.g. by Calen.old.py) are given one.
+        """
+        self.cur.execute("ALTER TABLE Events ADD COLUMN uid TEXT")
+        self.cur.execute("UPDATE Events SET uid = lower(hex(randomblob(16)))")
+        self.cur.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_events_uid ON Events (uid)")
+        self.cur.execute(
+            "CREATE TABLE IF NOT EXISTS EventsJournal (seq INTEGER PRIMARY KEY AUTOINCREMENT, at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now')), action TEXT NOT NULL, uid TEXT NOT NULL, old TEXT, new TEXT)")
+        self.cur.execute(
+            "CREATE INDEX IF NOT EXISTS idx_journal_uid ON EventsJournal (uid, seq)")
+        self.cur.execute(UID_DEFAULT_TRIGGER)
+        self.cur.execute(JOURNAL_INSERT_TRIGGER)
+        self.cur.execute(
+            "CREATE TRIGGER IF NOT EXISTS events_journal_update AFTER UPDATE ON Events BEGIN "
+            f"INSERT INTO EventsJournal (action, uid, old, new) VALUES ('update', new.uid, {imageSql('old')}, {imageSql('new')}); END")
+        self.cur.execute(
+            "CREATE TRIGGER IF NOT EXISTS events_journal_delete AFTER DELETE ON Events BEGIN "
+            f"INSERT INTO EventsJournal (action, uid, old) VALUES ('delete', old.uid, {imageSql('old')}); END")
+        self.cur.execute(
+            f"INSERT INTO EventsJournal (action, uid, new) SELECT 'insert', uid, {imageSql('Events')} FROM Events ORDER BY id")
+
+    def migrateSearchPrefixes(self):
+        """
+        Version 7: rebuilds EventsSearch with a 4 letter prefix index,
+        so common 4 letter prefixes don't expand to thousands of terms.
+        """
+        self.cur.execute("DROP TABLE IF EXISTS EventsSearch")
+        self.cur.execute(CREATE_SEARCH_INDEX)
+        self.cur.execute(
+            "INSERT INTO EventsSearch (EventsSearch) VALUES ('rebuild')")
+
+    def migrateLongEvents(self):
+        """
+        Version 8: partial index on the end of events longer than
+        LONG_EVENT, so fetchOverlappingEvents finds a multi-day event
+        that started long before a range without scanning up to it.
+        """
+        self.cur.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_events_long ON Events (endTime) WHERE {LONG_EVENT_CLAUSE}")
+
+    @contextmanager
+    def transaction(self):
+        """
+        Groups every write made inside the with-block into one transaction.
+        Commits on exit or rolls everything back if an exception is raised.
+        Nested blocks join the outermost transaction.
+        """
+        self.transactionDepth += 1
+        try:
+            yield self
+        except BaseException:
+            self.transactionDepth -= 1
+            if self.transactionDepth == 0:
+                self.con.rollback()
+                self.pendingChanges.clear()
+                self.journal.discardGroup()
+            raise
+        self.transactionDepth -= 1
+        self.commit()
+
+    def commit(self):
+        """
+        Commits unless a self.transaction() block is open,
+        in which case the block commits when it exits.
+        Listeners are only told about changes once they are committed.
+        """
+        if self.transactionDepth == 0:
+            self.con.commit()  # commit allows for the changes to persist after closure
+            compactDue = self.journal.commitGroup()
+            pendingChanges, self.pendingChanges = self.pendingChanges, []
+            for action, rows in pendingChanges:
+                self.notifyListeners(action, rows)
+            if compactDue:
+                self.journal.compact()
+
+    def notifyListeners(self, action, rows):
+        """
+        Sends a committed change to every listener. Also used to relay
+        changes committed through another connection to the same file.
+        """
+        for listener in self.listeners:
+            listener(action, rows)
+
+    def addListener(self, listener):
+        """
+        Registers listener(action, rows) to be called after events are
+        committed. action is "insert" or "delete" and rows are the
+        affected rows in EVENT_COLUMNS order. An update is reported as
+        a delete of the old rows followed by an insert of the new ones.
+        """
+        self.listeners.append(listener)
+
+    def removeListener(self, listener):
+        self.listeners.remove(listener)
+
+    def queueChange(self, action, rows):
+        """
+        Records a change for the listeners, sent on the next commit.
+        """
+        if self.listeners and rows:
+            self.pendingChanges.append((action, rows))
+
+    @timed("Events.insertEvent")
+    def insertEvent(self, eventName="test", eventDate="testDate", rigidity="testRigidity", location="testLocation", endDate=None, rrule=None, category=None):
         """
         Inserts event into Events table. Uses passed through Name,
         Date, Rigidity, Location.
+        eventDate is in the "dd-MM-yyyy HH:mm" format from AddEventGUI,
+        endDate optionally overrides the default duration and
+        rrule (e.g. "FREQ=WEEKLY;BYDAY=MO") makes it a recurring series.
+        category labels the event, e.g. "Study".
+        Returns the new event's id.
         """
         self.cur.execute(
-            "INSERT INTO Events (name, date, rigidity, location) VALUES (?, ?, ?, ?)",
-            (eventName, eventDate, rigidity, location,)
+            INSERT_EVENT,
+            insertValues({"name": eventName, "date": eventDate,
+                         "rigidity": rigidity, "location": location,
+                         "endDate": endDate, "rrule": rrule,
+                         "category": category})
         )
-        self.con.commit()  # commit allows for the changes to persist after closure
+        eventId = self.cur.lastrowid
+        if self.listeners:
+            self.queueChange("insert", self.fetchEventsById(eventId, eventId))
+        self.journal.recordWrites(1)
+        self.commit()
+        return eventId
+
+    @timed("Events.insertMany")
+    def insertMany(self, events, batchSize=DEFAULT_BATCH_SIZE):
+        """
+        Bulk inserts events (any iterable, generators are consumed lazily)
+        in batches of batchSize rows using executemany.
+        A dict may carry the "uid" to store, which must not be taken yet.
+        All batches share one transaction so a failure inserts nothing.
+        Returns the number of rows inserted and logs the rows/sec.
+        Big imports skip the per row search and journal triggers and
+        index all their rows in one pass at the end (see bulkIndex).
+        """
+        events = iter(events)
+        inserted = 0
+        startedAt = time.perf_counter()
+        with self.transaction():
+            batch = [insertValues(event) for event in islice(events, batchSize)]
+            bulk = len(batch) >= BULK_INDEX_ROWS
+            if bulk:
+                # DDL doesn't open a transaction by itself, the triggers
+                # must only go missing inside this one
+                if not self.con.in_transaction:
+                    self.cur.execute("BEGIN IMMEDIATE")
+                lastIdBefore = self.lastEventId()
+                for trigger in BULK_INSERT_TRIGGERS:
+                    self.cur.execute(f"DROP TRIGGER {trigger}")
+            while batch:
+                self.cur.executemany(INSERT_EVENT, batch)
+                inserted += len(batch)
+                if self.listeners:
+                    # AUTOINCREMENT ids of one executemany are consecutive
+                    # and end at the sequence value while we hold the lock
+                    lastId = self.lastEventId()
+                    self.queueChange("insert", self.fetchEventsById(
+                        lastId - len(batch) + 1, lastId))
+                if not bulk:
+                    self.journal.recordWrites(len(batch))
+                batch = [insertValues(event) for event in islice(events, batchSize)]
+            if bulk:
+                self.bulkIndex(lastIdBefore)
+                self.journal.recordWrites(inserted)
+        elapsed = time.perf_counter() - startedAt
+        self.lastInsertRate = inserted / elapsed if elapsed > 0 else None
+        logging.info("Inserted %d events in %.3fs (%.0f rows/sec)",
+                     inserted, elapsed, self.lastInsertRate or 0)
+        return inserted
+
+    def lastEventId(self):
+        """
+        The largest id ever given out, AUTOINCREMENT never reuses it.
+        """
+        self.cur.execute("SELECT seq FROM sqlite_sequence WHERE name = 'Events'")
+        row = self.cur.fetchone()
+        return row[0] if row else 0
+
+    def bulkIndex(self, lastIdBefore):
+        """
+        Adds the rows inserted after lastIdBefore to EventsSearch and
+        EventsJournal with one INSERT ... SELECT each, then puts back
+        the insert triggers insertMany dropped. An FTS5 insert per row
+        from a trigger costs several times more than indexing the rows
+        together, and any AFTER INSERT trigger slows every row down
+        even when its WHEN clause is false. Runs inside insertMany's
+        transaction, so other connections never see the triggers missing.
+        """
+        self.cur.execute(
+            "INSERT INTO EventsSearch (rowid, name, location) SELECT id, name, location FROM Events WHERE id > ?",
+            (lastIdBefore,))
+        self.cur.execute(
+            f"INSERT INTO EventsJournal (action, uid, new) SELECT 'insert', uid, {imageSql('Events')} FROM Events WHERE id > ? ORDER BY id",
+            (lastIdBefore,))
+        for trigger in BULK_INSERT_TRIGGERS.values():
+            self.cur.execute(trigger)
+
+    @timed("Events.importDatabase")
+    def importDatabase(self, path, batchSize=DEFAULT_BATCH_SIZE):
+        """
+        Streams the events out of another events.db (such as the one
+        written by Calen.old.py) into this database via insertMany.
+        """
+        source = sqlite3.connect(path)
+        try:
+            rows = source.execute(
+                "SELECT name, date, rigidity, location FROM Events")
+            return self.insertMany(rows, batchSize)
+        finally:
+            source.close()
 
     def checkTables(self):
         """
@@ -53,37 +599,315 @@ class Events():
         self.cur.execute("SELECT name FROM sqlite_master WHERE type='table'")
         return self.cur.fetchall()
 
-    def deleteEvent(self, eventName="test"):
+    @timed("Events.deleteEvent")
+    def deleteEvent(self, eventId):
+        """
+        Deletes the event with the passed through id.
+        Returns True if an event was deleted.
+        """
+        return self.deleteMany((eventId,)) == 1
+
+    @timed("Events.deleteMany")
+    def deleteMany(self, eventIds):
+        """
+        Deletes every event in eventIds by primary key in one transaction.
+        Returns the number of events deleted.
+        """
+        eventIds = list(eventIds)
+        with self.transaction():
+            if self.listeners:
+                deleted = []
+                for eventId in eventIds:
+                    deleted.extend(self.fetchEventsById(eventId, eventId))
+                self.queueChange("delete", deleted)
+            self.cur.executemany("DELETE FROM Events WHERE id = ?",
+                                 ((eventId,) for eventId in eventIds))
+            count = self.cur.rowcount
+            self.journal.recordWrites(count)
+        return count
+
+    @timed("Events.updateEvent")
+    def updateEvent(self, eventId, **fields):
         """
-        Deletes an event based on the passed through parameter.
+        Updates the given fields (see UPDATABLE_FIELDS) of one event by id.
+        Changing the date recomputes startTime/endTime, changing the rule
+        recomputes recurUntil.
+        Returns True if the event exists.
         """
-        self.cur.execute("DELETE FROM Events WHERE name = ?", (eventName,))
+        unknown = set(fields) - set(UPDATABLE_FIELDS)
+        if unknown:
+            raise TypeError(f"Unknown event fields: {', '.join(sorted(unknown))}")
+        with self.transaction():
+            old = self.fetchEventsById(eventId, eventId)
+            if not old:
+                return False
+            self.cur.execute(
+                "SELECT name, date, rigidity, location, endTime, rrule, exdates, category FROM Events WHERE id = ?",
+                (eventId,))
+            name, date, rigidity, location, endTime, rrule, exdates, category = self.cur.fetchone()
+            event = {"name": name, "date": date, "rigidity": rigidity,
+                     "location": location, "rrule": rrule, "exdates": exdates,
+                     "category": category,
+                     # moving the date without an end resets the duration
+                     "endDate": None if "date" in fields else endTime}
+            event.update(fields)
+            self.cur.execute(
+                "UPDATE Events SET name = ?, date = ?, rigidity = ?, location = ?, startTime = ?, endTime = ?, rrule = ?, exdates = ?, recurUntil = ?, category = ? WHERE id = ?",
+                (*eventValues(event), eventId,))
+            self.journal.recordWrites(1)
+            if self.listeners:
+                self.queueChange("delete", old)
+                self.queueChange("insert", self.fetchEventsById(eventId, eventId))
+        return True
 
+    def queryEvents(self, query, parameters=()):
+        """
+        Runs a SELECT of EVENT_COLUMNS and returns the rows as Event
+        records, built by the row factory as they're read.
+        """
+        cursor = self.con.cursor()
+        cursor.row_factory = eventRow
+        try:
+            return cursor.execute(query, parameters).fetchall()
+        finally:
+            cursor.close()
+
+    @timed("Events.fetchEventsById")
+    def fetchEventsById(self, firstId, lastId):
+        """
+        Fetches the events with ids in [firstId, lastId].
+        """
+        return self.queryEvents(
+            f"SELECT {EVENT_COLUMNS} FROM Events WHERE id BETWEEN ? AND ?",
+            (firstId, lastId,))
+
+    @timed("Events.fetchDayEvents")
     def fetchDayEvents(self, date):
+        """
+        Fetches the events starting on the given day.
+        date is either a datetime or a "dd-MM-yyyy" string
+        as sent by CalenWidget.
+        """
+        if not isinstance(date, datetime):
+            date = datetime.strptime(date, LEGACY_DAY_FORMAT)
+        dayStart = date.replace(hour=0, minute=0, second=0, microsecond=0)
+        return self.fetchRangeEvents(dayStart, dayStart + timedelta(days=1))
+
+    @timed("Events.fetchRangeEvents")
+    def fetchRangeEvents(self, start, end):
+        """
+        Fetches the events starting in [start, end), ordered by start.
+        start and end are datetimes or TIMESTAMP_FORMAT strings.
+        Uses idx_events_start so only the matching rows are read.
+        Occurrences of recurring series falling in the range are included,
+        with the series' id and their own date/startTime/endTime.
+        """
+        rows = self.queryEvents(
+            f"SELECT {EVENT_COLUMNS} FROM Events WHERE startTime >= ? AND startTime < ? AND rrule IS NULL ORDER BY startTime",
+            (toTimestamp(start), toTimestamp(end),))
+        occurrences = list(self.iterOccurrences(start, end))
+        if occurrences:
+            rows.extend(occurrences)
+            rows.sort(key=lambda row: row.startTime)
+        return rows
+
+    @timed("Events.fetchOverlappingEvents")
+    def fetchOverlappingEvents(self, start, end):
+        """
+        Fetches the events running at any time in [start, end), ordered
+        by start: unlike fetchRangeEvents this includes events that
+        started before start and end after it, however long they last.
+        Events up to LONG_EVENT long are found through idx_events_start
+        from LONG_EVENT before start, longer ones through idx_events_long.
+        Occurrences of recurring series are included as in fetchRangeEvents.
+        """
+        if not isinstance(start, datetime):
+            start = datetime.fromisoformat(start)
+        startTime, endTime = toTimestamp(start), toTimestamp(end)
+        longBefore = toTimestamp(start - LONG_EVENT)
+        rows = self.queryEvents(
+            f"SELECT {EVENT_COLUMNS} FROM Events WHERE startTime >= ? AND startTime < ? AND endTime > ? AND rrule IS NULL "
+            f"UNION ALL SELECT {EVENT_COLUMNS} FROM Events WHERE {LONG_EVENT_CLAUSE} AND endTime > ? AND startTime < ? AND rrule IS NULL "
+            "ORDER BY startTime",
+            (longBefore, endTime, startTime, startTime, longBefore))
+        occurrences = list(self.iterOccurrences(start, end, overlapping=True))
+        if occurrences:
+            rows.extend(occurrences)
+            rows.sort(key=lambda row: row.startTime)
+        return rows
+
+    def iterOccurrences(self, start, end, overlapping=False):
+        """
+        Lazily expands the recurring series overlapping [start, end) into
+        occurrence rows, only for that range and through the occurrence cache.
+        Occurrences start in the range, or with overlapping also ones
+        that started earlier and are still running at start.
+        """
+        if not isinstance(start, datetime):
+            start = datetime.fromisoformat(start)
+        if not isinstance(end, datetime):
+            end = datetime.fromisoformat(end)
+        # an overlapping occurrence started at most its duration before start
+        lastStart = (f"julianday(recurUntil) + julianday(coalesce(endTime, startTime)) - julianday(startTime) > julianday(?)"
+                     if overlapping else "recurUntil >= ?")
+        self.cur.execute(
+            f"SELECT {EVENT_COLUMNS}, exdates FROM Events WHERE rrule IS NOT NULL AND startTime < ? AND (recurUntil IS NULL OR {lastStart})",
+            (toTimestamp(end), toTimestamp(start),))
+        for *row, exdates in self.cur.fetchall():
+            eventId, name, date, rigidity, location, startTime, endTime, rrule, category = row
+            seriesStart = datetime.fromisoformat(startTime)
+            duration = (datetime.fromisoformat(endTime) - seriesStart
+                        if endTime else DEFAULT_DURATION)
+            dateFormat = LEGACY_DAY_FORMAT if len(date) == 10 else LEGACY_DATE_FORMAT
+            expandFrom = start - duration if overlapping else start
+            for occurrence in self.occurrenceCache.occurrences(
+                    rrule, exdates, seriesStart, expandFrom, end):
+                if overlapping and occurrence + duration <= start:
+                    continue
+                yield Event(eventId, name, occurrence.strftime(dateFormat), rigidity,
+                            location, toTimestamp(occurrence),
+                            toTimestamp(occurrence + duration), rrule, category)
+
+    @timed("Events.addException")
+    def addException(self, eventId, occurrenceStart):
+        """
+        Removes a single occurrence (by its start) from a recurring series.
+        """
+        self.cur.execute("SELECT exdates FROM Events WHERE id = ?", (eventId,))
+        row = self.cur.fetchone()
+        if row is None:
+            return False
+        exdates = set(row[0].split(",")) if row[0] else set()
+        exdates.add(toTimestamp(occurrenceStart))
+        return self.updateEvent(eventId, exdates=",".join(sorted(exdates)))
+
+    @timed("Events.fetchDayCounts")
+    def fetchDayCounts(self, start, end):
+        """
+        Counts the events starting on each day in [start, end) with one
+        GROUP BY over idx_events_start, plus the occurrences of recurring
+        series in the range.
+        Returns a dict of "yyyy-MM-dd" -> number of events.
+        """
         self.cur.execute(
-            "SELECT * FROM Events WHERE date LIKE ?", (f"%{date}%",))
-        dayEvents = self.cur.fetchall()
-        return dayEvents
+            "SELECT substr(startTime, 1, 10) AS day, COUNT(*) FROM Events WHERE startTime >= ? AND startTime < ? AND rrule IS NULL GROUP BY day",
+            (toTimestamp(start), toTimestamp(end),))
+        dayCounts = dict(self.cur.fetchall())
+        for occurrence in self.iterOccurrences(start, end):
+            day = occurrence.startTime[:10]
+            dayCounts[day] = dayCounts.get(day, 0) + 1
+        return dayCounts
 
+    @timed("Events.fetchLocationCounts")
+    def fetchLocationCounts(self, bucketHours):
+        """
+        Counts the events at each location per category, time of day
+        bucket (bucketHours wide) and weekday (Monday is 0) in one
+        GROUP BY. A recurring series counts once.
+        Returns (category, bucket, weekday, location, count) tuples.
+        """
+        self.cur.execute(
+            "SELECT category, CAST(substr(startTime, 12, 2) AS INTEGER) / ?, (CAST(strftime('%w', startTime) AS INTEGER) + 6) % 7, location, COUNT(*) FROM Events WHERE location IS NOT NULL AND location != '' AND startTime IS NOT NULL GROUP BY 1, 2, 3, 4",
+            (bucketHours,))
+        return self.cur.fetchall()
+
+    @timed("Events.search")
+    def search(self, query, limit=20):
+        """
+        Full-text search over event names and locations.
+        Every word of query must match the start of a word in the event,
+        so it works as-you-type; single letters must match a whole word
+        (see MIN_PREFIX_LENGTH). Returns up to limit rows, most recently
+        added first; walking rowids lets FTS5 stop after limit matches
+        instead of ranking every match.
+        """
+        # quote each word so FTS5 syntax in user input is taken literally
+        terms = ['"' + word.replace('"', '""') + '"' + ("*" if len(word) >= MIN_PREFIX_LENGTH else "")
+                 for word in query.split()]
+        if not terms:
+            return []
+        return self.queryEvents(
+            f"SELECT {', '.join('Events.' + column for column in EVENT_COLUMNS.split(', '))} "
+            "FROM EventsSearch JOIN Events ON Events.id = EventsSearch.rowid "
+            "WHERE EventsSearch MATCH ? ORDER BY EventsSearch.rowid DESC LIMIT ?",
+            (" ".join(terms), limit,))
+
+    @timed("Events.fetchEventsPage")
+    def fetchEventsPage(self, filter=None, after=None, pageSize=DEFAULT_PAGE_SIZE):
+        """
+        Fetches up to pageSize events ordered by (startTime, id), starting
+        after the (startTime, id) key after (None for the first page).
+        Keyset pagination: each page seeks straight to its key through
+        idx_events_start (which ends in the rowid), so page 2000 costs
+        the same as page 1, unlike OFFSET.
+        filter is a dict of EVENT_FILTERS keys, datetimes are accepted
+        for start/end. Events with no parseable date come first.
+        """
+        clauses, parameters = [], []
+        for key, value in (filter or {}).items():
+            if key not in EVENT_FILTERS:
+                raise TypeError(f"Unknown event filter: {key}")
+            clauses.append(EVENT_FILTERS[key])
+            parameters.append(toTimestamp(value))
+        if after is not None:
+            afterStart, afterId = after
+            if afterStart is None:
+                clauses.append("((startTime IS NULL AND id > ?) OR startTime IS NOT NULL)")
+                parameters.append(afterId)
+            else:
+                clauses.append("(startTime, id) > (?, ?)")
+                parameters.extend((afterStart, afterId))
+        where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+        return self.queryEvents(
+            f"SELECT {EVENT_COLUMNS} FROM Events {where}ORDER BY startTime, id LIMIT ?",
+            (*parameters, pageSize,))
+
+    def iterEvents(self, filter=None, pageSize=DEFAULT_PAGE_SIZE):
+        """
+        Generator over every stored event matching filter (see
+        fetchEventsPage) ordered by start, reading pageSize rows at a time
+        so memory stays flat however big the table is.
+        Recurring series are yielded once, not per occurrence.
+        """
+        after = None
+        while True:
+            page = self.fetchEventsPage(filter, after, pageSize)
+            yield from page
+            if len(page) < pageSize:
+                return
+            after = (page[-1].startTime, page[-1].id)
+
+    @timed("Events.fetchAllEvents")
     def fetchAllEvents(self):
+        """
+        Every event in one list, memory grows with the table.
+        Prefer iterEvents for anything walking the whole history.
+        """
         try:
-            self.cur.execute("SELECT * FROM Events")
-            rows = self.cur.fetchall()
-            return rows
+            return self.queryEvents(f"SELECT {EVENT_COLUMNS} FROM Events")
         except sqlite3.OperationalError:
             logging.warning("No previous events created.")
             return None
 
     def close(self):
-        self.cur.close()
+        self.pool.closeAll()
+
+
+def sharedEvents(path=DEFAULT_PATH):
+    """
+    Returns the process wide Events instance, connecting on the first call
+    rather than at import time. path only applies to that first call.
+    """
+    global _sharedEvents
+    if _sharedEvents is None:
+        _sharedEvents = Events(path)
+    return _sharedEvents
 
 
 def formatGetAllEvents(allEvents):
     """
-    Formats all events based on the sqlite exection (SELECT * FROM events)
-    FOR QComboBox.
+    Formats fetched events (Event records) into one line each,
+    e.g. for a QComboBox. The labels are cached on the records, so
+    formatting the same rows again is free.
     """
-    # TODO: need to finishthis fucntion -- Formatting -- CHANGE TO JUST FORMAT 1 PASSED-THROUGH DAY's EVENTS - save resources
-    print("PREFORMATTED:",  allEvents)
-    # Example of preformatting:
-    # [('Revision', '17-08-2025', 'Rigid', 'Laidlaw Library'), ('Laidlaw With Time', '17-08-2025 23:36', 'Rigid', 'Laidlawlianrur')]
+    return [event.label(showDate=True) for event in allEvents or ()]
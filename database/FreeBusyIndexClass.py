@@ -0,0 +1,246 @@
+from datetime import datetime, timedelta
+
+# Resolution of the index, events are rounded out to whole slots.
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+SLOT = timedelta(minutes=SLOT_MINUTES)
+
+
+def timeSlot(timeOfDay):
+    """
+    Slot a time of day falls in.
+    """
+    return (timeOfDay.hour * 60 + timeOfDay.minute) // SLOT_MINUTES
+
+
+def intervalMask(firstSlot, lastSlot):
+    """
+    Bits firstSlot up to (not including) lastSlot set.
+    """
+    return ((1 << (lastSlot - firstSlot)) - 1) << firstSlot
+
+
+def runStarts(free, length):
+    """
+    Bitwise run detection: bit i of the result is set when bits
+    i .. i+length-1 of free are all set. Takes O(log length) shifts of
+    the whole int instead of a loop per slot.
+    """
+    runs, covered = free, 1
+    while covered < length:
+        shift = min(covered, length - covered)
+        runs &= runs >> shift
+        covered += shift
+    return runs
+
+
+class DayBusy():
+    """
+    Busy slots of one day: the slot interval of every event on it
+    and the OR of them as an int bitset (bit i is slot i).
+    """
+
+    __slots__ = ("intervals", "mask", "rigidMask")
+
+    def __init__(self):
+        self.intervals = {}  # (event id, start) -> (first slot, last slot, rigid)
+        self.mask = self.rigidMask = 0
+
+    def rebuild(self):
+        self.mask = self.rigidMask = 0
+        for firstSlot, lastSlot, rigid in self.intervals.values():
+            bits = intervalMask(firstSlot, lastSlot)
+            self.mask |= bits
+            if rigid:
+                self.rigidMask |= bits
+
+
+class FreeBusyIndex():
+    """
+    Per-day free/busy bitsets at SLOT_MINUTES resolution.
+    Days are loaded on first use with one query for the events running
+    in them (however early they started), then kept up to date through
+    an Events listener. Availability questions for any range join the
+    days into one big int and answer with a few shifts and ANDs, rather
+    than fetching and sweeping every row.
+    """
+
+    def __init__(self, events):
+        self.events = events
+        self.days = {}  # "yyyy-MM-dd" -> DayBusy
+        self.loadedDays = set()
+        self.events.addListener(self.onEventsChanged)
+
+    def loadMonths(self, start, end):
+        """
+        Loads every month touched by [start, end), to have the days
+        around a range ready before they're asked about.
+        """
+        first = datetime(start.year, start.month, 1)
+        last = datetime(end.year, end.month, 1)
+        if last < end:
+            last = datetime(last.year + 1, 1, 1) if last.month == 12 else datetime(last.year, last.month + 1, 1)
+        self.loadRange(first, last)
+
+    def loadRange(self, start, end, rows=None):
+        """
+        Loads the days of [start, end) not already indexed, with a single
+        Events.fetchOverlappingEvents query, or from rows if the events
+        running in [start, end) were already fetched. Then only the days
+        wholly inside the range count as loaded.
+        """
+        firstDay = start.replace(hour=0, minute=0, second=0, microsecond=0)
+        if rows is not None and firstDay < start:
+            firstDay += timedelta(days=1)
+        missing = []
+        day = firstDay
+        while day < end and (rows is None or day + timedelta(days=1) <= end):
+            if day.strftime("%Y-%m-%d") not in self.loadedDays:
+                missing.append(day)
+            day += timedelta(days=1)
+        if not missing:
+            return
+        if rows is None:
+            rows = self.events.fetchOverlappingEvents(missing[0], missing[-1] + timedelta(days=1))
+        for row in rows:
+            self.addRow(row)
+        self.loadedDays.update(day.strftime("%Y-%m-%d") for day in missing)
+
+    def rowDays(self, row):
+        """
+        Yields ("yyyy-MM-dd", first slot, last slot) for every day row
+        covers, the end rounded up so a 10:05 finish still blocks the
+        10:00 slot.
+        """
+        start, end = row.start, row.end or row.start
+        if end <= start:
+            end = start + SLOT  # zero length events still block their slot
+        day = start.replace(hour=0, minute=0)
+        while day < end:
+            nextDay = day + timedelta(days=1)
+            firstSlot = (max(start, day) - day) // SLOT
+            lastSlot = -(-(min(end, nextDay) - day) // SLOT)
+            yield day.strftime("%Y-%m-%d"), firstSlot, lastSlot
+            day = nextDay
+
+    def addRow(self, row):
+        if not row.startTime:
+            return
+        rigid = row.rigidity == "Rigid"
+        for day, firstSlot, lastSlot in self.rowDays(row):
+            dayBusy = self.days.get(day)
+            if dayBusy is None:
+                dayBusy = self.days[day] = DayBusy()
+            dayBusy.intervals[(row.id, row.startTime)] = (firstSlot, lastSlot, rigid)
+            bits = intervalMask(firstSlot, lastSlot)
+            dayBusy.mask |= bits
+            if rigid:
+                dayBusy.rigidMask |= bits
+
+    def removeRow(self, row):
+        if not row.startTime:
+            return
+        for day, _, _ in self.rowDays(row):
+            dayBusy = self.days.get(day)
+            if dayBusy is not None and dayBusy.intervals.pop((row.id, row.startTime), None):
+                # overlapping events may still cover the slots, recompute
+                dayBusy.rebuild()
+
+    def onEventsChanged(self, action, rows):
+        """
+        Events listener, updates the bitsets of the affected days.
+        """
+        if any(row.rrule for row in rows):
+            # a series covers days in every month, rebuild on demand
+            self.days.clear()
+            self.loadedDays.clear()
+            return
+        for row in rows:
+            if action == "insert":
+                self.addRow(row)
+            else:
+                self.removeRow(row)
+
+    def dayMask(self, day, rigidOnly=False):
+        """
+        Busy bitset of day (a datetime or "yyyy-MM-dd").
+        """
+        if isinstance(day, datetime):
+            day = day.strftime("%Y-%m-%d")
+        self.loadRange(datetime.fromisoformat(day), datetime.fromisoformat(day) + timedelta(days=1))
+        dayBusy = self.days.get(day)
+        if dayBusy is None:
+            return 0
+        return dayBusy.rigidMask if rigidOnly else dayBusy.mask
+
+    def rangeMasks(self, start, end, rigidOnly=False, dayStart=None, dayEnd=None):
+        """
+        (busy, allowed) bitsets over the days of [start, end) joined into
+        single ints, day n occupying bits n*SLOTS_PER_DAY onwards.
+        allowed has the slots between dayStart and dayEnd (times of day)
+        set, and nothing outside [start, end).
+        """
+        self.loadRange(start, end)
+        firstDay = start.replace(hour=0, minute=0, second=0, microsecond=0)
+        dayCount = (end - firstDay + timedelta(days=1) - timedelta(microseconds=1)).days
+        hours = intervalMask(timeSlot(dayStart) if dayStart else 0,
+                             timeSlot(dayEnd) if dayEnd else SLOTS_PER_DAY)
+        busy = allowed = 0
+        for index in range(dayCount):
+            day = (firstDay + timedelta(days=index)).strftime("%Y-%m-%d")
+            dayBusy = self.days.get(day)
+            if dayBusy is not None:
+                busy |= (dayBusy.rigidMask if rigidOnly else dayBusy.mask) << (index * SLOTS_PER_DAY)
+            allowed |= hours << (index * SLOTS_PER_DAY)
+        # trim the allowed bits to [start, end)
+        firstSlot = -(-(start - firstDay) // SLOT)
+        lastSlot = (end - firstDay) // SLOT
+        allowed &= intervalMask(firstSlot, max(firstSlot, lastSlot))
+        return busy, allowed
+
+    def slotTime(self, start, slot):
+        firstDay = start.replace(hour=0, minute=0, second=0, microsecond=0)
+        return firstDay + slot * SLOT
+
+    def firstFree(self, start, end, duration, rigidOnly=False, dayStart=None, dayEnd=None):
+        """
+        Start of the first free window of at least duration in
+        [start, end), optionally only between dayStart and dayEnd each
+        day. rigidOnly treats Dynamic events as free time.
+        Returns a datetime, or None if there's no such window.
+        """
+        busy, allowed = self.rangeMasks(start, end, rigidOnly, dayStart, dayEnd)
+        length = max(1, -(-duration // SLOT))
+        runs = runStarts(allowed & ~busy, length)
+        if not runs:
+            return None
+        return self.slotTime(start, (runs & -runs).bit_length() - 1)
+
+    def freeWindows(self, start, end, duration=timedelta(0), rigidOnly=False,
+                    dayStart=None, dayEnd=None):
+        """
+        Every maximal free (start, end) window in [start, end) lasting at
+        least duration, e.g. all 2 hour gaps this week.
+        """
+        busy, allowed = self.rangeMasks(start, end, rigidOnly, dayStart, dayEnd)
+        free = allowed & ~busy
+        length = max(1, -(-duration // SLOT))
+        windows = []
+        while free:
+            first = (free & -free).bit_length() - 1
+            # length of the run of ones starting at first
+            run = (~(free >> first)) & ((free >> first) + 1)
+            last = first + run.bit_length() - 1
+            if last - first >= length:
+                windows.append((self.slotTime(start, first), self.slotTime(start, last)))
+            free &= ~intervalMask(first, last)
+        return windows
+
+    def isFree(self, start, end, rigidOnly=False):
+        """
+        True if no (Rigid, with rigidOnly) event overlaps [start, end).
+        """
+        busy, _ = self.rangeMasks(start, end, rigidOnly)
+        firstDay = start.replace(hour=0, minute=0, second=0, microsecond=0)
+        return not busy & intervalMask((start - firstDay) // SLOT,
+                                       -(-(end - firstDay) // SLOT))
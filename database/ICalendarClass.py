@@ -0,0 +1,344 @@
+from datetime import datetime, timezone
+from itertools import islice
+import logging
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from database.EventsClass import (
+    DEFAULT_BATCH_SIZE,
+    LEGACY_DATE_FORMAT,
+    LEGACY_DAY_FORMAT,
+    eventValues,
+    parseLegacyDate,
+    toTimestamp,
+)
+from database.RecurrenceClass import RecurrenceRule
+
+# RFC 5545 date and date-time value formats.
+ICS_DATE_FORMAT = "%Y%m%d"
+ICS_DATETIME_FORMAT = "%Y%m%dT%H%M%S"
+# Lines longer than this many octets are folded on export.
+ICS_LINE_LIMIT = 75
+# Custom property that keeps the Rigid/Dynamic value across a round trip.
+RIGIDITY_PROPERTY = "X-CALEN-RIGIDITY"
+# Properties that may appear more than once in a VEVENT, every
+# occurrence is kept as a list of (value, params).
+REPEATED_PROPERTIES = ("EXDATE",)
+# Fields of an imported event written over the stored event with its UID.
+IMPORTED_FIELDS = ("name", "date", "rigidity", "location", "endDate",
+                   "rrule", "exdates", "category")
+
+
+def unfoldLines(lines):
+    """
+    Joins RFC 5545 folded lines (continuations start with a space or tab)
+    back together, yielding one logical content line at a time.
+    Only the line currently being built is held in memory.
+    """
+    current = None
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and current is not None:
+            current += line[1:]
+            continue
+        if current:
+            yield current
+        current = line
+    if current:
+        yield current
+
+
+def foldLine(line):
+    """
+    Splits a content line into ICS_LINE_LIMIT octet chunks,
+    continuation chunks start with a single space.
+    """
+    encoded = line.encode("utf-8")
+    if len(encoded) <= ICS_LINE_LIMIT:
+        return line + "\r\n"
+    chunks = []
+    limit = ICS_LINE_LIMIT
+    while encoded:
+        cut = min(limit, len(encoded))
+        # don't split a multi-byte character across two chunks
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        chunks.append(encoded[:cut].decode("utf-8"))
+        encoded = encoded[cut:]
+        limit = ICS_LINE_LIMIT - 1  # leading space of the continuation
+    return "\r\n ".join(chunks) + "\r\n"
+
+
+def splitContentLine(line):
+    """
+    Splits "NAME;PARAM=VALUE:value" into (name, params, value).
+    """
+    head, _, value = line.partition(":")
+    # a ':' inside a quoted parameter value belongs to the head
+    while head.count('"') % 2:
+        extra, _, value = value.partition(":")
+        head += ":" + extra
+    name, *rawParams = head.split(";")
+    params = {}
+    for param in rawParams:
+        key, _, paramValue = param.partition("=")
+        params[key.upper()] = paramValue.strip('"')
+    return name.upper(), params, value
+
+
+def unescapeText(value):
+    """
+    Reverses RFC 5545 TEXT escaping.
+    """
+    if "\\" not in value:
+        return value
+    out = []
+    chars = iter(value)
+    for char in chars:
+        if char == "\\":
+            escaped = next(chars, "")
+            out.append("\n" if escaped in ("n", "N") else escaped)
+        else:
+            out.append(char)
+    return "".join(out)
+
+
+def escapeText(value):
+    """
+    Applies RFC 5545 TEXT escaping.
+    """
+    return (value.replace("\\", "\\\\").replace(";", "\\;")
+            .replace(",", "\\,").replace("\n", "\\n"))
+
+
+def parseICSDate(value, params):
+    """
+    Parses a DTSTART/DTEND value into a naive local datetime.
+    Returns (datetime, isAllDay) or (None, False) if it can't be parsed.
+    UTC ("Z") and TZID values are converted to the local timezone,
+    floating values are kept as they are.
+    """
+    try:
+        # fixed-width slicing instead of strptime keeps big imports fast
+        day = datetime(int(value[0:4]), int(value[4:6]), int(value[6:8]))
+        if params.get("VALUE") == "DATE" or len(value) == 8:
+            return day, True
+        if value[8] != "T":
+            return None, False
+        parsed = day.replace(hour=int(value[9:11]), minute=int(value[11:13]),
+                             second=int(value[13:15]))
+    except (IndexError, ValueError):
+        return None, False
+    if value.endswith("Z"):
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    elif "TZID" in params:
+        try:
+            parsed = parsed.replace(tzinfo=ZoneInfo(params["TZID"]))
+        except (ZoneInfoNotFoundError, ValueError):
+            logging.warning("Unknown TZID %r, treating %s as local time",
+                            params["TZID"], value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed, False
+
+
+def veventToEvent(properties):
+    """
+    Converts the properties of one VEVENT into an insertMany event dict.
+    Returns None for events without a usable DTSTART.
+    """
+    if "DTSTART" not in properties:
+        return None
+    start, allDay = parseICSDate(*properties["DTSTART"])
+    if start is None:
+        return None
+    end = None
+    if "DTEND" in properties:
+        end, _ = parseICSDate(*properties["DTEND"])
+
+    rigidity = properties.get(RIGIDITY_PROPERTY, ("", {}))[0]
+    if rigidity not in ("Rigid", "Dynamic"):
+        # transparent events don't block time so they can be moved around
+        transp = properties.get("TRANSP", ("OPAQUE", {}))[0].upper()
+        rigidity = "Dynamic" if transp == "TRANSPARENT" else "Rigid"
+
+    rrule = None
+    if "RRULE" in properties:
+        try:
+            rrule = str(RecurrenceRule.parse(properties["RRULE"][0]))
+        except ValueError:
+            logging.warning("Unsupported RRULE %r, importing only the first occurrence",
+                            properties["RRULE"][0])
+    exdates = None
+    if rrule and "EXDATE" in properties:
+        # one EXDATE line per exception or comma separated ones, or both
+        parsed = (parseICSDate(part, params)[0]
+                  for value, params in properties["EXDATE"]
+                  for part in value.split(","))
+        exdates = [toTimestamp(exdate) for exdate in parsed if exdate is not None]
+
+    uid = properties.get("UID", ("", {}))[0] or None
+    if uid and "RECURRENCE-ID" in properties:
+        # a moved occurrence shares its series' UID, it's stored on its own
+        uid += "/" + properties["RECURRENCE-ID"][0]
+
+    return {
+        "uid": uid,
+        "name": unescapeText(properties.get("SUMMARY", ("", {}))[0]) or "Untitled",
+        "date": start.strftime(LEGACY_DAY_FORMAT if allDay else LEGACY_DATE_FORMAT),
+        "rigidity": rigidity,
+        "location": unescapeText(properties.get("LOCATION", ("", {}))[0]) or None,
+        "endDate": end,
+        "rrule": rrule,
+        "exdates": exdates,
+        # only the first of a comma separated CATEGORIES list is kept
+        "category": unescapeText(
+            properties.get("CATEGORIES", ("", {}))[0].split(",")[0]) or None,
+    }
+
+
+def iterICSEvents(lines):
+    """
+    Generator over the VEVENTs of an .ics stream (any iterable of lines,
+    such as an open file), yielding insertMany event dicts.
+    Components nested in a VEVENT (e.g. VALARM) are skipped.
+    """
+    properties = None
+    nested = 0
+    for line in unfoldLines(lines):
+        name, params, value = splitContentLine(line)
+        if name == "BEGIN":
+            if value.upper() == "VEVENT":
+                properties = {}
+            elif properties is not None:
+                nested += 1
+        elif name == "END":
+            if value.upper() == "VEVENT" and properties is not None:
+                event = veventToEvent(properties)
+                if event is None:
+                    logging.warning("Skipping VEVENT without a valid DTSTART")
+                else:
+                    yield event
+                properties = None
+            elif nested:
+                nested -= 1
+        elif properties is not None and not nested:
+            if name in REPEATED_PROPERTIES:
+                properties.setdefault(name, []).append((value, params))
+            else:
+                properties.setdefault(name, (value, params))
+
+
+class ICalendar():
+    """
+    Streams .ics files (e.g. Google Calendar exports) into and out of Events.
+    Neither direction loads the whole file or table into memory.
+    """
+
+    def __init__(self, events):
+        self.events = events
+
+    def importFile(self, path, batchSize=DEFAULT_BATCH_SIZE):
+        """
+        Imports every VEVENT of the .ics file at path in batches of
+        batchSize rows, all in one transaction. A VEVENT whose UID is
+        already stored updates that event (if it changed) rather than
+        adding a copy, so importing the same file or an export of this
+        calendar again changes nothing.
+        Returns the number of events imported, new or updated.
+        """
+        imported = 0
+        events = self.events
+        with open(path, encoding="utf-8", newline="") as icsFile, events.transaction():
+            vevents = iterICSEvents(icsFile)
+            while True:
+                batch = list(islice(vevents, batchSize))
+                if not batch:
+                    return imported
+                stored = self.storedByUid(event["uid"] for event in batch)
+                new = {}
+                for event in batch:
+                    if event["uid"] not in stored:
+                        # a UID repeated in the file, the later VEVENT wins
+                        new[event["uid"] or id(event)] = event
+                        continue
+                    eventId, values = stored[event["uid"]]
+                    if eventValues(event) != values:
+                        events.updateEvent(eventId, **{
+                            field: event[field] for field in IMPORTED_FIELDS})
+                        imported += 1
+                imported += events.insertMany(new.values(), batchSize)
+
+    def storedByUid(self, uids):
+        """
+        {uid: (id, eventValues)} of the stored events among uids.
+        """
+        uids = [uid for uid in uids if uid]
+        if not uids:
+            return {}
+        rows = self.events.con.execute(
+            "SELECT uid, id, name, date, rigidity, location, startTime, endTime, rrule, exdates, recurUntil, category FROM Events "
+            f"WHERE uid IN ({', '.join('?' * len(uids))})", uids)
+        return {uid: (eventId, tuple(values)) for uid, eventId, *values in rows}
+
+    def exportFile(self, path):
+        """
+        Writes every event to path as an .ics calendar,
+        returns the number of events exported.
+        """
+        exported = 0
+        with open(path, "w", encoding="utf-8", newline="") as icsFile:
+            icsFile.write("BEGIN:VCALENDAR\r\n"
+                          "VERSION:2.0\r\n"
+                          "PRODID:-//Calen//Calen//EN\r\n")
+            for lines in self.iterVEvents():
+                icsFile.writelines(foldLine(line) for line in lines)
+                exported += 1
+            icsFile.write("END:VCALENDAR\r\n")
+        return exported
+
+    def iterVEvents(self):
+        """
+        Yields the content lines of one VEVENT per row of the Events table,
+        reading rows lazily from the cursor.
+        """
+        stamp = datetime.now(timezone.utc).strftime(ICS_DATETIME_FORMAT) + "Z"
+        rows = self.events.con.execute(
+            "SELECT id, uid, name, date, rigidity, location, endTime, rrule, exdates, category FROM Events ORDER BY startTime")
+        for eventId, uid, name, date, rigidity, location, endTime, rrule, exdates, category in rows:
+            start, defaultEnd = parseLegacyDate(date)
+            if start is None:
+                logging.warning("Not exporting event %d with date %r",
+                                eventId, date)
+                continue
+            end = datetime.fromisoformat(endTime) if endTime else defaultEnd
+            if len(date) == len("dd-MM-yyyy"):
+                dtStart = f"DTSTART;VALUE=DATE:{start.strftime(ICS_DATE_FORMAT)}"
+                dtEnd = f"DTEND;VALUE=DATE:{end.strftime(ICS_DATE_FORMAT)}"
+            else:
+                dtStart = f"DTSTART:{start.strftime(ICS_DATETIME_FORMAT)}"
+                dtEnd = f"DTEND:{end.strftime(ICS_DATETIME_FORMAT)}"
+            lines = [
+                "BEGIN:VEVENT",
+                # the stored uid, so importing the export again updates
+                # these events rather than copying them
+                f"UID:{uid or f'calen-{eventId}@calen'}",
+                f"DTSTAMP:{stamp}",
+                dtStart,
+                dtEnd,
+                f"SUMMARY:{escapeText(name)}",
+            ]
+            if location:
+                lines.append(f"LOCATION:{escapeText(location)}")
+            if category:
+                lines.append(f"CATEGORIES:{escapeText(category)}")
+            if rrule:
+                lines.append(f"RRULE:{rrule}")
+            if rrule and exdates:
+                lines.append("EXDATE:" + ",".join(
+                    datetime.fromisoformat(exdate).strftime(ICS_DATETIME_FORMAT)
+                    for exdate in exdates.split(",")))
+            if rigidity in ("Rigid", "Dynamic"):
+                lines.append(
+                    f"TRANSP:{'OPAQUE' if rigidity == 'Rigid' else 'TRANSPARENT'}")
+                lines.append(f"{RIGIDITY_PROPERTY}:{rigidity}")
+            lines.append("END:VEVENT")
+            yield lines
@@ -0,0 +1,244 @@
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+import json
+import logging
+import os
+import threading
+import time
+import weakref
+
+# Set to 1 to record timings from startup, or to a file path to also
+# write them there when the app closes.
+ENVIRONMENT_VARIABLE = "CALEN_INSTRUMENT"
+# Calls slower than this are written to the slow query log.
+DEFAULT_SLOW_MS = 50.0
+# Slow calls kept for the debug panel and exports.
+SLOW_LOG_SIZE = 200
+# SQL statements kept per slow call, executemany runs one per row.
+SLOW_LOG_STATEMENTS = 20
+# Histogram buckets are powers of two of microseconds, up to ~1 minute.
+HISTOGRAM_BUCKETS = 27
+
+
+class TimingStats():
+    """
+    Latency histogram and row counts of one instrumented name.
+    """
+
+    __slots__ = ("calls", "totalSeconds", "maxSeconds", "rows", "statements", "histogram")
+
+    def __init__(self):
+        self.calls = 0
+        self.totalSeconds = 0.0
+        self.maxSeconds = 0.0
+        self.rows = 0
+        self.statements = 0
+        # histogram[i] counts calls taking [2^(i-1), 2^i) microseconds
+        self.histogram = [0] * HISTOGRAM_BUCKETS
+
+    def record(self, seconds, rows, statements):
+        self.calls += 1
+        self.totalSeconds += seconds
+        self.maxSeconds = max(self.maxSeconds, seconds)
+        self.rows += rows
+        self.statements += statements
+        bucket = min(int(seconds * 1e6).bit_length(), HISTOGRAM_BUCKETS - 1)
+        self.histogram[bucket] += 1
+
+    def percentile(self, fraction):
+        """
+        Upper bound of the histogram bucket holding the fraction'th call,
+        in seconds.
+        """
+        target = fraction * self.calls
+        seen = 0
+        for bucket, count in enumerate(self.histogram):
+            seen += count
+            if count and seen >= target:
+                return (1 << bucket) / 1e6
+        return self.maxSeconds
+
+    def summary(self):
+        return {
+            "calls": self.calls,
+            "meanMs": self.totalSeconds / self.calls * 1e3 if self.calls else 0.0,
+            "p50Ms": self.percentile(0.5) * 1e3,
+            "p95Ms": self.percentile(0.95) * 1e3,
+            "p99Ms": self.percentile(0.99) * 1e3,
+            "maxMs": self.maxSeconds * 1e3,
+            "rows": self.rows,
+            "statements": self.statements,
+            "histogram": self.histogram,
+        }
+
+
+def rowCount(result):
+    """
+    Rows in a query result: the length of lists, tuples and dicts,
+    an int as is (the rows insertMany/deleteMany changed), 1 for
+    anything else that isn't None.
+    """
+    if isinstance(result, (list, tuple, dict)):
+        return len(result)
+    if isinstance(result, int) and not isinstance(result, bool):
+        return result
+    return 0 if result is None else 1
+
+
+class Instrumentation():
+    """
+    Records latency histograms, row counts and slow calls of the
+    functions decorated with timed(), and the SQL each one ran through
+    a SQLite trace callback on the pooled connections.
+    Disabled it costs one attribute check per call.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.slowSeconds = DEFAULT_SLOW_MS / 1e3
+        self.lock = threading.Lock()
+        self.stats = {}  # name -> TimingStats
+        self.slowLog = deque(maxlen=SLOW_LOG_SIZE)
+        self.local = threading.local()  # per thread call depth and statements
+        self.pools = weakref.WeakSet()  # ConnectionPools traced while enabled
+
+    def enable(self, slowMs=None):
+        if slowMs is not None:
+            self.slowSeconds = slowMs / 1e3
+        self.enabled = True
+        for pool in self.pools:
+            pool.setTraceCallback(self.traceStatement)
+
+    def disable(self):
+        self.enabled = False
+        for pool in self.pools:
+            pool.setTraceCallback(None)
+
+    def reset(self):
+        with self.lock:
+            self.stats = {}
+            self.slowLog.clear()
+
+    def watchPool(self, pool):
+        """
+        Traces the SQL of every connection of pool while enabled.
+        """
+        self.pools.add(pool)
+        if self.enabled:
+            pool.setTraceCallback(self.traceStatement)
+
+    def traceStatement(self, statement):
+        """
+        sqlite3 trace callback, runs on the thread executing statement.
+        """
+        local = self.local
+        if getattr(local, "depth", 0):
+            local.statementCount += 1
+            if len(local.statements) < SLOW_LOG_STATEMENTS:
+                local.statements.append(statement)
+
+    def timed(self, name):
+        """
+        Decorator recording every call of a function under name.
+        """
+        def decorator(function):
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                return self.call(name, function, args, kwargs)
+            return wrapper
+        return decorator
+
+    def measure(self, name):
+        """
+        Context manager recording the with-block under name, for code
+        that isn't a whole function.
+        """
+        if not self.enabled:
+            return nullcontext()
+        return self.measuring(name)
+
+    @contextmanager
+    def measuring(self, name):
+        started = self.begin()
+        try:
+            yield
+        finally:
+            self.end(name, started, 0)
+
+    def call(self, name, function, args, kwargs):
+        started = self.begin()
+        try:
+            result = function(*args, **kwargs)
+        except BaseException:
+            self.end(name, started, 0)
+            raise
+        self.end(name, started, rowCount(result))
+        return result
+
+    def begin(self):
+        local = self.local
+        depth = getattr(local, "depth", 0)
+        if depth == 0:
+            local.statements, local.statementCount = [], 0
+        local.depth = depth + 1
+        return depth, len(local.statements), local.statementCount, time.perf_counter()
+
+    def end(self, name, started, rows):
+        depth, firstStatement, statementsBefore, startedAt = started
+        seconds = time.perf_counter() - startedAt
+        local = self.local
+        local.depth = depth
+        with self.lock:
+            stats = self.stats.get(name)
+            if stats is None:
+                stats = self.stats[name] = TimingStats()
+            stats.record(seconds, rows, local.statementCount - statementsBefore)
+        if seconds >= self.slowSeconds:
+            entry = {
+                "name": name,
+                "at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "ms": seconds * 1e3,
+                "rows": rows,
+                "sql": local.statements[firstStatement:],
+            }
+            self.slowLog.append(entry)
+            logging.warning("Slow call %s took %.1fms (%d rows)", name, entry["ms"], rows)
+
+    def snapshot(self):
+        """
+        Summaries of every instrumented name plus the slow log.
+        """
+        with self.lock:
+            return {
+                "slowMs": self.slowSeconds * 1e3,
+                "timings": {name: stats.summary()
+                            for name, stats in sorted(self.stats.items())},
+                "slowLog": list(self.slowLog),
+            }
+
+    def export(self, path):
+        """
+        Writes snapshot() as JSON to path.
+        """
+        with open(path, "w") as exportFile:
+            json.dump(self.snapshot(), exportFile, indent=2)
+        logging.info("Instrumentation written to %s", path)
+
+
+# Shared by Events and the GUI, enabled from the environment at import.
+instrumentation = Instrumentation()
+if os.environ.get(ENVIRONMENT_VARIABLE, "0") != "0":
+    instrumentation.enable()
+timed = instrumentation.timed
+measure = instrumentation.measure
+
+
+def exportPath():
+    """
+    File CALEN_INSTRUMENT names for the exit export, None if it's a flag.
+    """
+    value = os.environ.get(ENVIRONMENT_VARIABLE, "")
+    return None if value in ("", "0", "1") else value
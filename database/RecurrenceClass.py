@@ -0,0 +1,234 @@
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import logging
+import threading
+
+# Frequencies supported out of RFC 5545 RRULEs.
+FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY")
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+# Format of UNTIL values in a rule.
+UNTIL_FORMAT = "%Y%m%dT%H%M%S"
+# Month expansions kept by OccurrenceCache before the oldest is dropped.
+DEFAULT_CACHE_ENTRIES = 4096
+
+
+def shiftMonths(value, months):
+    """
+    Returns (year, month) months after value's month.
+    """
+    index = value.year * 12 + value.month - 1 + months
+    return index // 12, index % 12 + 1
+
+
+class RecurrenceRule():
+    """
+    Subset of an RFC 5545 RRULE: FREQ=DAILY/WEEKLY/MONTHLY with optional
+    INTERVAL, COUNT, UNTIL and (weekly) BYDAY.
+    Occurrences are generated lazily for the range asked for, skipping
+    straight to it rather than walking from the first occurrence.
+    """
+
+    __slots__ = ("freq", "interval", "count", "until", "byday")
+
+    def __init__(self, freq, interval=1, count=None, until=None, byday=None):
+        if freq not in FREQUENCIES:
+            raise ValueError(f"Unsupported recurrence frequency {freq!r}")
+        if interval < 1 or (count is not None and count < 1):
+            raise ValueError("INTERVAL and COUNT must be positive")
+        self.freq = freq
+        self.interval = interval
+        self.count = count
+        self.until = until
+        # weekday numbers, Monday is 0
+        self.byday = tuple(sorted(set(byday))) if byday else None
+
+    @classmethod
+    def parse(cls, text):
+        """
+        Parses "FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,WE;UNTIL=20251231T000000".
+        Raises ValueError for rules outside the supported subset.
+        """
+        parts = {}
+        for part in text.strip().removeprefix("RRULE:").split(";"):
+            if part:
+                key, _, value = part.partition("=")
+                parts[key.upper()] = value.upper()
+        freq = parts.pop("FREQ", None)
+        interval = int(parts.pop("INTERVAL", 1))
+        count = int(parts["COUNT"]) if "COUNT" in parts else None
+        parts.pop("COUNT", None)
+        until = None
+        if "UNTIL" in parts:
+            value = parts.pop("UNTIL").rstrip("Z")
+            until = (datetime.strptime(value, UNTIL_FORMAT) if "T" in value
+                     else datetime.strptime(value, "%Y%m%d").replace(hour=23, minute=59))
+        byday = None
+        if "BYDAY" in parts:
+            byday = [WEEKDAYS.index(day) for day in parts.pop("BYDAY").split(",")]
+            if freq != "WEEKLY":
+                raise ValueError("BYDAY is only supported for weekly rules")
+        parts.pop("WKST", None)
+        if parts:
+            raise ValueError(f"Unsupported recurrence parts {sorted(parts)}")
+        return cls(freq, interval, count, until, byday)
+
+    def __str__(self):
+        parts = [f"FREQ={self.freq}"]
+        if self.interval != 1:
+            parts.append(f"INTERVAL={self.interval}")
+        if self.count is not None:
+            parts.append(f"COUNT={self.count}")
+        if self.until is not None:
+            parts.append(f"UNTIL={self.until.strftime(UNTIL_FORMAT)}")
+        if self.byday:
+            parts.append("BYDAY=" + ",".join(WEEKDAYS[day] for day in self.byday))
+        return ";".join(parts)
+
+    def occurrences(self, start, rangeStart, rangeEnd, exdates=()):
+        """
+        Generator of occurrence starts in [rangeStart, rangeEnd) for a
+        series first starting at start. exdates holds excluded starts.
+        """
+        for index, occurrence in self.indexedOccurrences(start, rangeStart):
+            if occurrence >= rangeEnd:
+                return
+            if self.count is not None and index >= self.count:
+                return
+            if self.until is not None and occurrence > self.until:
+                return
+            if occurrence >= rangeStart and occurrence not in exdates:
+                yield occurrence
+
+    def lastOccurrence(self, start):
+        """
+        Start of the final occurrence, or None if the series never ends.
+        """
+        if self.count is None and self.until is None:
+            return None
+        last = None
+        for last in self.occurrences(start, start, datetime.max):
+            pass
+        return last
+
+    def indexedOccurrences(self, start, rangeStart):
+        """
+        Yields (index, occurrence) from about rangeStart onwards, where
+        index counts occurrences since start (what COUNT limits).
+        """
+        if self.freq == "MONTHLY":
+            yield from self.monthlyOccurrences(start, rangeStart)
+        elif self.freq == "WEEKLY" and self.byday:
+            yield from self.weeklyByDayOccurrences(start, rangeStart)
+        else:
+            step = timedelta(days=self.interval * (7 if self.freq == "WEEKLY" else 1))
+            # jump straight to the first occurrence at or after rangeStart
+            index = max(0, -(-(rangeStart - start) // step))
+            while True:
+                yield index, start + index * step
+                index += 1
+
+    def weeklyByDayOccurrences(self, start, rangeStart):
+        weekStart = (start - timedelta(days=start.weekday())).replace(
+            hour=0, minute=0, second=0, microsecond=0)
+        timeOfDay = start - start.replace(hour=0, minute=0, second=0, microsecond=0)
+        perWeek = len(self.byday)
+        # occurrences in the first week that fall before start don't count
+        firstWeek = sum(1 for day in self.byday if day >= start.weekday())
+        week = max(0, (rangeStart - weekStart).days // 7 // self.interval)
+        index = 0 if week == 0 else firstWeek + (week - 1) * perWeek
+        while True:
+            base = weekStart + timedelta(weeks=week * self.interval) + timeOfDay
+            for day in self.byday:
+                occurrence = base + timedelta(days=day)
+                if occurrence < start:
+                    continue
+                yield index, occurrence
+                index += 1
+            week += 1
+
+    def monthlyOccurrences(self, start, rangeStart):
+        months = 0
+        index = 0
+        if self.count is None:
+            # without COUNT the index doesn't matter, skip ahead
+            gap = (rangeStart.year - start.year) * 12 + rangeStart.month - start.month
+            months = max(0, gap // self.interval * self.interval)
+        while True:
+            year, month = shiftMonths(start, months)
+            try:
+                occurrence = start.replace(year=year, month=month)
+            except ValueError:
+                occurrence = None  # e.g. the 31st in a 30 day month is skipped
+            if occurrence is not None:
+                yield index, occurrence
+                index += 1
+            months += self.interval
+
+
+def parseExdates(exdates):
+    """
+    Parses the comma separated TIMESTAMP_FORMAT values of an exdates column.
+    """
+    if not exdates:
+        return frozenset()
+    return frozenset(datetime.fromisoformat(value) for value in exdates.split(","))
+
+
+class OccurrenceCache():
+    """
+    LRU cache of one series' occurrences within one month, so redrawing
+    or re-clicking a month reuses the expansion instead of regenerating it.
+    Keys include the rule, start and exceptions, so an edited series
+    simply misses and its old entries age out.
+    Shared by every thread reading through one Events (the query
+    server's readers), so the entries and counters are only touched
+    under a lock; expanding a month happens outside it.
+    """
+
+    def __init__(self, maxEntries=DEFAULT_CACHE_ENTRIES):
+        self.maxEntries = maxEntries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def monthOccurrences(self, rrule, exdates, start, year, month):
+        """
+        Returns the tuple of occurrence starts of the series in (year, month).
+        """
+        key = (rrule, exdates, start, year, month)
+        with self.lock:
+            cached = self.entries.get(key)
+            if cached is not None:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return cached
+            self.misses += 1
+        try:
+            rule = RecurrenceRule.parse(rrule)
+        except ValueError:
+            logging.warning("Ignoring unsupported recurrence rule %r", rrule)
+            occurrences = ()
+        else:
+            monthStart = datetime(year, month, 1)
+            nextYear, nextMonth = shiftMonths(monthStart, 1)
+            occurrences = tuple(rule.occurrences(
+                start, monthStart, datetime(nextYear, nextMonth, 1),
+                parseExdates(exdates)))
+        with self.lock:
+            self.entries[key] = occurrences
+            if len(self.entries) > self.maxEntries:
+                self.entries.popitem(last=False)
+        return occurrences
+
+    def occurrences(self, rrule, exdates, start, rangeStart, rangeEnd):
+        """
+        Yields the occurrence starts in [rangeStart, rangeEnd), expanding
+        (and caching) only the months the range touches.
+        """
+        year, month = rangeStart.year, rangeStart.month
+        while datetime(year, month, 1) < rangeEnd:
+            for occurrence in self.monthOccurrences(rrule, exdates, start, year, month):
+                if rangeStart <= occurrence < rangeEnd:
+                    yield occurrence
+            year, month = shiftMonths(datetime(year, month, 1), 1)
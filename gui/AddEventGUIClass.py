@@ -1,5 +1,6 @@
 from PyQt6.QtWidgets import (
     QComboBox,
+    QCompleter,
     QDateTimeEdit,
     QDialog,
     QLineEdit,
@@ -7,7 +8,7 @@ from PyQt6.QtWidgets import (
     QVBoxLayout,
     QLabel,
 )
-from PyQt6.QtCore import QDateTime
+from PyQt6.QtCore import QDateTime, QStringListModel, Qt
 
 
 class AddEventGUI(QDialog):
@@ -15,8 +16,10 @@ class AddEventGUI(QDialog):
     GUI for when selecting to create a new event in the calendar.
     """
 
-    def __init__(self):
+    def __init__(self, categoryClassifier=None, locationSuggester=None):
         super().__init__()
+        self.categoryClassifier = categoryClassifier
+        self.locationSuggester = locationSuggester
         self.setWindowTitle("Add Event")
 
         self.layout = QVBoxLayout()
@@ -31,6 +34,15 @@ class AddEventGUI(QDialog):
         self.eventDateInput.setCalendarPopup(True)
         self.layout.addWidget(self.eventDateInput)
 
+        self.layout.addWidget(QLabel("End of Event:"))
+        self.eventEndInput = QDateTimeEdit()
+        self.eventEndInput.setDateTime(
+            QDateTime.currentDateTime().addSecs(60 * 60))
+        self.eventEndInput.setCalendarPopup(True)
+        self.layout.addWidget(self.eventEndInput)
+        # keep the end after the start when the start is moved
+        self.eventDateInput.dateTimeChanged.connect(self.onStartChanged)
+
         self.layout.addWidget(QLabel("Rigidity:"))
         self.eventRigidityInput = QComboBox()
         self.eventRigidityInput.addItems(["Rigid", "Dynamic"])
@@ -39,6 +51,29 @@ class AddEventGUI(QDialog):
         self.layout.addWidget(QLabel("Location:"))
         self.eventLocationInput = QLineEdit()
         self.layout.addWidget(self.eventLocationInput)
+        # offers the places used for similar events at similar times
+        self.locationSuggestions = QStringListModel()
+        self.locationCompleter = QCompleter(self.locationSuggestions, self)
+        self.locationCompleter.setCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        self.locationCompleter.setFilterMode(Qt.MatchFlag.MatchContains)
+        self.eventLocationInput.setCompleter(self.locationCompleter)
+
+        self.layout.addWidget(QLabel("Category:"))
+        self.eventCategoryInput = QLineEdit()
+        self.layout.addWidget(self.eventCategoryInput)
+        # the guessed category shows as the placeholder until typed over,
+        # it is only saved (and learnt from) once accepted
+        self.acceptCategoryButton = QPushButton("Use suggested category")
+        self.acceptCategoryButton.setEnabled(False)
+        self.layout.addWidget(self.acceptCategoryButton)
+        self.acceptCategoryButton.clicked.connect(self.acceptCategory)
+        self.eventCategoryInput.textChanged.connect(self.updateAcceptCategory)
+        self.eventNameInput.editingFinished.connect(self.suggestCategory)
+        self.eventLocationInput.editingFinished.connect(self.suggestCategory)
+        self.eventNameInput.editingFinished.connect(self.suggestLocations)
+        self.eventCategoryInput.editingFinished.connect(self.suggestLocations)
+        self.eventDateInput.dateTimeChanged.connect(self.suggestLocations)
+        self.suggestLocations()
 
         self.saveButton = QPushButton("Save")
         self.layout.addWidget(self.saveButton)
@@ -47,6 +82,38 @@ class AddEventGUI(QDialog):
 
         self.saveButton.clicked.connect(self.accept)
 
+    def onStartChanged(self, start):
+        self.eventEndInput.setMinimumDateTime(start)
+        if self.eventEndInput.dateTime() <= start:
+            self.eventEndInput.setDateTime(start.addSecs(60 * 60))
+
+    def suggestCategory(self):
+        if self.categoryClassifier is None:
+            return
+        suggestion = self.categoryClassifier.classify(
+            self.eventNameInput.text(), self.eventLocationInput.text())
+        self.eventCategoryInput.setPlaceholderText(suggestion or "")
+        self.updateAcceptCategory()
+
+    def updateAcceptCategory(self):
+        self.acceptCategoryButton.setEnabled(
+            not self.eventCategoryInput.text()
+            and bool(self.eventCategoryInput.placeholderText()))
+
+    def acceptCategory(self):
+        self.eventCategoryInput.setText(self.eventCategoryInput.placeholderText())
+
+    def suggestLocations(self):
+        if self.locationSuggester is None:
+            return
+        category = (self.eventCategoryInput.text()
+                    or self.eventCategoryInput.placeholderText() or None)
+        suggestions = self.locationSuggester.suggest(
+            category, self.eventDateInput.dateTime().toPyDateTime())
+        self.locationSuggestions.setStringList(suggestions)
+        self.eventLocationInput.setPlaceholderText(
+            suggestions[0] if suggestions else "")
+
     def getAllData(self):
         """
         Grabs all the data for the new event added.
@@ -55,6 +122,11 @@ class AddEventGUI(QDialog):
         return {
             "name": self.eventNameInput.text(),
             "date": self.eventDateInput.dateTime().toString("dd-MM-yyyy HH:mm"),
+            # TIMESTAMP_FORMAT, stored as the endTime column
+            "endDate": self.eventEndInput.dateTime().toString("yyyy-MM-dd HH:mm"),
             "rigidity": self.eventRigidityInput.currentText(),
-            "location": self.eventLocationInput.text()
+            "location": self.eventLocationInput.text(),
+            # typed or accepted only, never the unconfirmed guess, which the
+            # classifier would then learn from as if the user chose it
+            "category": self.eventCategoryInput.text().strip() or None
         }
@@ -0,0 +1,32 @@
+from PyQt6.QtWidgets import (
+    QDockWidget,
+    QListView,
+)
+from PyQt6.QtCore import Qt, pyqtSignal
+from gui.EventsPageModelClass import EventsPageModel
+
+
+class AllEventsWidget(QDockWidget):
+    """
+    Dock listing every event in start order. Rows are paged in from
+    the database as the list is scrolled rather than loaded up front.
+    """
+
+    # emitted with the row of an event the user double clicks or presses enter on
+    eventActivated = pyqtSignal(object)
+
+    def __init__(self, events, parent=None):
+        super(AllEventsWidget, self).__init__("All Events", parent)
+        self.setAllowedAreas(Qt.DockWidgetArea.LeftDockWidgetArea |
+                             Qt.DockWidgetArea.RightDockWidgetArea)
+
+        self.eventsPageModel = EventsPageModel(events, parent=self)
+        self.allEvents = QListView()
+        self.allEvents.setModel(self.eventsPageModel)
+        # fixed row heights let the view skip measuring unloaded rows
+        self.allEvents.setUniformItemSizes(True)
+        self.allEvents.activated.connect(self.onActivated)
+        self.setWidget(self.allEvents)
+
+    def onActivated(self, index):
+        self.eventActivated.emit(self.eventsPageModel.rowAt(index))
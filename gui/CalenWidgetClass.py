@@ -1,25 +1,161 @@
 from PyQt6.QtWidgets import (
     QCalendarWidget,
 )
-from PyQt6.QtCore import Qt
-from gui.DayWidgetClass import DayWidget
+from PyQt6.QtCore import QRectF, Qt, pyqtSignal
+from PyQt6.QtGui import QColor, QFont
+from datetime import datetime, timedelta
 import logging
-from database.EventsClass import Events
+from database.EventsClass import sharedEvents
+from database.EventCacheClass import EventCache
+from database.InstrumentationClass import timed
+
+# Diameter in pixels of the event count badge painted in each cell.
+BADGE_SIZE = 16
+BADGE_COLOUR = QColor(52, 120, 246)
 
 
 class CalenWidget(QCalendarWidget):
-    def __init__(self, parent=None, events=Events()):
+    # emitted with (QDate, rows) once the selected day's events are loaded
+    dayEventsLoaded = pyqtSignal(object, object)
+
+    def __init__(self, parent=None, events=None, eventsService=None):
         super(CalenWidget, self).__init__()
         self.clicked.connect(self.onClickedDate)
-        self.events = events
         if events is None:
-            logging.critical(
-                "CalenWidget has recieced 'None' as its events, continuing with none")
+            logging.info(
+                "CalenWidget has recieced 'None' as its events, using the shared Events instance")
+            events = sharedEvents()
+        self.events = events
+        self.eventsService = eventsService
+        # "yyyy-MM-dd" -> number of events, for the displayed page only
+        self.dayCounts = {}
+        self.badgeFont = QFont()
+        self.badgeFont.setPointSize(7)
+        # day lookups are served from memory, one range query per month
+        self.eventCache = EventCache(events)
+        self.events.addListener(self.onEventsChanged)
+        if eventsService is not None:
+            # cache misses are fetched off the GUI thread
+            self.eventsService.resultReady.connect(self.onResultReady)
+        self.currentPageChanged.connect(self.loadDayCounts)
+        self.loadDayCounts(self.yearShown(), self.monthShown())
 
+    @timed("CalenWidget.onClickedDate")
     def onClickedDate(self, date):
+        self.selectedDate = date
         self.selectedDay = date.toString("dd-MM-yyyy")
-        rows = self.events.fetchDayEvents(date=self.selectedDay)
-        currentDayDockWidget = DayWidget(date, str(rows))
+        if self.eventsService is None:
+            self.showDay(date, self.eventCache.fetchDayEvents(
+                date=self.selectedDay))
+            return
+
+        rows = self.eventCache.peekDayEvents(self.selectedDay)
+        if rows is not None:
+            self.eventsService.cancel("day")
+            self.showDay(date, rows)
+            return
+        self.requestMonths(date)
+
+    def requestMonths(self, date):
+        """
+        Asks the service for the clicked month (and its uncached
+        neighbours), a newer click replaces the pending request.
+        """
+        missing = self.eventCache.missingMonths(date.year(), date.month())
+        self.eventsService.fetchRange(
+            "day", *self.eventCache.monthsRange(missing),
+            request=(date, missing, self.eventCache.version))
+
+    def onResultReady(self, channel, request, result):
+        if channel == "day":
+            self.onMonthsFetched(request, result)
+        elif channel == "dayCounts":
+            self.onDayCountsFetched(request, result)
+
+    def onMonthsFetched(self, request, rows):
+        date, missing, version = request
+        if version != self.eventCache.version:
+            # an event changed while the query ran, the rows may be stale
+            self.requestMonths(date)
+            return
+        self.eventCache.storeMonths(missing, rows)
+        self.eventCache.touchMonth(date.year(), date.month())
+        self.showDay(date, self.eventCache.peekDayEvents(
+            self.selectedDay, countStats=False))
+
+    def showDay(self, date, rows):
+        self.dayEventsLoaded.emit(date, rows)
+
+    def visibleRange(self, year, month):
+        """
+        Returns the [start, end) datetimes of the 6 week grid shown for
+        (year, month), which includes days of the adjacent months.
+        """
+        firstOfMonth = datetime(year, month, 1)
+        # Qt weekdays are 1 (Monday) to 7 (Sunday)
+        leading = (firstOfMonth.isoweekday() - self.firstDayOfWeek().value) % 7
+        # Qt always shows at least one day of the previous month
+        start = firstOfMonth - timedelta(days=leading or 7)
+        return start, start + timedelta(weeks=6)
+
+    @timed("CalenWidget.loadDayCounts")
+    def loadDayCounts(self, year, month):
+        """
+        Loads the per-day event counts for the displayed page
+        with one aggregate query, never per cell.
+        """
+        start, end = self.visibleRange(year, month)
+        if self.eventsService is None:
+            self.dayCounts = self.events.fetchDayCounts(start, end)
+            self.updateCells()
+            return
+        self.eventsService.fetchDayCounts(
+            "dayCounts", start, end, request=(year, month))
+
+    def onDayCountsFetched(self, request, dayCounts):
+        if request != (self.yearShown(), self.monthShown()):
+            return
+        self.dayCounts = dayCounts
+        self.updateCells()
+
+    def onEventsChanged(self, action, rows):
+        """
+        Events listener, keeps the badge counts of the page in sync.
+        """
+        if any(row.rrule for row in rows):
+            # a recurring series touches many days, recount the page
+            self.loadDayCounts(self.yearShown(), self.monthShown())
+            return
+        step = 1 if action == "insert" else -1
+        changed = False
+        # only days on the displayed page have counts loaded
+        start, end = self.visibleRange(self.yearShown(), self.monthShown())
+        first, last = start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
+        for row in rows:
+            startTime = row.startTime
+            if not startTime or not first <= startTime[:10] < last:
+                continue
+            day = startTime[:10]
+            self.dayCounts[day] = max(self.dayCounts.get(day, 0) + step, 0)
+            changed = True
+        if changed:
+            self.updateCells()
 
-        self.parent().addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea,
-                                    currentDayDockWidget)
+    def paintCell(self, painter, rect, date):
+        super(CalenWidget, self).paintCell(painter, rect, date)
+        count = self.dayCounts.get(
+            f"{date.year():04d}-{date.month():02d}-{date.day():02d}")
+        if not count:
+            return
+        painter.save()
+        painter.setRenderHint(painter.RenderHint.Antialiasing)
+        badge = QRectF(rect.right() - BADGE_SIZE - 2, rect.top() + 2,
+                       BADGE_SIZE, BADGE_SIZE)
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(BADGE_COLOUR)
+        painter.drawEllipse(badge)
+        painter.setPen(QColor(Qt.GlobalColor.white))
+        painter.setFont(self.badgeFont)
+        painter.drawText(badge, Qt.AlignmentFlag.AlignCenter,
+                         str(count) if count < 100 else "99+")
+        painter.restore()
@@ -1,24 +1,48 @@
 from PyQt6.QtWidgets import (
+    QApplication,
+    QLineEdit,
     QMessageBox,
     QPushButton,
     QToolBar,
     QMainWindow
 )
+from datetime import datetime
 import logging
-from PyQt6.QtCore import Qt
-from database.EventsClass import Events
+from PyQt6.QtCore import QDate, QTimer, Qt
+from PyQt6.QtGui import QKeySequence, QShortcut
+from database.EventsClass import LEGACY_DATE_FORMAT, eventValues, sharedEvents
+from database.InstrumentationClass import exportPath, instrumentation, measure
+from ml.CategoryClassifierClass import CategoryClassifier
+from ml.LocationSuggesterClass import LocationSuggester, TIME_BUCKET_HOURS
+from scheduler.ConflictsClass import ConflictDetector, HARD, TRAVEL
+from scheduler.LocationRegistryClass import LocationRegistry
 from gui.CalenWidgetClass import CalenWidget
+from gui.DayWidgetClass import DayWidget
+from gui.DebugPanelClass import DebugPanel
+from gui.EventsServiceClass import EventsService
 from gui.AddEventGUIClass import AddEventGUI
+from gui.AllEventsWidgetClass import AllEventsWidget
+from gui.PlacesGUIClass import PlacesGUI
+from gui.ReminderTimerClass import ReminderTimer
 from gui.RemoveEventGUIClass import RemoveEventGUI
 
 
+# Characters typed before searching, single letters match most of the table.
+MIN_SEARCH_LENGTH = 2
+# Typing pause before a search is sent, so each keystroke doesn't query.
+SEARCH_DELAY_MS = 150
+SEARCH_LIMIT = 50
+# How long a reminder stays in the status bar.
+REMINDER_MESSAGE_MS = 60 * 1000
+
+
 class CalenWindow(QMainWindow):
     """
     GUI that will hold the calendar widget (CalenWindow) and appointment list.
     Dock Widget will be used to add appointments.
     """
 
-    def __init__(self, parent=None, events=Events()):
+    def __init__(self, parent=None, events=None):
         super(CalenWindow, self).__init__()
         self.setWindowTitle("Calen")
         self.resize(800, 600)
@@ -32,41 +56,279 @@ class CalenWindow(QMainWindow):
         self.addEventButton.clicked.connect(self.openAddEventGUI)
 
         # Initalising events then adding calendar
+        if events is None:
+            logging.info(
+                "CalenWindow has recieced 'None' as its events, using the shared Events instance")
+            events = sharedEvents()
         self.events = events
-        if self.events is None:
-            logging.critical(
-                "CalenWindow has recieced 'None' as its eventService, continuing with new Events instance")
-        print("ALL EVENTS: ", self.events.fetchAllEvents())
-        self.calendar = CalenWidget(self.events)
+        # places with coordinates, for travel time between locations
+        self.locationRegistry = LocationRegistry(self.events)
+        self.conflictDetector = ConflictDetector(self.events,
+                                                 registry=self.locationRegistry)
+        # learns categories from saved events, suggests them in AddEventGUI
+        self.categoryClassifier = CategoryClassifier(self.events)
+        self.locationSuggester = LocationSuggester(self.events)
+        # queries and writes run on a worker thread so SQLite never blocks the UI
+        self.eventsService = EventsService(self.events, self)
+        self.calendar = CalenWidget(self, events=self.events,
+                                    eventsService=self.eventsService)
         self.setCentralWidget(self.calendar)
 
+        # one day panel for the whole session, updated on every click
+        self.dayWidget = DayWidget()
+        self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea,
+                           self.dayWidget)
+        self.dayWidget.hide()
+        self.calendar.dayEventsLoaded.connect(self.dayWidget.setDay)
+
         self.removeEventButton = QPushButton("Remove Event")
-        # TODO: implement removing events
         self.toolbar.addWidget(self.removeEventButton)
         self.removeEventButton.clicked.connect(self.openRemoveEventGUI)
 
+        # as-you-type search, results are listed in the day panel
+        self.searchInput = QLineEdit()
+        self.searchInput.setPlaceholderText("Search events")
+        self.searchInput.setClearButtonEnabled(True)
+        self.toolbar.addWidget(self.searchInput)
+        self.searchTimer = QTimer(self)
+        self.searchTimer.setSingleShot(True)
+        self.searchTimer.setInterval(SEARCH_DELAY_MS)
+        self.searchInput.textChanged.connect(self.searchTimer.start)
+        self.searchTimer.timeout.connect(self.runSearch)
+        self.eventsService.resultReady.connect(self.onSearchResults)
+        self.eventsService.resultReady.connect(self.onLocationCounts)
+        self.eventsService.resultReady.connect(self.onConflictWindow)
+        self.eventsService.requestFailed.connect(self.onConflictCheckFailed)
+        self.dayWidget.eventActivated.connect(self.goToEvent)
+
+        # writes go through the worker, so undo/redo run there too
+        self.undoButton = QPushButton("Undo")
+        self.toolbar.addWidget(self.undoButton)
+        self.undoButton.clicked.connect(self.eventsService.undo)
+        self.redoButton = QPushButton("Redo")
+        self.toolbar.addWidget(self.redoButton)
+        self.redoButton.clicked.connect(self.eventsService.redo)
+        QShortcut(QKeySequence.StandardKey.Undo, self, self.eventsService.undo)
+        QShortcut(QKeySequence.StandardKey.Redo, self, self.eventsService.redo)
+
+        self.placesButton = QPushButton("Places")
+        self.toolbar.addWidget(self.placesButton)
+        self.placesButton.clicked.connect(self.openPlacesGUI)
+
+        # whole history, paged in while scrolling, built when first opened
+        self.allEventsWidget = None
+        self.allEventsButton = QPushButton("All Events")
+        self.toolbar.addWidget(self.allEventsButton)
+        self.allEventsButton.clicked.connect(self.toggleAllEvents)
+
+        # one timer armed for the next upcoming event, no polling
+        self.reminderTimer = ReminderTimer(self.events, self)
+        self.reminderTimer.reminderDue.connect(self.showReminder)
+        self.reminderTimer.start()
+
+        # location index from its snapshot once the window is up, or
+        # counted on the worker rather than when AddEventGUI first asks
+        QTimer.singleShot(0, self.prepareLocationSuggester)
+
+        # query timings, only built when first opened
+        self.debugPanel = None
+        self.debugButton = QPushButton("Timings")
+        self.toolbar.addWidget(self.debugButton)
+        self.debugButton.clicked.connect(self.toggleDebugPanel)
+
     def openAddEventGUI(self):
-        self.addEventWindow = AddEventGUI()
+        # the dialog's lifetime is the user's, only time building it
+        with measure("CalenWindow.openAddEventGUI"):
+            self.addEventWindow = AddEventGUI(self.categoryClassifier,
+                                              self.locationSuggester)
         if self.addEventWindow.exec():
             # checks if the user has exited via save.
             self.newEventData = self.addEventWindow.getAllData()
-            QMessageBox.information(self, "Event Added",
-                                    f"Name: {self.newEventData['name']}\n"
-                                    f"Date: {self.newEventData['date']}\n"
-                                    f"Type: {self.newEventData['rigidity']}\n"
-                                    f"Desc: {self.newEventData['location']}")
-
-            self.events.insertEvent(self.newEventData['name'], self.newEventData['date'],
-                                    self.newEventData['rigidity'], self.newEventData['location'])
+            self.checkConflicts(self.newEventData)
         else:
             print("no event saved")
             pass
 
+    def checkConflicts(self, eventData):
+        """
+        Saves eventData once its conflicts are confirmed. If the conflict
+        detector's window doesn't cover the event, the window's events
+        are fetched on the worker first and the check resumes in
+        onConflictWindow.
+        """
+        values = eventValues(eventData)
+        startTime, endTime = values[4], values[5]
+        window = None
+        if startTime is not None:
+            window = self.conflictDetector.windowFor(
+                startTime, endTime, eventData['location'])
+        if window is None:
+            self.saveEvent(eventData)
+            return
+        self.eventsService.query("conflicts", "fetchOverlappingEvents", window,
+                                 request=(eventData, window))
+
+    def onConflictWindow(self, channel, request, rows):
+        if channel != "conflicts":
+            return
+        eventData, window = request
+        self.conflictDetector.loadWindow(*window, rows=rows)
+        self.saveEvent(eventData)
+
+    def onConflictCheckFailed(self, channel, message):
+        if channel != "conflicts":
+            return
+        # don't lose what was typed in over a failed check
+        QMessageBox.warning(self, "Event Conflicts",
+                            f"Couldn't check for conflicts, saving anyway:\n{message}")
+        self.eventsService.insertEvent(self.newEventData)
+
+    def saveEvent(self, eventData):
+        if not self.confirmConflicts(eventData):
+            print("no event saved")
+            return
+        QMessageBox.information(self, "Event Added",
+                                f"Name: {eventData['name']}\n"
+                                f"Date: {eventData['date']}\n"
+                                f"Type: {eventData['rigidity']}\n"
+                                f"Desc: {eventData['location']}")
+
+        self.eventsService.insertEvent(eventData)
+
+    def runSearch(self):
+        query = self.searchInput.text().strip()
+        if len(query) < MIN_SEARCH_LENGTH:
+            self.eventsService.cancel("search")
+            return
+        self.eventsService.query("search", "search", (query, SEARCH_LIMIT),
+                                 request=query)
+
+    def onSearchResults(self, channel, query, rows):
+        if channel != "search":
+            return
+        self.dayWidget.setEvents(f"Results for \"{query}\"", rows,
+                                 showDate=True)
+
+    def prepareLocationSuggester(self):
+        if not self.locationSuggester.load():
+            self.eventsService.query("locations", "fetchLocationCounts",
+                                     (TIME_BUCKET_HOURS,),
+                                     request=self.events.journal.lastSeq())
+
+    def onLocationCounts(self, channel, seq, groups):
+        if channel != "locations":
+            return
+        self.locationSuggester.build(groups, seq)
+
+    def goToEvent(self, row):
+        """
+        Selects the day of an activated event (e.g. a search result).
+        """
+        if not row.startTime:
+            return
+        date = QDate.fromString(row.startTime[:10], "yyyy-MM-dd")
+        self.calendar.setSelectedDate(date)
+        self.calendar.onClickedDate(date)
+
+    def openPlacesGUI(self):
+        self.placesWindow = PlacesGUI(self.locationRegistry)
+        self.placesWindow.exec()
+
+    def showReminder(self, row):
+        message = f"{row.startTime[11:16]}  {row.name}"
+        if row.location:
+            message += f" @ {row.location}"
+        self.statusBar().showMessage(message, REMINDER_MESSAGE_MS)
+        QApplication.alert(self)
+
+    def toggleAllEvents(self):
+        if self.allEventsWidget is None:
+            self.allEventsWidget = AllEventsWidget(self.events, self)
+            self.allEventsWidget.eventActivated.connect(self.goToEvent)
+            self.addDockWidget(Qt.DockWidgetArea.LeftDockWidgetArea,
+                               self.allEventsWidget)
+            return
+        self.allEventsWidget.setVisible(not self.allEventsWidget.isVisible())
+
+    def toggleDebugPanel(self):
+        if self.debugPanel is None:
+            self.debugPanel = DebugPanel(self)
+            self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea,
+                               self.debugPanel)
+            return
+        self.debugPanel.setVisible(not self.debugPanel.isVisible())
+
+    def closeEvent(self, event):
+        self.eventsService.stop()
+        self.categoryClassifier.save()
+        self.locationSuggester.save()
+        if exportPath() is not None and instrumentation.enabled:
+            instrumentation.export(exportPath())
+        super(CalenWindow, self).closeEvent(event)
+
+    def confirmConflicts(self, eventData):
+        """
+        Checks the new event against the interval tree of its week,
+        loaded beforehand by checkConflicts.
+        Hard (Rigid-Rigid) clashes and neighbours too far away to get
+        to in time need confirming, clashes with Dynamic events are only
+        reported since those can be moved. A hard clash also offers the
+        first time free of Rigid events, moving eventData there if taken.
+        Returns True if the event should be saved.
+        """
+        values = eventValues(eventData)
+        startTime, endTime = values[4], values[5]
+        if startTime is None:
+            return True
+        conflicts = self.conflictDetector.check(
+            startTime, endTime, eventData['rigidity'],
+            location=eventData['location'])
+        if not conflicts:
+            return True
+        kindNames = {HARD: "Clash", TRAVEL: "No time to travel"}
+        lines = "\n".join(
+            f"{kindNames.get(conflict.kind, 'Movable')}: {conflict.row.name} "
+            f"({conflict.row.startTime} - {conflict.row.endTime})"
+            for conflict in conflicts[:10])
+        if any(conflict.kind in (HARD, TRAVEL) for conflict in conflicts):
+            box = QMessageBox(
+                QMessageBox.Icon.Warning, "Event Conflicts",
+                f"This event clashes with fixed events or leaves no time to travel:\n{lines}\n\nSave anyway?",
+                QMessageBox.StandardButton.Save | QMessageBox.StandardButton.Cancel, self)
+            freeStart = moveButton = None
+            if any(conflict.kind == HARD for conflict in conflicts):
+                freeStart = self.conflictDetector.firstFree(startTime, endTime)
+            if freeStart is not None:
+                moveButton = box.addButton(freeStart.strftime("Move to %a %d %b %H:%M"),
+                                           QMessageBox.ButtonRole.AcceptRole)
+            box.exec()
+            if moveButton is not None and box.clickedButton() is moveButton:
+                eventData['date'] = freeStart.strftime(LEGACY_DATE_FORMAT)
+                if eventData.get('endDate'):
+                    # same length as it was given
+                    eventData['endDate'] = freeStart + (
+                        datetime.fromisoformat(endTime) - datetime.fromisoformat(startTime))
+                return True
+            return box.clickedButton() is box.button(QMessageBox.StandardButton.Save)
+        QMessageBox.information(
+            self, "Event Overlaps",
+            f"This event overlaps dynamic events that can be moved:\n{lines}")
+        return True
+
     def openRemoveEventGUI(self):
-        # TODO: MAKE THIS WORK
-        self.removeEventWindow = RemoveEventGUI()
+        self.removeEventWindow = RemoveEventGUI(
+            self.events, self.calendar.selectedDate())
         if self.removeEventWindow.exec():
-            return self.removeEventWindow.getToBeRemovedAppointment()
+            row = self.removeEventWindow.getToBeRemovedEvent()
+            if row is None:
+                return None
+            # the day lists occurrences under their series' id, deleting
+            # that id would remove every occurrence
+            if row.rrule and not self.removeEventWindow.removesSeries():
+                self.eventsService.addException(row.id, row.startTime)
+            else:
+                self.eventsService.deleteEvent(row.id)
+            return row.id
         else:
-            print("no event saved")
+            print("no event removed")
             pass
@@ -0,0 +1,45 @@
+from PyQt6.QtCore import QAbstractListModel, QModelIndex, Qt
+
+
+class DayEventsModel(QAbstractListModel):
+    """
+    List model over one day's Event records.
+    The view only asks for the rows it is painting, so days with
+    hundreds of events don't create a widget per event.
+    """
+
+    def __init__(self, parent=None):
+        super(DayEventsModel, self).__init__(parent)
+        self.rows = []
+        self.showDate = False
+
+    def setRows(self, rows, showDate=False):
+        """
+        Replaces the displayed rows in place.
+        showDate adds the date to each row, for lists spanning many days.
+        """
+        self.beginResetModel()
+        self.rows = list(rows)
+        self.showDate = showDate
+        self.endResetModel()
+
+    def rowAt(self, index):
+        return self.rows[index.row()]
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.rows)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.rows):
+            return None
+        event = self.rows[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            # Event records cache their labels, repainting doesn't reformat
+            return event.label(self.showDate)
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return event.tooltip()
+        if role == Qt.ItemDataRole.UserRole:
+            return event.id
+        return None
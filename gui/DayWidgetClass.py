@@ -3,32 +3,63 @@ from PyQt6.QtWidgets import (
     QWidget,
     QLabel,
     QDockWidget,
+    QListView,
 )
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, pyqtSignal
+from gui.DayEventsModelClass import DayEventsModel
 
 
 class DayWidget(QDockWidget):
     """
     GUI that can pop in and out from main window to show
     each day and its events.
+    A single instance is kept by CalenWindow and updated
+    in place through setDay whenever another date is selected.
     Inherited: QDockWidget
     Parameters: the current Date object
     """
 
-    def __init__(self, selectedDate, dayEvents=None):
+    # emitted with the row of an event the user double clicks or presses enter on
+    eventActivated = pyqtSignal(object)
+
+    def __init__(self, selectedDate=None, dayEvents=None):
         super(DayWidget, self).__init__()
         # Dock can appear on left or right side.
         self.setAllowedAreas(Qt.DockWidgetArea.LeftDockWidgetArea |
                              Qt.DockWidgetArea.RightDockWidgetArea)
 
-        self.label = QLabel(f"{selectedDate.toString()}")
+        self.label = QLabel()
         self.container = QWidget()
         self.vLayout = QVBoxLayout()
-        if dayEvents is not None:
-            self.dayEvents = QLabel(dayEvents)
-            # Adds the events as a label
-            self.vLayout.addWidget(self.dayEvents)
+
+        # rows are painted by the view from the model, not one widget each
+        self.dayEventsModel = DayEventsModel(self)
+        self.dayEvents = QListView()
+        self.dayEvents.setModel(self.dayEventsModel)
+        self.dayEvents.setUniformItemSizes(True)
+        self.dayEvents.activated.connect(self.onActivated)
+        self.vLayout.addWidget(self.dayEvents)
 
         self.vLayout.addWidget(self.label)
         self.container.setLayout(self.vLayout)
         self.setWidget(self.container)
+
+        if selectedDate is not None:
+            self.setDay(selectedDate, dayEvents or [])
+
+    def setDay(self, selectedDate, dayEvents):
+        """
+        Shows dayEvents (rows in EVENT_COLUMNS order) for selectedDate.
+        """
+        self.setEvents(selectedDate.toString(), dayEvents)
+
+    def setEvents(self, title, rows, showDate=False):
+        """
+        Shows any list of rows under title, e.g. search results.
+        """
+        self.label.setText(title)
+        self.dayEventsModel.setRows(rows, showDate)
+        self.show()
+
+    def onActivated(self, index):
+        self.eventActivated.emit(self.dayEventsModel.rowAt(index))
@@ -0,0 +1,112 @@
+from PyQt6.QtWidgets import (
+    QCheckBox,
+    QDockWidget,
+    QFileDialog,
+    QHBoxLayout,
+    QHeaderView,
+    QListWidget,
+    QPushButton,
+    QTableWidget,
+    QTableWidgetItem,
+    QVBoxLayout,
+    QWidget,
+)
+from PyQt6.QtCore import Qt, QTimer
+from database.InstrumentationClass import instrumentation
+
+# How often the open panel re-reads the timings.
+REFRESH_MS = 1000
+# (header, summary key) of each table column after the name.
+COLUMNS = (("Calls", "calls"), ("p50 ms", "p50Ms"), ("p95 ms", "p95Ms"),
+           ("p99 ms", "p99Ms"), ("Max ms", "maxMs"), ("Rows", "rows"),
+           ("SQL", "statements"))
+
+
+class DebugPanel(QDockWidget):
+    """
+    Dock showing the instrumented call timings and the slow query log,
+    with buttons to switch recording on/off, reset and export to JSON.
+    Only refreshes while it's visible.
+    """
+
+    def __init__(self, parent=None):
+        super(DebugPanel, self).__init__("Timings", parent)
+        self.setAllowedAreas(Qt.DockWidgetArea.BottomDockWidgetArea |
+                             Qt.DockWidgetArea.RightDockWidgetArea)
+
+        self.container = QWidget()
+        self.vLayout = QVBoxLayout()
+
+        self.buttons = QHBoxLayout()
+        self.enabledInput = QCheckBox("Record")
+        self.enabledInput.setChecked(instrumentation.enabled)
+        self.enabledInput.toggled.connect(self.onRecordToggled)
+        self.buttons.addWidget(self.enabledInput)
+        self.resetButton = QPushButton("Reset")
+        self.resetButton.clicked.connect(self.onReset)
+        self.buttons.addWidget(self.resetButton)
+        self.exportButton = QPushButton("Export...")
+        self.exportButton.clicked.connect(self.onExport)
+        self.buttons.addWidget(self.exportButton)
+        self.vLayout.addLayout(self.buttons)
+
+        self.table = QTableWidget(0, len(COLUMNS) + 1)
+        self.table.setHorizontalHeaderLabels(["Name"] + [header for header, _ in COLUMNS])
+        self.table.horizontalHeader().setSectionResizeMode(
+            0, QHeaderView.ResizeMode.Stretch)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.vLayout.addWidget(self.table)
+
+        self.slowLog = QListWidget()
+        self.vLayout.addWidget(self.slowLog)
+
+        self.container.setLayout(self.vLayout)
+        self.setWidget(self.container)
+
+        self.refreshTimer = QTimer(self)
+        self.refreshTimer.setInterval(REFRESH_MS)
+        self.refreshTimer.timeout.connect(self.refresh)
+        self.visibilityChanged.connect(self.onVisibilityChanged)
+
+    def onVisibilityChanged(self, visible):
+        if visible:
+            self.refresh()
+            self.refreshTimer.start()
+        else:
+            self.refreshTimer.stop()
+
+    def onRecordToggled(self, checked):
+        if checked:
+            instrumentation.enable()
+        else:
+            instrumentation.disable()
+
+    def onReset(self):
+        instrumentation.reset()
+        self.refresh()
+
+    def onExport(self):
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Export timings", "timings.json", "JSON (*.json)")
+        if path:
+            instrumentation.export(path)
+
+    def refresh(self):
+        snapshot = instrumentation.snapshot()
+        timings = snapshot["timings"]
+        self.table.setRowCount(len(timings))
+        for row, (name, summary) in enumerate(timings.items()):
+            self.table.setItem(row, 0, QTableWidgetItem(name))
+            for column, (_, key) in enumerate(COLUMNS, start=1):
+                value = summary[key]
+                text = f"{value:.2f}" if isinstance(value, float) else str(value)
+                item = QTableWidgetItem(text)
+                item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                self.table.setItem(row, column, item)
+
+        self.slowLog.clear()
+        for entry in reversed(snapshot["slowLog"]):
+            sql = "; ".join(statement.strip() for statement in entry["sql"][:3])
+            self.slowLog.addItem(
+                f"{entry['at']}  {entry['name']}  {entry['ms']:.1f}ms  "
+                f"{entry['rows']} rows  {sql}")
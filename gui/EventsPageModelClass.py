@@ -0,0 +1,189 @@
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from itertools import accumulate
+from PyQt6.QtCore import QAbstractListModel, QModelIndex, Qt
+from database.EventsClass import DEFAULT_PAGE_SIZE, toTimestamp
+
+# Pages of rows held in memory, older ones are dropped and re-read
+# by their key if scrolled back to.
+DEFAULT_CACHED_PAGES = 20
+
+
+class EventsPageModel(QAbstractListModel):
+    """
+    List model over every event matching a filter, for views of the
+    whole history.
+    Pages are fetched through Events.fetchEventsPage only when the
+    view scrolls to the end of what's loaded (canFetchMore/fetchMore).
+    Only the (startTime, id) key where each page starts is kept for
+    every page, the rows themselves live in a small LRU of pages, so
+    memory stays flat while scrolling through a million events.
+    A page covers the keys between its own and the next page's, so
+    inserts and deletes inside the loaded rows only change how many
+    rows that page holds, and changes past them wait for fetchMore.
+    """
+
+    def __init__(self, events, filter=None, pageSize=DEFAULT_PAGE_SIZE,
+                 cachedPages=DEFAULT_CACHED_PAGES, parent=None):
+        super(EventsPageModel, self).__init__(parent)
+        self.events = events
+        self.filter = filter
+        self.pageSize = pageSize
+        self.cachedPages = cachedPages
+        self.reset()
+        self.events.addListener(self.onEventsChanged)
+
+    def reset(self):
+        self.pages = OrderedDict()  # page number -> rows
+        self.pageKeys = [None]  # key each page starts after, one per page
+        self.pageBounds = [sortKey(None, 0)]  # pageKeys as comparable keys
+        self.pageCounts = []  # rows in each loaded page
+        self.pageStarts = []  # model row each loaded page starts at
+        self.loadedRows = 0
+        self.exhausted = False
+
+    def setFilter(self, filter):
+        self.beginResetModel()
+        self.filter = filter
+        self.reset()
+        self.endResetModel()
+
+    def page(self, number):
+        """
+        Rows of page number, read again by its key if it was evicted.
+        """
+        rows = self.pages.get(number)
+        if rows is None:
+            size = (self.pageCounts[number] if number < len(self.pageCounts)
+                    else self.pageSize)
+            rows = self.events.fetchEventsPage(
+                self.filter, self.pageKeys[number], size)
+            self.pages[number] = rows
+            if len(self.pages) > self.cachedPages:
+                self.pages.popitem(last=False)
+        else:
+            self.pages.move_to_end(number)
+        return rows
+
+    def rowAt(self, index):
+        number = bisect_right(self.pageStarts, index.row()) - 1
+        rows = self.page(number)
+        offset = index.row() - self.pageStarts[number]
+        return rows[offset] if offset < len(rows) else None
+
+    def countChanged(self, number, change):
+        self.pageCounts[number] += change
+        self.pageStarts = [0, *accumulate(self.pageCounts[:-1])]
+        self.loadedRows += change
+        self.pages.pop(number, None)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self.loadedRows
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self.exhausted:
+            return
+        number = len(self.pageKeys) - 1
+        rows = self.page(number)
+        if len(rows) < self.pageSize:
+            self.exhausted = True
+        else:
+            self.pageKeys.append((rows[-1].startTime, rows[-1].id))
+            self.pageBounds.append(sortKey(rows[-1].startTime, rows[-1].id))
+        if rows:
+            self.beginInsertRows(QModelIndex(), self.loadedRows,
+                                 self.loadedRows + len(rows) - 1)
+            self.pageStarts.append(self.loadedRows)
+            self.pageCounts.append(len(rows))
+            self.loadedRows += len(rows)
+            self.endInsertRows()
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= self.loadedRows:
+            return None
+        event = self.rowAt(index)
+        if event is None:
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return event.label(showDate=True)
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return event.tooltip()
+        if role == Qt.ItemDataRole.UserRole:
+            return event.id
+        return None
+
+    def matches(self, row):
+        """
+        Whether row passes the filter, as fetchEventsPage's WHERE would.
+        """
+        for key, value in (self.filter or {}).items():
+            if key in ("start", "end"):
+                if row.startTime is None:
+                    return False
+                bound = toTimestamp(value)
+                if row.startTime < bound if key == "start" else row.startTime >= bound:
+                    return False
+            elif getattr(row, key) != value:
+                return False
+        return True
+
+    def loadedPage(self, key):
+        """
+        Number of the loaded page key falls in, None if it comes after
+        the loaded rows. Once exhausted the last page takes every key
+        after it, starting one if the last fetch came back empty.
+        """
+        number = bisect_left(self.pageBounds, key) - 1
+        if number >= len(self.pageCounts):
+            if not self.exhausted:
+                return None
+            while number >= len(self.pageCounts):
+                self.pageStarts.append(self.loadedRows)
+                self.pageCounts.append(0)
+        return number
+
+    def onEventsChanged(self, action, rows):
+        """
+        Events listener. Rows the filter excludes or past the loaded ones
+        change nothing on screen; the others are inserted or removed at
+        their position, found by reading their page again (the change is
+        already committed). Big changes such as imports reset instead.
+        """
+        rows = sorted((row for row in rows if self.matches(row)),
+                      key=lambda row: sortKey(row.startTime, row.id))
+        if len(rows) > self.pageSize:
+            self.beginResetModel()
+            self.reset()
+            self.endResetModel()
+            return
+        for row in rows:
+            key = sortKey(row.startTime, row.id)
+            number = self.loadedPage(key)
+            if number is None:
+                break  # so are the rest, they're sorted
+            current = self.events.fetchEventsPage(
+                self.filter, self.pageKeys[number], self.pageCounts[number] + 1)
+            offset = bisect_left([sortKey(event.startTime, event.id)
+                                  for event in current], key)
+            position = self.pageStarts[number] + offset
+            if action == "insert":
+                self.beginInsertRows(QModelIndex(), position, position)
+                self.countChanged(number, 1)
+                self.endInsertRows()
+            elif self.pageCounts[number] > offset:
+                self.beginRemoveRows(QModelIndex(), position, position)
+                self.countChanged(number, -1)
+                self.endRemoveRows()
+
+
+def sortKey(startTime, eventId):
+    """
+    Comparable form of a (startTime, id) key, in the ORDER BY startTime, id
+    order where events with no start come first.
+    """
+    return (startTime is not None, startTime or "", eventId)
@@ -0,0 +1,220 @@
+from PyQt6.QtCore import QObject, QThread, Qt, pyqtSignal, pyqtSlot
+import logging
+from database.EventsClass import Events
+
+
+class EventsWorker(QObject):
+    """
+    Lives on the EventsService thread and owns its own Events connection
+    to the same database file, so slow queries never block the GUI.
+    Requests older than the latest one on their channel are skipped.
+    """
+
+    resultFetched = pyqtSignal(str, int, object)  # channel, generation, result
+    changed = pyqtSignal(str, object)  # action, rows
+    failed = pyqtSignal(str, int, str)  # channel, generation, message
+
+    def __init__(self, path, generations):
+        super(EventsWorker, self).__init__()
+        self.path = path
+        # shared with EventsService, only ever read here
+        self.generations = generations
+        self.events = None
+
+    def ensureEvents(self):
+        """
+        Opens the connection on first use so it belongs to this thread.
+        """
+        if self.events is None:
+            self.events = Events(self.path)
+            self.events.addListener(self.changed.emit)
+        return self.events
+
+    def isStale(self, channel, generation):
+        return generation != self.generations.get(channel)
+
+    @pyqtSlot(str, int, str, object)
+    def query(self, channel, generation, method, args):
+        """
+        Runs the read-only Events method with args.
+        """
+        if self.isStale(channel, generation):
+            return  # a newer request is queued behind this one
+        try:
+            result = getattr(self.ensureEvents(), method)(*args)
+        except Exception as error:
+            logging.exception("Background %s failed", method)
+            self.failed.emit(channel, generation, str(error))
+            return
+        self.resultFetched.emit(channel, generation, result)
+
+    @pyqtSlot(object)
+    def insertEvent(self, eventData):
+        try:
+            self.ensureEvents().insertEvent(
+                eventData['name'], eventData['date'],
+                eventData['rigidity'], eventData['location'],
+                eventData.get('endDate'), category=eventData.get('category'))
+        except Exception as error:
+            logging.exception("Background insert failed")
+            self.failed.emit("insert", 0, str(error))
+
+    @pyqtSlot(int)
+    def deleteEvent(self, eventId):
+        try:
+            self.ensureEvents().deleteEvent(eventId)
+        except Exception as error:
+            logging.exception("Background delete failed")
+            self.failed.emit("delete", 0, str(error))
+
+    @pyqtSlot(int, str)
+    def addException(self, eventId, occurrenceStart):
+        try:
+            self.ensureEvents().addException(eventId, occurrenceStart)
+        except Exception as error:
+            logging.exception("Background exception failed")
+            self.failed.emit("exception", 0, str(error))
+
+    @pyqtSlot(str)
+    def replay(self, direction):
+        """
+        Runs the journal's undo or redo, on the connection that made the
+        writes it remembers.
+        """
+        try:
+            getattr(self.ensureEvents().journal, direction)()
+        except Exception as error:
+            logging.exception("Background %s failed", direction)
+            self.failed.emit(direction, 0, str(error))
+
+    @pyqtSlot()
+    def close(self):
+        if self.events is not None:
+            self.events.close()
+            self.events = None
+
+
+class EventsService(QObject):
+    """
+    Runs Events queries on a worker QThread and delivers the results
+    through Qt signals on the GUI thread.
+    Each request belongs to a channel (e.g. "day"), only the most recent
+    request per channel is executed and delivered, so rapid clicks
+    coalesce into a single query for the last clicked day.
+    Writes committed by the worker are relayed to the listeners of the
+    GUI thread's Events instance so caches stay in sync.
+    """
+
+    resultReady = pyqtSignal(str, object, object)  # channel, request, result
+    requestFailed = pyqtSignal(str, str)  # channel, message
+
+    # internal, queued across to the worker thread
+    queryRequested = pyqtSignal(str, int, str, object)
+    insertRequested = pyqtSignal(object)
+    deleteRequested = pyqtSignal(int)
+    exceptionRequested = pyqtSignal(int, str)
+    replayRequested = pyqtSignal(str)
+
+    def __init__(self, events, parent=None):
+        super(EventsService, self).__init__(parent)
+        self.events = events
+        self.generations = {}  # channel -> latest generation
+        self.requests = {}  # channel -> payload of the latest request
+
+        self.thread = QThread()
+        self.worker = EventsWorker(events.path, self.generations)
+        self.worker.moveToThread(self.thread)
+        self.queryRequested.connect(self.worker.query)
+        self.insertRequested.connect(self.worker.insertEvent)
+        self.deleteRequested.connect(self.worker.deleteEvent)
+        self.exceptionRequested.connect(self.worker.addException)
+        self.replayRequested.connect(self.worker.replay)
+        self.worker.resultFetched.connect(self.onResultFetched)
+        self.worker.changed.connect(self.onWorkerChanged)
+        self.worker.failed.connect(self.onFailed)
+        # finished is emitted from the worker thread, close the
+        # connection there rather than on the GUI thread
+        self.thread.finished.connect(self.worker.close,
+                                     Qt.ConnectionType.DirectConnection)
+        self.thread.start()
+
+    def query(self, channel, method, args, request=None):
+        """
+        Queues the read-only Events method(*args) on the worker.
+        resultReady(channel, request, result) is emitted unless a newer
+        request on the same channel supersedes this one.
+        """
+        generation = self.generations.get(channel, 0) + 1
+        self.generations[channel] = generation
+        self.requests[channel] = request
+        self.queryRequested.emit(channel, generation, method, tuple(args))
+
+    def fetchRange(self, channel, start, end, request=None):
+        """
+        Queues Events.fetchRangeEvents(start, end) on the worker.
+        """
+        self.query(channel, "fetchRangeEvents", (start, end), request)
+
+    def fetchDayCounts(self, channel, start, end, request=None):
+        """
+        Queues Events.fetchDayCounts(start, end) on the worker.
+        """
+        self.query(channel, "fetchDayCounts", (start, end), request)
+
+    def cancel(self, channel):
+        """
+        Drops any in-flight request on channel.
+        """
+        self.generations[channel] = self.generations.get(channel, 0) + 1
+        self.requests.pop(channel, None)
+
+    def insertEvent(self, eventData):
+        """
+        Queues an insert of an AddEventGUI.getAllData dict on the worker.
+        """
+        self.insertRequested.emit(eventData)
+
+    def deleteEvent(self, eventId):
+        """
+        Queues a delete of the event with eventId on the worker.
+        """
+        self.deleteRequested.emit(eventId)
+
+    def addException(self, eventId, occurrenceStart):
+        """
+        Queues excluding the occurrence of series eventId starting at
+        occurrenceStart ("yyyy-MM-dd HH:mm") on the worker.
+        """
+        self.exceptionRequested.emit(eventId, occurrenceStart)
+
+    def undo(self):
+        """
+        Queues undoing the last write made through this service.
+        """
+        self.replayRequested.emit("undo")
+
+    def redo(self):
+        self.replayRequested.emit("redo")
+
+    @pyqtSlot(str, int, object)
+    def onResultFetched(self, channel, generation, result):
+        if generation != self.generations.get(channel):
+            return  # superseded while the query was running
+        self.resultReady.emit(channel, self.requests.pop(channel, None), result)
+
+    @pyqtSlot(str, object)
+    def onWorkerChanged(self, action, rows):
+        # runs on the GUI thread, where the listeners (caches) live
+        self.events.notifyListeners(action, rows)
+
+    @pyqtSlot(str, int, str)
+    def onFailed(self, channel, generation, message):
+        if channel in ("insert", "delete", "exception", "undo", "redo") or generation == self.generations.get(channel):
+            self.requestFailed.emit(channel, message)
+
+    def stop(self):
+        """
+        Stops the worker thread, waiting for the running query to finish.
+        """
+        self.thread.quit()
+        self.thread.wait()
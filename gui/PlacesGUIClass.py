@@ -0,0 +1,84 @@
+from PyQt6.QtWidgets import (
+    QDialog,
+    QDoubleSpinBox,
+    QFormLayout,
+    QHeaderView,
+    QLineEdit,
+    QPushButton,
+    QTableWidget,
+    QTableWidgetItem,
+    QVBoxLayout,
+    QLabel,
+)
+
+
+class PlacesGUI(QDialog):
+    """
+    GUI listing the registered places, and for adding one (or moving an
+    existing one) by typing in its coordinates and aliases.
+    """
+
+    def __init__(self, registry):
+        super().__init__()
+        self.registry = registry
+        self.setWindowTitle("Places")
+
+        self.layout = QVBoxLayout()
+
+        self.placesTable = QTableWidget(0, 4)
+        self.placesTable.setHorizontalHeaderLabels(["Name", "Latitude", "Longitude", "Aliases"])
+        self.placesTable.horizontalHeader().setSectionResizeMode(
+            3, QHeaderView.ResizeMode.Stretch)
+        self.placesTable.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.placesTable.cellClicked.connect(self.onPlaceClicked)
+        self.layout.addWidget(self.placesTable)
+
+        self.layout.addWidget(QLabel("Add or move a place:"))
+        self.form = QFormLayout()
+        self.placeNameInput = QLineEdit()
+        self.form.addRow("Name", self.placeNameInput)
+        self.placeLatInput = QDoubleSpinBox()
+        self.placeLatInput.setRange(-90, 90)
+        self.placeLatInput.setDecimals(6)
+        self.form.addRow("Latitude", self.placeLatInput)
+        self.placeLonInput = QDoubleSpinBox()
+        self.placeLonInput.setRange(-180, 180)
+        self.placeLonInput.setDecimals(6)
+        self.form.addRow("Longitude", self.placeLonInput)
+        self.placeAliasesInput = QLineEdit()
+        self.placeAliasesInput.setPlaceholderText("Other names, comma separated")
+        self.form.addRow("Aliases", self.placeAliasesInput)
+        self.layout.addLayout(self.form)
+
+        self.addButton = QPushButton("Save Place")
+        self.addButton.clicked.connect(self.savePlace)
+        self.layout.addWidget(self.addButton)
+
+        self.setLayout(self.layout)
+        self.loadPlaces()
+
+    def loadPlaces(self):
+        self.placesTable.setRowCount(len(self.registry.places))
+        for row, place in enumerate(self.registry.places):
+            for column, value in enumerate((place.name, f"{place.lat:.6f}",
+                                            f"{place.lon:.6f}", ", ".join(place.aliases))):
+                self.placesTable.setItem(row, column, QTableWidgetItem(value))
+
+    def onPlaceClicked(self, row, column):
+        place = self.registry.places[row]
+        self.placeNameInput.setText(place.name)
+        self.placeLatInput.setValue(place.lat)
+        self.placeLonInput.setValue(place.lon)
+        self.placeAliasesInput.clear()
+
+    def savePlace(self):
+        name = self.placeNameInput.text().strip()
+        if not name:
+            return
+        aliases = [alias.strip() for alias in self.placeAliasesInput.text().split(",")
+                   if alias.strip()]
+        self.registry.addPlace(name, self.placeLatInput.value(),
+                               self.placeLonInput.value(), aliases)
+        self.loadPlaces()
+        self.placeNameInput.clear()
+        self.placeAliasesInput.clear()
@@ -0,0 +1,33 @@
+from PyQt6.QtCore import QObject, Qt, QTimer, pyqtSignal
+from scheduler.ReminderSchedulerClass import ReminderScheduler
+
+# QTimer intervals are ints of milliseconds, longer waits are split.
+MAX_INTERVAL_MS = 2 ** 31 - 1
+
+
+class ReminderTimer(QObject):
+    """
+    Drives a ReminderScheduler from one single-shot QTimer, armed for
+    the next deadline only. Emits reminderDue(row) for each event as
+    its reminder comes up.
+    """
+
+    reminderDue = pyqtSignal(object)
+
+    def __init__(self, events, parent=None, **options):
+        super(ReminderTimer, self).__init__(parent)
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.timer.timeout.connect(self.onTimeout)
+        self.scheduler = ReminderScheduler(events, arm=self.arm, **options)
+
+    def start(self):
+        self.scheduler.load()
+
+    def arm(self, seconds):
+        self.timer.start(min(MAX_INTERVAL_MS, int(seconds * 1000)))
+
+    def onTimeout(self):
+        for reminder in self.scheduler.popDue():
+            self.reminderDue.emit(reminder.row)
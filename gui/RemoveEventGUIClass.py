@@ -1,40 +1,87 @@
 from PyQt6.QtWidgets import (
+    QCheckBox,
     QComboBox,
+    QDateEdit,
     QDialog,
+    QPushButton,
     QVBoxLayout,
     QLabel,
 )
-from database.EventsClass import formatGetAllEvents
+from PyQt6.QtCore import QDate, Qt
+from gui.DayEventsModelClass import DayEventsModel
 
 
 class RemoveEventGUI(QDialog):
-    def __init__(self):
+    """
+    GUI for picking a date and then one of that date's events to remove.
+    Only the selected date's events are loaded, via the indexed
+    date-range path rather than the whole table.
+    For an occurrence of a recurring event only that occurrence is
+    removed, unless the whole series is ticked.
+    """
+
+    def __init__(self, events, selectedDate=None):
         super().__init__()
+        self.events = events
 
         self.setWindowTitle("Remove Event")
 
         self.layout = QVBoxLayout()
 
-        # get all items and list them
-        # TODO: CHANGE TO SERVICE -> ask for date in dropdown then upon selection, get the events for that date.
-
-        # self.con = sqlite3.connect("events.db")  # connects to database
-        # self.cur = self.con.cursor()  # allows SQL executions
-        # self.cur.execute("SELECT * FROM events")
-        # self.allEvents = self.cur.fetchall()
-        self.formattedEvents = formatGetAllEvents(self.allEvents)
-        self.cur.close()
+        self.layout.addWidget(QLabel("Date of Event:"))
+        self.removeEventDateInput = QDateEdit()
+        self.removeEventDateInput.setCalendarPopup(True)
+        self.removeEventDateInput.setDate(selectedDate or QDate.currentDate())
+        self.layout.addWidget(self.removeEventDateInput)
 
         self.layout.addWidget(QLabel("Select event to remove:"))
         self.removeEventSelector = QComboBox()
-        # self.removeEventSelector.addItems(self.allEvents)
-        # TODO: conect this to update the qcombobox events to update based on the selected date
-        self.removeEventSelector.currentTextChanged.connect()
-
+        self.dayEventsModel = DayEventsModel(self)
+        self.removeEventSelector.setModel(self.dayEventsModel)
         self.layout.addWidget(self.removeEventSelector)
 
+        self.removeSeriesInput = QCheckBox("Remove the whole series")
+        self.layout.addWidget(self.removeSeriesInput)
+
+        self.removeButton = QPushButton("Remove")
+        self.layout.addWidget(self.removeButton)
+
         self.setLayout(self.layout)
 
+        # reload the selector whenever another date is picked
+        self.removeEventDateInput.dateChanged.connect(self.loadDayEvents)
+        self.removeEventSelector.currentIndexChanged.connect(self.updateSeriesInput)
+        self.removeButton.clicked.connect(self.accept)
+        self.loadDayEvents(self.removeEventDateInput.date())
+
+    def loadDayEvents(self, date):
+        self.dayEventsModel.setRows(
+            self.events.fetchDayEvents(date.toString("dd-MM-yyyy")))
+        self.removeButton.setEnabled(self.dayEventsModel.rowCount() > 0)
+        self.updateSeriesInput()
+
+    def updateSeriesInput(self):
+        # only occurrences of a recurring event have a series to remove
+        row = self.getToBeRemovedEvent()
+        self.removeSeriesInput.setEnabled(row is not None and bool(row.rrule))
+        if not self.removeSeriesInput.isEnabled():
+            self.removeSeriesInput.setChecked(False)
+
+    def getToBeRemovedEvent(self):
+        """
+        Returns the selected Event record, or None if the day is empty.
+        Occurrences of a series carry the series id and their own start.
+        """
+        index = self.removeEventSelector.currentIndex()
+        if index < 0:
+            return None
+        return self.dayEventsModel.rows[index]
+
+    def removesSeries(self):
+        return self.removeSeriesInput.isChecked()
+
     def getToBeRemovedAppointment(self):
-        self.currentSelection = self.removeEventSelector.currentText()
-        return self.currentSelection
+        """
+        Returns the id of the selected event, or None if the day is empty.
+        """
+        return self.removeEventSelector.currentData(Qt.ItemDataRole.UserRole)
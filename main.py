@@ -1,13 +1,13 @@
 import sys
 from PyQt6.QtWidgets import QApplication
 from gui.CalenWindowClass import CalenWindow
-from database.EventsClass import Events
+from database.EventsClass import sharedEvents
 
 
 if __name__ == "__main__":
-    events = Events()
+    events = sharedEvents()
     app = QApplication(sys.argv)
-    window = CalenWindow(events)
+    window = CalenWindow(events=events)
     window.show()
     app.exec()
     events.close()
@@ -0,0 +1,222 @@
+import json
+import logging
+import math
+import os
+import re
+import zlib
+
+try:
+    import numpy
+except ImportError:  # batched prediction falls back to plain Python
+    numpy = None
+
+# Size of the hashed feature space, tokens share buckets beyond this.
+FEATURE_BITS = 14
+FEATURES = 1 << FEATURE_BITS
+# Laplace smoothing added to every feature count.
+SMOOTHING = 1.0
+# Model file written next to events.db.
+MODEL_FILENAME = "categories.model"
+# Learnt rows between automatic saves of the model file.
+SAVE_EVERY = 100
+# Index of category in an EVENT_COLUMNS row.
+CATEGORY_COLUMN = 8
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def featureIds(name, location):
+    """
+    Hashes the words of an event's name and location into feature ids.
+    Location words get their own prefix so "Library" as a place and in
+    a name count separately. crc32 is used as it's stable across runs,
+    unlike hash().
+    """
+    ids = []
+    for prefix, text in (("n:", name), ("l:", location)):
+        for token in TOKEN_PATTERN.findall((text or "").lower()):
+            ids.append(zlib.crc32((prefix + token).encode("utf-8")) & (FEATURES - 1))
+    return ids
+
+
+class CategoryClassifier():
+    """
+    Local multinomial naive Bayes over hashed bag-of-words features of
+    event names and locations. No network access is involved.
+    Learns incrementally from categorised rows as they are inserted
+    (and forgets deleted ones) through an Events listener, and saves
+    its counts next to events.db.
+    Whole ranges are classified in one vectorised pass when NumPy is
+    available.
+    """
+
+    def __init__(self, events, modelPath=None):
+        self.events = events
+        if modelPath is None:
+            modelPath = os.path.join(
+                os.path.dirname(os.path.abspath(events.path)), MODEL_FILENAME)
+        self.modelPath = modelPath
+        # category -> {featureId: count}, and the totals naive Bayes needs
+        self.featureCounts = {}
+        self.featureTotals = {}
+        self.documentCounts = {}
+        self.unsaved = 0
+        self.matrix = None  # cached (categories, logPriors, logLikelihoods)
+        self.load()
+        self.events.addListener(self.onEventsChanged)
+
+    def load(self):
+        if not os.path.exists(self.modelPath):
+            return
+        try:
+            with open(self.modelPath) as modelFile:
+                model = json.load(modelFile)
+        except (OSError, ValueError):
+            logging.exception("Could not read category model %s", self.modelPath)
+            return
+        if model.get("featureBits") != FEATURE_BITS:
+            logging.warning("Ignoring category model with different feature size")
+            return
+        for category, counts in model["featureCounts"].items():
+            self.featureCounts[category] = {
+                int(feature): count for feature, count in counts.items()}
+            self.featureTotals[category] = sum(counts.values())
+        self.documentCounts = model["documentCounts"]
+
+    def save(self):
+        """
+        Writes the model atomically next to events.db.
+        """
+        model = {
+            "featureBits": FEATURE_BITS,
+            "documentCounts": self.documentCounts,
+            "featureCounts": self.featureCounts,
+        }
+        temporaryPath = self.modelPath + ".tmp"
+        with open(temporaryPath, "w") as modelFile:
+            json.dump(model, modelFile)
+        os.replace(temporaryPath, self.modelPath)
+        self.unsaved = 0
+
+    def learn(self, name, location, category, weight=1):
+        """
+        Adds (or with weight=-1 removes) one labelled example.
+        """
+        counts = self.featureCounts.setdefault(category, {})
+        for feature in featureIds(name, location):
+            count = counts.get(feature, 0) + weight
+            if count > 0:
+                counts[feature] = count
+            else:
+                counts.pop(feature, None)
+            self.featureTotals[category] = max(
+                self.featureTotals.get(category, 0) + weight, 0)
+        documents = self.documentCounts.get(category, 0) + weight
+        if documents > 0:
+            self.documentCounts[category] = documents
+        else:
+            for table in (self.documentCounts, self.featureCounts, self.featureTotals):
+                table.pop(category, None)
+        self.matrix = None
+        self.unsaved += 1
+
+    def onEventsChanged(self, action, rows):
+        """
+        Events listener, trains on categorised inserts and untrains deletes.
+        """
+        weight = 1 if action == "insert" else -1
+        learnt = False
+        for row in rows:
+            if row[CATEGORY_COLUMN]:
+                self.learn(row[1], row[4], row[CATEGORY_COLUMN], weight)
+                learnt = True
+        if learnt and self.unsaved >= SAVE_EVERY:
+            self.save()
+
+    def categories(self):
+        return sorted(self.documentCounts)
+
+    def logScores(self, features):
+        """
+        Unnormalised log posterior of each category for one event.
+        """
+        totalDocuments = sum(self.documentCounts.values())
+        scores = {}
+        for category, documents in self.documentCounts.items():
+            counts = self.featureCounts.get(category, {})
+            denominator = math.log(self.featureTotals.get(category, 0)
+                                   + SMOOTHING * FEATURES)
+            score = math.log(documents / totalDocuments)
+            for feature in features:
+                score += math.log(counts.get(feature, 0) + SMOOTHING) - denominator
+            scores[category] = score
+        return scores
+
+    def classify(self, name, location=""):
+        """
+        Predicts the category of a single event, None before any training.
+        """
+        if not self.documentCounts:
+            return None
+        scores = self.logScores(featureIds(name, location))
+        return max(scores, key=scores.get)
+
+    def buildMatrix(self):
+        """
+        Dense (categories x FEATURES) log-likelihood matrix for batches,
+        rebuilt only after the model changes.
+        """
+        if self.matrix is None:
+            categories = self.categories()
+            totalDocuments = sum(self.documentCounts.values())
+            logPriors = numpy.log(numpy.array(
+                [self.documentCounts[category] / totalDocuments for category in categories]))
+            logLikelihoods = numpy.full((len(categories), FEATURES), SMOOTHING)
+            for index, category in enumerate(categories):
+                counts = self.featureCounts.get(category, {})
+                if counts:
+                    logLikelihoods[index, list(counts)] += list(counts.values())
+            logLikelihoods = numpy.log(logLikelihoods) - numpy.log(
+                logLikelihoods.sum(axis=1, keepdims=True))
+            self.matrix = (categories, logPriors, logLikelihoods)
+        return self.matrix
+
+    def classifyMany(self, rows):
+        """
+        Predicts categories for many rows (EVENT_COLUMNS order) at once.
+        With NumPy every row's features are gathered from the
+        log-likelihood matrix and summed per row in one pass, rather
+        than scoring the rows one at a time.
+        """
+        rows = list(rows)
+        if not self.documentCounts or not rows:
+            return [None] * len(rows)
+        if numpy is None:
+            return [self.classify(row[1], row[4]) for row in rows]
+
+        categories, logPriors, logLikelihoods = self.buildMatrix()
+        rowIndexes, columnIndexes = [], []
+        for index, row in enumerate(rows):
+            features = featureIds(row[1], row[4])
+            rowIndexes.extend([index] * len(features))
+            columnIndexes.extend(features)
+        # gather every feature's log-likelihood, then sum them per row
+        # with one bincount over (category, row) cells
+        rowIndexes = numpy.array(rowIndexes, dtype=numpy.intp)
+        cells = (numpy.arange(len(categories))[:, None] * len(rows) + rowIndexes).ravel()
+        scores = numpy.bincount(
+            cells, weights=logLikelihoods[:, columnIndexes].ravel(),
+            minlength=len(categories) * len(rows)).reshape(len(categories), len(rows))
+        scores += logPriors[:, None]
+        return [categories[index] for index in scores.argmax(axis=0)]
+
+    def classifyRange(self, start, end):
+        """
+        Predicts a category for every uncategorised event in [start, end),
+        e.g. a whole month, from one range query.
+        Returns a dict of event id -> category.
+        """
+        rows = [row for row in self.events.fetchRangeEvents(start, end)
+                if not row[CATEGORY_COLUMN]]
+        return {row[0]: category
+                for row, category in zip(rows, self.classifyMany(rows))}
@@ -0,0 +1,240 @@
+from datetime import date
+import heapq
+import json
+import logging
+import os
+
+# Width of a time of day bucket, 3 hours gives 8 buckets a day.
+TIME_BUCKET_HOURS = 3
+# Locations remembered per (category, time of day, weekday) key. Beyond
+# this the least frequent is replaced, so memory stays bounded however
+# long the history gets.
+DEFAULT_CAPACITY = 32
+# Suggestions returned by default.
+DEFAULT_SUGGESTIONS = 5
+# Index snapshot written next to events.db.
+INDEX_FILENAME = "locations.index"
+# Journal entries replayed onto a saved snapshot at most, beyond this
+# recounting the table is cheaper.
+MAX_CATCH_UP = 20000
+# Indexes into an EVENT_COLUMNS row.
+LOCATION_COLUMN = 4
+START_COLUMN = 5
+CATEGORY_COLUMN = 8
+
+
+def normaliseLocation(location):
+    """
+    Collapses whitespace so "Edge " and "Edge" count as one place.
+    """
+    return " ".join((location or "").split())
+
+
+def indexKeys(category, bucket, weekday):
+    """
+    Keys an event is counted under, most specific first. The broader
+    keys answer when the specific one hasn't been seen enough.
+    """
+    return ((category, bucket, weekday), (category, bucket, None),
+            (category, None, None), (None, bucket, weekday), (None, None, None))
+
+
+class BoundedCounter():
+    """
+    Space-Saving counter: counts at most capacity locations, a new one
+    replaces the least frequent and inherits its count, so frequent
+    locations are never lost while rare ones churn.
+    """
+
+    __slots__ = ("capacity", "counts")
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.counts = {}
+
+    def add(self, location, count=1):
+        counts = self.counts
+        if location in counts or len(counts) < self.capacity:
+            counts[location] = counts.get(location, 0) + count
+            return
+        weakest = min(counts, key=counts.get)
+        counts[location] = counts.pop(weakest) + count
+
+    def remove(self, location, count=1):
+        remaining = self.counts.get(location, 0) - count
+        if remaining > 0:
+            self.counts[location] = remaining
+        else:
+            # evicted locations are simply forgotten
+            self.counts.pop(location, None)
+
+    def top(self, k):
+        return heapq.nlargest(k, self.counts.items(), key=lambda item: item[1])
+
+
+class LocationSuggester():
+    """
+    Suggests where an event should be from where the user has put
+    events of the same category at the same time of day and weekday.
+    The index is only built when first needed. A snapshot of it is saved
+    next to events.db with the journal seq it reflects, and later loads
+    replay the journal entries written since rather than recounting the
+    table. When there's no usable snapshot it is counted with one
+    aggregate query, which callers can run off the GUI thread and hand
+    to build. From then on an Events listener keeps it up to date, so
+    a lookup only reads a few small in memory counters.
+    Counts can be off by the few events written while the index is
+    being built, the counters are approximate anyway.
+    """
+
+    def __init__(self, events, capacity=DEFAULT_CAPACITY, indexPath=None):
+        self.events = events
+        self.capacity = capacity
+        if indexPath is None:
+            indexPath = os.path.join(
+                os.path.dirname(os.path.abspath(events.path)), INDEX_FILENAME)
+        self.indexPath = indexPath
+        self.index = None  # indexKeys key -> BoundedCounter, see ensureIndex
+        self.events.addListener(self.onEventsChanged)
+
+    def ensureIndex(self):
+        """
+        The index, loaded from the snapshot or, failing that, counted
+        from the Events table on the calling thread.
+        """
+        if self.index is None and not self.load():
+            seq = self.events.journal.lastSeq()
+            self.build(self.events.fetchLocationCounts(TIME_BUCKET_HOURS), seq)
+        return self.index
+
+    def load(self):
+        """
+        Loads the snapshot and replays the journal entries written after
+        it. Returns False, leaving the index unbuilt, when there is no
+        usable snapshot: none saved, for other settings, or behind by
+        compacted or too many entries.
+        """
+        if self.index is not None:
+            return True
+        try:
+            with open(self.indexPath) as indexFile:
+                snapshot = json.load(indexFile)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError):
+            logging.exception("Could not read location index %s", self.indexPath)
+            return False
+        if (snapshot.get("capacity") != self.capacity
+                or snapshot.get("bucketHours") != TIME_BUCKET_HOURS):
+            return False
+        seq = snapshot["seq"]
+        lastSeq = self.events.journal.lastSeq()
+        cursor = self.events.cur
+        cursor.execute("SELECT COUNT(*) FROM EventsJournal WHERE seq > ?", (seq,))
+        pending = cursor.fetchone()[0]
+        if lastSeq < seq or pending != lastSeq - seq or pending > MAX_CATCH_UP:
+            return False
+        self.index = {}
+        for category, bucket, weekday, counts in snapshot["index"]:
+            counter = self.index[(category, bucket, weekday)] = BoundedCounter(self.capacity)
+            counter.counts = counts
+        cursor.execute(
+            "SELECT old, new FROM EventsJournal WHERE seq > ? ORDER BY seq", (seq,))
+        for old, new in cursor.fetchall():
+            for image, weight in ((old, -1), (new, 1)):
+                if image:
+                    image = json.loads(image)
+                    self.countRow(image["category"], image["startTime"],
+                                  image["location"], weight)
+        if pending:
+            self.save(lastSeq)
+        logging.info("Location index loaded, %d journal entries replayed", pending)
+        return True
+
+    def build(self, groups, seq):
+        """
+        Counts the index from fetchLocationCounts groups, read when the
+        journal was at seq, and saves it. Does nothing if the index was
+        loaded or built in the meantime.
+        """
+        if self.index is not None:
+            return
+        self.index = {}
+        for category, bucket, weekday, location, count in groups:
+            self.count(category, bucket, weekday, location, count)
+        logging.info("Location index built from %d groups", len(groups))
+        self.save(seq)
+
+    def save(self, seq=None):
+        """
+        Writes the snapshot atomically next to events.db, seq defaults
+        to the journal's latest. Called when the index is built or caught
+        up and by CalenWindow on close.
+        """
+        if self.index is None:
+            return
+        snapshot = {
+            "capacity": self.capacity,
+            "bucketHours": TIME_BUCKET_HOURS,
+            "seq": self.events.journal.lastSeq() if seq is None else seq,
+            "index": [[*key, counter.counts] for key, counter in self.index.items()],
+        }
+        temporaryPath = self.indexPath + ".tmp"
+        with open(temporaryPath, "w") as indexFile:
+            json.dump(snapshot, indexFile)
+        os.replace(temporaryPath, self.indexPath)
+
+    def count(self, category, bucket, weekday, location, count):
+        location = normaliseLocation(location)
+        if not location:
+            return
+        for key in indexKeys(category or None, bucket, weekday):
+            counter = self.index.get(key)
+            if count > 0:
+                if counter is None:
+                    counter = self.index[key] = BoundedCounter(self.capacity)
+                counter.add(location, count)
+            elif counter is not None:
+                counter.remove(location, -count)
+                if not counter.counts:
+                    del self.index[key]
+
+    def countRow(self, category, start, location, weight):
+        if not start or not location:
+            return
+        self.count(category, int(start[11:13]) // TIME_BUCKET_HOURS,
+                   date.fromisoformat(start[:10]).weekday(), location, weight)
+
+    def onEventsChanged(self, action, rows):
+        """
+        Events listener, counts inserted rows and uncounts deleted ones.
+        Before the index is built there's nothing to update, the changes
+        are in the table (or journal) it will be built from. The snapshot
+        isn't saved here, whatever it misses is replayed from the journal.
+        """
+        if self.index is None:
+            return
+        weight = 1 if action == "insert" else -1
+        for row in rows:
+            self.countRow(row[CATEGORY_COLUMN], row[START_COLUMN],
+                          row[LOCATION_COLUMN], weight)
+
+    def suggest(self, category, start, k=DEFAULT_SUGGESTIONS):
+        """
+        Top k locations for an event of category (None for any) starting
+        at the datetime start, falling back to broader keys until k are
+        found.
+        """
+        index = self.ensureIndex()
+        bucket, weekday = start.hour // TIME_BUCKET_HOURS, start.weekday()
+        suggestions = []
+        for key in indexKeys(category or None, bucket, weekday):
+            counter = index.get(key)
+            if counter is None:
+                continue
+            for location, _ in counter.top(k):
+                if location not in suggestions:
+                    suggestions.append(location)
+                    if len(suggestions) == k:
+                        return suggestions
+        return suggestions
@@ -0,0 +1,239 @@
+from datetime import datetime, time, timedelta
+import heapq
+from database.EventsClass import LEGACY_DATE_FORMAT, toTimestamp
+
+# Hours Dynamic events may be placed in, per day.
+DEFAULT_DAY_START = time(8, 0)
+DEFAULT_DAY_END = time(22, 0)
+# Minutes kept free between back-to-back events in different places.
+LOCATION_CHANGE_MINUTES = 15
+
+
+def minuteOfDay(timestamp, day):
+    """
+    Minutes between midnight of day ("yyyy-MM-dd") and a TIMESTAMP_FORMAT
+    value, clamped to the day so events spanning midnight still block it.
+    """
+    if timestamp[:10] < day:
+        return 0
+    if timestamp[:10] > day:
+        return 24 * 60
+    return int(timestamp[11:13]) * 60 + int(timestamp[14:16])
+
+
+def defaultTravelTime(fromLocation, toLocation):
+    """
+    Minutes needed to get between two locations; a flat buffer
+    whenever they differ.
+    """
+    if not fromLocation or not toLocation or fromLocation == toLocation:
+        return 0
+    return LOCATION_CHANGE_MINUTES
+
+
+def freeGaps(busy, dayStart, dayEnd):
+    """
+    Sweeps busy (start, end, location) minute intervals, sorted by start,
+    and returns the free [start, end, locationBefore, locationAfter] gaps
+    between dayStart and dayEnd.
+    """
+    gaps = []
+    cursor, cursorLocation = dayStart, None
+    for start, end, location in busy:
+        if end <= cursor:
+            continue
+        if start > cursor:
+            gaps.append([cursor, min(start, dayEnd), cursorLocation, location])
+        cursor, cursorLocation = max(cursor, end), location
+        if cursor >= dayEnd:
+            break
+    if cursor < dayEnd:
+        gaps.append([cursor, dayEnd, cursorLocation, None])
+    return [gap for gap in gaps if gap[0] < gap[1]]
+
+
+class Placement():
+    """
+    Where the scheduler put a Dynamic event, start/end are datetimes.
+    """
+
+    __slots__ = ("row", "start", "end")
+
+    def __init__(self, row, start, end):
+        self.row = row
+        self.start = start
+        self.end = end
+
+    @property
+    def moved(self):
+        return toTimestamp(self.start) != self.row.startTime
+
+    def __repr__(self):
+        return f"Placement({self.row.name!r}, {self.start}, {self.end})"
+
+
+class DayPlan():
+    """
+    Placements and unplaceable events of one day.
+    """
+
+    __slots__ = ("day", "placements", "unplaced")
+
+    def __init__(self, day, placements, unplaced):
+        self.day = day
+        self.placements = placements
+        self.unplaced = unplaced
+
+
+class AutoScheduler():
+    """
+    Places Dynamic events into the free time left by Rigid ones.
+    Every day is planned independently: Rigid events (and occurrences of
+    recurring series) are fixed, their gaps are found with a sweep, then
+    Dynamic events are taken longest first from a priority queue and put
+    in the gap that keeps them closest to where they were typed in,
+    leaving travel time between different locations.
+    Plans are cached per day; Events changes mark their days dirty so
+    replanDirty only redoes the affected days.
+    """
+
+    def __init__(self, events, dayStart=DEFAULT_DAY_START, dayEnd=DEFAULT_DAY_END,
+                 travelTime=defaultTravelTime):
+        self.events = events
+        self.dayStart = dayStart.hour * 60 + dayStart.minute
+        self.dayEnd = dayEnd.hour * 60 + dayEnd.minute
+        self.travelTime = travelTime
+        self.plans = {}  # "yyyy-MM-dd" -> DayPlan
+        self.dirtyDays = set()
+        self.events.addListener(self.onEventsChanged)
+
+    def planRange(self, start, end):
+        """
+        Plans every day in [start, end) from one range query.
+        Returns the DayPlans by "yyyy-MM-dd".
+        """
+        rows = self.events.fetchRangeEvents(start, end)
+        byDay = {}
+        for row in rows:
+            if row.startTime:
+                byDay.setdefault(row.startTime[:10], []).append(row)
+        day = start.replace(hour=0, minute=0, second=0, microsecond=0)
+        while day < end:
+            key = day.strftime("%Y-%m-%d")
+            self.plans[key] = self.planRows(key, byDay.get(key, []))
+            self.dirtyDays.discard(key)
+            day += timedelta(days=1)
+        return {key: plan for key, plan in self.plans.items()
+                if toTimestamp(start)[:10] <= key < toTimestamp(end)[:10]}
+
+    def planDay(self, day):
+        """
+        Re-plans one day (a datetime or "yyyy-MM-dd").
+        """
+        if isinstance(day, str):
+            day = datetime.fromisoformat(day)
+        day = day.replace(hour=0, minute=0, second=0, microsecond=0)
+        key = day.strftime("%Y-%m-%d")
+        self.plans[key] = self.planRows(
+            key, self.events.fetchRangeEvents(day, day + timedelta(days=1)))
+        self.dirtyDays.discard(key)
+        return self.plans[key]
+
+    def replanDirty(self):
+        """
+        Incremental mode: re-plans only the days changed since their
+        last plan. Returns the new DayPlans by day.
+        """
+        return {day: self.planDay(day) for day in sorted(self.dirtyDays)}
+
+    def planRows(self, day, rows):
+        """
+        Plans one day's rows (EVENT_COLUMNS order).
+        """
+        busy, tasks = [], []
+        for row in rows:
+            start = minuteOfDay(row.startTime, day)
+            end = minuteOfDay(row.endTime or row.startTime, day)
+            # occurrences of a series can't be moved one at a time
+            if row.rigidity == "Dynamic" and not row.rrule:
+                # longest first, ties broken by the typed in start
+                heapq.heappush(tasks, (-(end - start), start, row.id, row))
+            else:
+                busy.append((start, end, row.location))
+        busy.sort()
+        gaps = freeGaps(busy, self.dayStart, self.dayEnd)
+
+        midnight = datetime.fromisoformat(day)
+        placements, unplaced = [], []
+        while tasks:
+            negativeDuration, preferred, _, row = heapq.heappop(tasks)
+            placed = self.place(gaps, -negativeDuration, preferred, row.location)
+            if placed is None:
+                unplaced.append(row)
+                continue
+            placements.append(Placement(
+                row, midnight + timedelta(minutes=placed),
+                midnight + timedelta(minutes=placed - negativeDuration)))
+        placements.sort(key=lambda placement: placement.start)
+        return DayPlan(day, placements, unplaced)
+
+    def place(self, gaps, duration, preferred, location):
+        """
+        Puts a task in the gap closest to preferred, splitting that gap.
+        Returns the start minute, or None if no gap fits.
+        """
+        best = None
+        for index, (gapStart, gapEnd, before, after) in enumerate(gaps):
+            earliest = gapStart + self.travelTime(before, location)
+            latest = gapEnd - self.travelTime(location, after) - duration
+            if latest < earliest:
+                continue
+            start = min(max(preferred, earliest), latest)
+            distance = abs(start - preferred)
+            if best is None or distance < best[0]:
+                best = (distance, index, start)
+                if distance == 0:
+                    break
+        if best is None:
+            return None
+        _, index, start = best
+        gapStart, gapEnd, before, after = gaps[index]
+        split = []
+        if start > gapStart:
+            split.append([gapStart, start, before, location])
+        if start + duration < gapEnd:
+            split.append([start + duration, gapEnd, location, after])
+        gaps[index:index + 1] = split
+        return start
+
+    def applyPlan(self, plans):
+        """
+        Moves the placed Dynamic events in one transaction.
+        Returns the number of events moved.
+        """
+        moved = 0
+        with self.events.transaction():
+            for plan in plans:
+                for placement in plan.placements:
+                    if not placement.moved:
+                        continue
+                    self.events.updateEvent(
+                        placement.row.id,
+                        date=placement.start.strftime(LEGACY_DATE_FORMAT),
+                        endDate=placement.end)
+                    moved += 1
+        # the moves were planned, they don't need planning again
+        self.dirtyDays.difference_update(plan.day for plan in plans)
+        return moved
+
+    def onEventsChanged(self, action, rows):
+        """
+        Events listener, marks the days of changed events for replanDirty.
+        """
+        for row in rows:
+            if row.rrule:
+                # a series touches every planned day
+                self.dirtyDays.update(self.plans)
+                return
+            if row.startTime:
+                self.dirtyDays.add(row.startTime[:10])
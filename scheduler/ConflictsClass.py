@@ -0,0 +1,177 @@
+from datetime import datetime, timedelta
+from database.EventRecordClass import parseTimestamp
+from database.EventsClass import toTimestamp
+from database.FreeBusyIndexClass import FreeBusyIndex
+from database.InstrumentationClass import timed
+from scheduler.AutoSchedulerClass import DEFAULT_DAY_START, DEFAULT_DAY_END
+from scheduler.IntervalTreeClass import IntervalTree
+
+# Days either side of a checked event loaded into the interval tree, so
+# checks for nearby dates reuse the same tree.
+DEFAULT_WINDOW_DAYS = 7
+HARD = "hard"  # Rigid against Rigid, can't both happen
+MOVABLE = "movable"  # involves a Dynamic event that can be rescheduled
+TRAVEL = "travel"  # no overlap, but too close to get between the places
+
+
+class Conflict():
+    """
+    One existing event overlapping a checked event.
+    """
+
+    __slots__ = ("kind", "row")
+
+    def __init__(self, kind, row):
+        self.kind = kind
+        self.row = row
+
+    def __repr__(self):
+        return f"Conflict({self.kind!r}, {self.row!r})"
+
+
+class ConflictDetector():
+    """
+    Finds the events overlapping a new or edited event.
+    The events running in a time window (however early they started)
+    are loaded into an IntervalTree once and reused until the window
+    moves or an event overlapping it changes. Callers that mustn't block
+    on the query (the GUI) ask windowFor, fetch the window's rows
+    elsewhere and hand them to loadWindow before calling check.
+    With a LocationRegistry the events just before and after are also
+    checked for leaving enough time to travel between the locations.
+    The window's rows also fill a FreeBusyIndex, which finds the first
+    free time to suggest instead of a clashing one.
+    """
+
+    def __init__(self, events, windowDays=DEFAULT_WINDOW_DAYS, registry=None):
+        self.events = events
+        self.window = timedelta(days=windowDays)
+        self.registry = registry
+        self.freeBusy = FreeBusyIndex(events)
+        self.tree = None
+        self.windowStart = self.windowEnd = None
+        self.events.addListener(self.onEventsChanged)
+
+    def travelMargin(self, location):
+        """
+        How far either side of an event at location travel is checked.
+        """
+        if self.registry is not None and location:
+            return timedelta(minutes=self.registry.maxTravelMinutes())
+        return timedelta(0)
+
+    def windowFor(self, start, end, location=None):
+        """
+        The (start, end) window to load before checking an event running
+        [start, end) at location, or None if the loaded one covers it.
+        """
+        if not isinstance(start, datetime):
+            start = parseTimestamp(toTimestamp(start))
+        if not isinstance(end, datetime):
+            end = parseTimestamp(toTimestamp(end))
+        travel = self.travelMargin(location)
+        if (self.tree is not None and toTimestamp(start - travel) >= self.windowStart
+                and toTimestamp(end + travel) <= self.windowEnd):
+            return None
+        return start - travel - self.window, end + travel + self.window
+
+    def loadWindow(self, start, end, rows=None):
+        """
+        Builds the tree for events running in [start, end), from rows
+        if they were already fetched (Events.fetchOverlappingEvents).
+        """
+        if rows is None:
+            rows = self.events.fetchOverlappingEvents(start, end)
+        self.freeBusy.loadRange(start, end, rows)
+        self.tree = IntervalTree(
+            (row.startTime, row.endTime or row.startTime, row)
+            for row in rows if row.startTime)
+        self.windowStart, self.windowEnd = toTimestamp(start), toTimestamp(end)
+
+    @timed("ConflictDetector.check")
+    def check(self, start, end, rigidity, ignoreId=None, location=None):
+        """
+        Returns the Conflicts of an event running [start, end) with the
+        given rigidity, ignoring the event with ignoreId (when editing).
+        Rigid against Rigid is HARD, anything involving a Dynamic event
+        is MOVABLE. Given a location (and a registry), the nearest events
+        either side that leave too little travel time are TRAVEL.
+        """
+        startTime, endTime = toTimestamp(start), toTimestamp(end)
+        if not isinstance(start, datetime):
+            start = parseTimestamp(startTime)
+        if not isinstance(end, datetime):
+            end = parseTimestamp(endTime)
+        travel = self.travelMargin(location)
+        searchStart, searchEnd = toTimestamp(start - travel), toTimestamp(end + travel)
+        window = self.windowFor(start, end, location)
+        if window is not None:
+            self.loadWindow(*window)
+
+        conflicts = []
+        before, after = [], []
+        for rowStart, rowEnd, row in self.tree.overlapping(searchStart, searchEnd):
+            if ignoreId is not None and row.id == ignoreId:
+                continue
+            if rowStart < endTime and rowEnd > startTime:
+                kind = HARD if rigidity == "Rigid" and row.rigidity == "Rigid" else MOVABLE
+                conflicts.append(Conflict(kind, row))
+            elif rowEnd <= startTime:
+                before.append(row)
+            else:
+                after.append(row)
+        if before:
+            # only the last place left matters, earlier ones are en route
+            lastEnd = max(row.endTime or row.startTime for row in before)
+            for row in before:
+                if ((row.endTime or row.startTime) == lastEnd and
+                        self.travelShort(row.location, location, row.end or row.start, start)):
+                    conflicts.append(Conflict(TRAVEL, row))
+        if after:
+            firstStart = min(row.startTime for row in after)
+            for row in after:
+                if (row.startTime == firstStart and
+                        self.travelShort(location, row.location, end, row.start)):
+                    conflicts.append(Conflict(TRAVEL, row))
+        return conflicts
+
+    def firstFree(self, start, end, rigidOnly=True):
+        """
+        Start of the first time from start on, between DEFAULT_DAY_START
+        and DEFAULT_DAY_END, free for as long as [start, end) runs, with
+        rigidOnly free of Rigid events only. Only searches the days of
+        the loaded window (check loads it), returns None if none is free.
+        """
+        if self.tree is None:
+            return None
+        if not isinstance(start, datetime):
+            start = parseTimestamp(toTimestamp(start))
+        if not isinstance(end, datetime):
+            end = parseTimestamp(toTimestamp(end))
+        # the last whole day of the window
+        searchEnd = parseTimestamp(self.windowEnd).replace(hour=0, minute=0)
+        if searchEnd <= start:
+            return None
+        return self.freeBusy.firstFree(start, searchEnd, end - start, rigidOnly,
+                                       DEFAULT_DAY_START, DEFAULT_DAY_END)
+
+    def travelShort(self, fromLocation, toLocation, leave, arrive):
+        """
+        True if leave to arrive is less than the travel time needed.
+        """
+        minutes = self.registry.travelMinutes(fromLocation, toLocation)
+        return arrive - leave < timedelta(minutes=minutes)
+
+    def onEventsChanged(self, action, rows):
+        """
+        Events listener, drops the tree if a changed event overlaps its
+        window, the same test that decided which events were loaded.
+        """
+        if self.tree is None:
+            return
+        for row in rows:
+            # recurring series may have occurrences anywhere in the window
+            if row.rrule or (row.startTime and row.startTime < self.windowEnd
+                             and (row.endTime or row.startTime) > self.windowStart):
+                self.tree = None
+                return
@@ -0,0 +1,59 @@
+class IntervalTree():
+    """
+    Static interval tree over half-open [start, end) intervals.
+    Intervals are sorted by start once and treated as an implicit
+    balanced binary tree (the middle of each slice is its root), with
+    the largest end of every subtree stored alongside it. Overlap
+    queries skip any subtree that ends before the query starts, which
+    gives O(log n + k) for k overlaps.
+    Bounds can be anything ordered, e.g. TIMESTAMP_FORMAT strings.
+    """
+
+    def __init__(self, intervals=()):
+        """
+        intervals is an iterable of (start, end, payload).
+        """
+        self.intervals = sorted(intervals, key=lambda interval: interval[0])
+        self.starts = [interval[0] for interval in self.intervals]
+        self.maxEnds = [None] * len(self.intervals)
+        if self.intervals:
+            self.buildMaxEnds(0, len(self.intervals))
+
+    def __len__(self):
+        return len(self.intervals)
+
+    def buildMaxEnds(self, lo, hi):
+        mid = (lo + hi) // 2
+        maxEnd = self.intervals[mid][1]
+        if lo < mid:
+            maxEnd = max(maxEnd, self.buildMaxEnds(lo, mid))
+        if mid + 1 < hi:
+            maxEnd = max(maxEnd, self.buildMaxEnds(mid + 1, hi))
+        self.maxEnds[mid] = maxEnd
+        return maxEnd
+
+    def overlapping(self, start, end):
+        """
+        Returns the (start, end, payload) intervals overlapping [start, end),
+        ordered by start.
+        """
+        found = []
+        # explicit stack instead of recursion, slices still to visit
+        stack = [(0, len(self.intervals))]
+        while stack:
+            lo, hi = stack.pop()
+            if lo >= hi:
+                continue
+            mid = (lo + hi) // 2
+            if self.maxEnds[mid] <= start:
+                continue  # everything in this subtree ends too early
+            interval = self.intervals[mid]
+            if interval[0] < end:
+                # the right half starts at or after interval, only worth
+                # visiting while it can still start before end
+                stack.append((mid + 1, hi))
+                if interval[1] > start:
+                    found.append(interval)
+            stack.append((lo, mid))
+        found.sort(key=lambda interval: interval[0])
+        return found
@@ -0,0 +1,200 @@
+import json
+import logging
+import math
+import os
+import re
+from scheduler.AutoSchedulerClass import defaultTravelTime
+
+REGISTRY_FILENAME = "places.json"
+# Straight line distance is stretched by this much for real paths.
+DETOUR_FACTOR = 1.3
+# Default travel speed, walking.
+DEFAULT_SPEED_KMH = 5.0
+# Minutes added to any move between two different places (packing up,
+# finding the room).
+CHANGE_OVERHEAD_MINUTES = 5
+# Longest travel time assumed between two places, anything further is
+# reached some faster way than walking. Also bounds how far either side
+# of an event conflict checks look for travel gaps.
+MAX_TRAVEL_MINUTES = 120
+EARTH_RADIUS_KM = 6371.0
+# Words dropped when normalising, "The Edge" and "edge" are one place.
+STOP_WORDS = frozenset(("the", "at", "in"))
+NON_WORD = re.compile(r"[^\w]+")
+
+
+def normaliseKey(text):
+    """
+    Lower cases text and drops punctuation and STOP_WORDS, so
+    "Laidlaw Library," and "laidlaw  library" give the same key.
+    """
+    words = NON_WORD.sub(" ", (text or "").lower()).split()
+    return " ".join(word for word in words if word not in STOP_WORDS)
+
+
+def distanceKm(first, second):
+    """
+    Great circle (haversine) distance between two (lat, lon) pairs.
+    """
+    lat1, lon1 = map(math.radians, first)
+    lat2, lon2 = map(math.radians, second)
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+class Place():
+    """
+    One canonical place, its id is its row in the travel matrix.
+    """
+
+    __slots__ = ("id", "name", "lat", "lon", "aliases")
+
+    def __init__(self, placeId, name, lat, lon, aliases=()):
+        self.id = placeId
+        self.name = name
+        self.lat = lat
+        self.lon = lon
+        self.aliases = list(aliases)
+
+    def __repr__(self):
+        return f"Place({self.id}, {self.name!r}, {self.lat}, {self.lon})"
+
+
+class LocationRegistry():
+    """
+    Canonical places with coordinates typed in by the user (nothing is
+    geocoded online), and the free-text event locations that map to
+    them.
+    Travel minutes between every pair of places are kept in a matrix
+    indexed by place id. Adding or moving a place only computes its own
+    row and column, and resolved location strings are memoised, so
+    travelMinutes is a couple of dict lookups and a list index however
+    many places there are. Travel times are capped at maxTravel
+    minutes, so one far away place doesn't widen every conflict check.
+    Saved as JSON next to events.db.
+    """
+
+    def __init__(self, events=None, path=None, speedKmh=DEFAULT_SPEED_KMH,
+                 maxTravel=MAX_TRAVEL_MINUTES):
+        if path is None and events is not None:
+            path = os.path.join(
+                os.path.dirname(os.path.abspath(events.path)), REGISTRY_FILENAME)
+        self.path = path
+        self.speedKmh = speedKmh
+        self.maxTravel = maxTravel
+        self.places = []
+        self.keys = {}  # normalised name or alias -> place id
+        self.resolved = {}  # raw location text -> place id or None
+        self.matrix = []  # matrix[from id][to id] -> minutes
+        self.maxMinutes = 0
+        self.load()
+
+    def load(self):
+        if self.path is None or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as registryFile:
+                places = json.load(registryFile)["places"]
+        except (OSError, ValueError, KeyError):
+            logging.exception("Could not read places %s", self.path)
+            return
+        for place in places:
+            self.addPlace(place["name"], place["lat"], place["lon"],
+                          place.get("aliases", ()), save=False)
+
+    def save(self):
+        """
+        Writes the places atomically, the matrix is rebuilt on load.
+        """
+        if self.path is None:
+            return
+        places = [{"name": place.name, "lat": place.lat, "lon": place.lon,
+                   "aliases": place.aliases} for place in self.places]
+        temporaryPath = self.path + ".tmp"
+        with open(temporaryPath, "w") as registryFile:
+            json.dump({"places": places}, registryFile, indent=1)
+        os.replace(temporaryPath, self.path)
+
+    def minutesBetween(self, first, second):
+        if first is second:
+            return 0
+        kilometres = distanceKm((first.lat, first.lon), (second.lat, second.lon))
+        return min(self.maxTravel, CHANGE_OVERHEAD_MINUTES + math.ceil(
+            kilometres * DETOUR_FACTOR / self.speedKmh * 60))
+
+    def fillMatrix(self, place):
+        """
+        Computes the row and column of place against every other place.
+        """
+        for other in self.places:
+            minutes = self.minutesBetween(place, other)
+            self.matrix[place.id][other.id] = self.matrix[other.id][place.id] = minutes
+            self.maxMinutes = max(self.maxMinutes, minutes)
+
+    def addPlace(self, name, lat, lon, aliases=(), save=True):
+        """
+        Registers a place, or updates its coordinates and aliases if name
+        is already known. Returns the Place.
+        """
+        placeId = self.keys.get(normaliseKey(name))
+        if placeId is not None:
+            place = self.places[placeId]
+            place.lat, place.lon = lat, lon
+            place.aliases.extend(alias for alias in aliases if alias not in place.aliases)
+            self.fillMatrix(place)
+            # the largest entry may have been one that got shorter
+            self.maxMinutes = max(map(max, self.matrix))
+        else:
+            place = Place(len(self.places), name, lat, lon, aliases)
+            self.places.append(place)
+            for row in self.matrix:
+                row.append(0)
+            self.matrix.append([0] * len(self.places))
+            self.fillMatrix(place)
+        for key in [name] + place.aliases:
+            self.keys[normaliseKey(key)] = place.id
+        self.resolved.clear()
+        if save:
+            self.save()
+        return place
+
+    def resolve(self, location):
+        """
+        Place id of a free-text location, None if it isn't registered.
+        Trailing comma separated parts are dropped until something
+        matches, so "Laidlaw Library, Room 2" finds "Laidlaw Library".
+        """
+        try:
+            return self.resolved[location]
+        except KeyError:
+            pass
+        placeId = None
+        parts = (location or "").split(",")
+        while parts and placeId is None:
+            placeId = self.keys.get(normaliseKey(",".join(parts)))
+            parts.pop()
+        self.resolved[location] = placeId
+        return placeId
+
+    def place(self, location):
+        placeId = self.resolve(location)
+        return None if placeId is None else self.places[placeId]
+
+    def travelMinutes(self, fromLocation, toLocation):
+        """
+        Minutes to get from one event location to another. Falls back to
+        defaultTravelTime unless both are registered.
+        Usable as AutoScheduler's travelTime.
+        """
+        fromId, toId = self.resolve(fromLocation), self.resolve(toLocation)
+        if fromId is None or toId is None:
+            return defaultTravelTime(normaliseKey(fromLocation), normaliseKey(toLocation))
+        return self.matrix[fromId][toId]
+
+    def maxTravelMinutes(self):
+        """
+        Upper bound of travelMinutes, how far either side of an event
+        another one can be and still be too close.
+        """
+        return max(self.maxMinutes, defaultTravelTime("a", "b"))
@@ -0,0 +1,172 @@
+from datetime import datetime, timedelta
+import heapq
+import itertools
+
+# How long before an event starts its reminder fires.
+DEFAULT_LEAD = timedelta(minutes=10)
+# How far ahead events are loaded. Reaching the end of it is the only
+# time the scheduler queries Events by itself, once per horizon.
+DEFAULT_HORIZON = timedelta(days=2)
+
+
+class Reminder():
+    """
+    One pending reminder, fireAt is when it is due.
+    cancelled entries stay in the heap and are skipped when they reach
+    the top, rather than searching the heap to remove them.
+    """
+
+    __slots__ = ("fireAt", "row", "cancelled")
+
+    def __init__(self, fireAt, row):
+        self.fireAt = fireAt
+        self.row = row
+        self.cancelled = False
+
+    def __repr__(self):
+        return f"Reminder({self.fireAt}, {self.row.name!r})"
+
+
+class ReminderScheduler():
+    """
+    Reminders for upcoming events without polling.
+    The events of the next horizon are loaded into a min-heap keyed by
+    fire time, and only the earliest deadline is handed to arm(seconds)
+    for a single timer to wait on.
+    Events listener changes push or cancel single entries and re-arm if
+    the earliest deadline moved, so between deadlines nothing runs.
+    clock() gives the current datetime, replaceable with a fake one.
+    """
+
+    def __init__(self, events, arm=None, clock=datetime.now,
+                 lead=DEFAULT_LEAD, horizon=DEFAULT_HORIZON):
+        self.events = events
+        self.arm = arm
+        self.clock = clock
+        self.lead = lead
+        self.horizon = horizon
+        self.heap = []  # (fireAt, sequence, Reminder)
+        self.pending = {}  # (event id, startTime) -> Reminder
+        self.sequence = itertools.count()  # ties fire in insertion order
+        self.loadedUntil = None
+        self.armedFor = None
+        self.events.addListener(self.onEventsChanged)
+
+    def load(self):
+        """
+        Loads every reminder due between now and the horizon and arms
+        the first. Nothing is scheduled until this is called.
+        """
+        now = self.clock()
+        self.heap, self.pending = [], {}
+        self.loadedUntil = now + self.horizon
+        # fire times are lead before the start, so look lead further on
+        for row in self.events.fetchRangeEvents(now, self.loadedUntil + self.lead):
+            self.push(row, now)
+        self.rearm()
+
+    def push(self, row, now):
+        if not row.startTime or row.start < now:
+            return  # already started, too late to remind
+        fireAt = max(row.start - self.lead, now)
+        if fireAt >= self.loadedUntil:
+            return  # loaded with the next horizon
+        reminder = Reminder(fireAt, row)
+        key = (row.id, row.startTime)
+        if key in self.pending:
+            self.pending[key].cancelled = True
+        self.pending[key] = reminder
+        heapq.heappush(self.heap, (fireAt, next(self.sequence), reminder))
+
+    def cancel(self, row):
+        reminder = self.pending.pop((row.id, row.startTime), None)
+        if reminder is not None:
+            reminder.cancelled = True
+
+    def nextDeadline(self):
+        """
+        When the timer next needs to wake: the earliest live reminder,
+        or the end of the horizon to load the next one.
+        """
+        heap = self.heap
+        while heap and heap[0][2].cancelled:
+            heapq.heappop(heap)
+        if heap:
+            return min(heap[0][0], self.loadedUntil)
+        return self.loadedUntil
+
+    def rearm(self):
+        """
+        Tells arm about the next deadline if it changed.
+        """
+        deadline = self.nextDeadline()
+        if deadline == self.armedFor:
+            return
+        self.armedFor = deadline
+        if self.arm is not None:
+            self.arm(max(0.0, (deadline - self.clock()).total_seconds()))
+
+    def popDue(self):
+        """
+        Removes and returns the reminders due by now, earliest first,
+        loading the next horizon if this one has run out. Called when
+        the armed timer fires.
+        """
+        now = self.clock()
+        due = []
+        heap = self.heap
+        while heap and heap[0][0] <= now:
+            _, _, reminder = heapq.heappop(heap)
+            if not reminder.cancelled:
+                del self.pending[(reminder.row.id, reminder.row.startTime)]
+                due.append(reminder)
+        self.armedFor = None
+        if self.loadedUntil is None or now >= self.loadedUntil:
+            self.extend(now)
+        self.rearm()
+        return due
+
+    def extend(self, now):
+        """
+        Loads the next horizon onto the heap, keeping what's pending.
+        """
+        previousEnd = self.loadedUntil or now
+        self.loadedUntil = now + self.horizon
+        # events starting before previousEnd + lead were due last horizon
+        for row in self.events.fetchRangeEvents(
+                previousEnd + self.lead, self.loadedUntil + self.lead):
+            self.push(row, now)
+
+    def onEventsChanged(self, action, rows):
+        """
+        Events listener, adds or cancels the changed events' reminders.
+        Changed events remind again, even if their reminder had fired.
+        """
+        if self.loadedUntil is None:
+            return
+        now = self.clock()
+        seriesIds = set()
+        for row in rows:
+            if row.rrule:
+                seriesIds.add(row.id)
+            elif action == "insert":
+                self.push(row, now)
+            else:
+                self.cancel(row)
+        if seriesIds:
+            self.changeSeries(action, seriesIds, now)
+        self.rearm()
+
+    def changeSeries(self, action, seriesIds, now):
+        """
+        The rows of a series don't list its occurrences, cancel all of
+        its pending ones and on insert expand it over the horizon again.
+        """
+        for key, reminder in list(self.pending.items()):
+            if key[0] in seriesIds:
+                reminder.cancelled = True
+                del self.pending[key]
+        if action == "insert":
+            for row in self.events.iterOccurrences(now, self.loadedUntil + self.lead):
+                if row.id in seriesIds:
+                    self.push(row, now)
@@ -0,0 +1,83 @@
+import http.client
+import json
+import socket
+from urllib.parse import urlencode
+from server.QueryServerClass import DEFAULT_HOST, DEFAULT_PORT
+
+
+class UnixConnection(http.client.HTTPConnection):
+    """
+    HTTPConnection over a Unix socket, for a server started with unixPath.
+    """
+
+    def __init__(self, unixPath):
+        super(UnixConnection, self).__init__("localhost")
+        self.unixPath = unixPath
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.unixPath)
+
+
+class QueryClient():
+    """
+    Client for a running QueryServer, for scripts that would otherwise
+    open events.db themselves. Keeps one connection alive between
+    requests. Methods return the decoded JSON response and raise
+    ConnectionError if no server is listening, or RuntimeError with the
+    server's message for a failed request.
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, unixPath=None):
+        if unixPath:
+            self.connection = UnixConnection(unixPath)
+        else:
+            self.connection = http.client.HTTPConnection(host, port)
+
+    def request(self, method, path, params=None, data=None):
+        if params:
+            path += "?" + urlencode(params)
+        body = None if data is None else json.dumps(data).encode()
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        try:
+            self.connection.request(method, path, body, headers)
+            response = self.connection.getresponse()
+            payload = json.loads(response.read())
+        except (ConnectionError, FileNotFoundError):
+            self.connection.close()
+            raise ConnectionError("No query server listening") from None
+        if response.status != 200:
+            raise RuntimeError(payload.get("error", response.reason))
+        return payload
+
+    def day(self, date):
+        return self.request("GET", "/day", {"date": date.isoformat(" ")})
+
+    def range(self, start, end):
+        return self.request("GET", "/range", {"start": start.isoformat(" "),
+                                              "end": end.isoformat(" ")})
+
+    def search(self, query, limit=None):
+        return self.request("GET", "/search", {"q": query, **({"limit": limit} if limit else {})})
+
+    def insert(self, event):
+        """
+        event is a dict shaped like AddEventGUI.getAllData, optionally
+        with endDate (ISO format), rrule and category.
+        """
+        return self.request("POST", "/events", data=event)
+
+    def delete(self, eventId):
+        return self.request("DELETE", f"/events/{eventId}")
+
+    def undo(self):
+        return self.request("POST", "/undo")
+
+    def redo(self):
+        return self.request("POST", "/redo")
+
+    def changesSince(self, seq, limit=None):
+        return self.request("GET", "/changes", {"since": seq, **({"limit": limit} if limit else {})})
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,391 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import json
+import logging
+from urllib.parse import parse_qsl, urlsplit
+from database.EventRecordClass import EVENT_FIELDS
+from database.EventsClass import DEFAULT_PAGE_SIZE, EVENT_FILTERS
+from database.InstrumentationClass import instrumentation, measure
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# Threads running read batches, each on its own pooled connection. The
+# writer thread takes one more, so Events needs a pool of readers + 1.
+DEFAULT_READERS = 4
+# Queued requests handed to a thread in one go at most.
+DEFAULT_BATCH_SIZE = 64
+# Largest request body accepted, event inserts and sync deltas.
+MAX_BODY_BYTES = 16 * 1024 * 1024
+DEFAULT_SEARCH_LIMIT = 20
+# Paths served, for telling an unknown path from a wrong method.
+PATHS = ("/day", "/range", "/search", "/events", "/changes", "/stats",
+         "/sync", "/undo", "/redo")
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 413: "Payload Too Large",
+           500: "Internal Server Error"}
+# Raised by the handlers for data they can't use (a bad rrule or end
+# date, a sync change missing a key), answered with 400 not 500.
+CLIENT_ERRORS = (ValueError, KeyError)
+
+
+class RequestError(Exception):
+    """
+    A request the server can't run, answered with status and message.
+    """
+
+    def __init__(self, status, message):
+        super(RequestError, self).__init__(message)
+        self.status = status
+
+
+def clientMessage(error):
+    """
+    The error message sent back for one of CLIENT_ERRORS.
+    """
+    if isinstance(error, KeyError):
+        return f"Missing field: {error.args[0]}"
+    return str(error)
+
+
+def eventJson(row):
+    return dict(zip(EVENT_FIELDS, row.asTuple()))
+
+
+def parseTime(params, name):
+    """
+    A "yyyy-MM-dd" or "yyyy-MM-dd HH:mm" query parameter as a datetime.
+    """
+    if name not in params:
+        raise RequestError(400, f"Missing parameter: {name}")
+    try:
+        return datetime.fromisoformat(params[name])
+    except ValueError:
+        raise RequestError(400, f"Bad {name}: {params[name]!r}") from None
+
+
+def parseInt(params, name, default):
+    try:
+        return int(params.get(name, default))
+    except ValueError:
+        raise RequestError(400, f"Bad {name}: {params[name]!r}") from None
+
+
+class Batcher():
+    """
+    Queue of requests drained by worker tasks. Each task takes whatever
+    has queued up (up to batchSize) and runs it as one job on its
+    executor thread, so a burst of clients costs one thread hop per
+    batch rather than per request.
+    """
+
+    def __init__(self, executor, runBatch, batchSize, workers):
+        self.executor = executor
+        self.runBatch = runBatch
+        self.batchSize = batchSize
+        self.workers = workers
+        self.queue = None
+        self.tasks = []
+
+    def start(self):
+        self.queue = asyncio.Queue()
+        self.tasks = [asyncio.create_task(self.work()) for _ in range(self.workers)]
+
+    async def submit(self, key, function, args):
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((key, function, args, future))
+        return await future
+
+    async def work(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < self.batchSize and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            outcomes = await loop.run_in_executor(
+                self.executor, self.runBatch, [item[:3] for item in batch])
+            for (_, _, _, future), (failed, value) in zip(batch, outcomes):
+                if future.cancelled():
+                    continue
+                if failed:
+                    future.set_exception(value)
+                else:
+                    future.set_result(value)
+
+    def stop(self):
+        for task in self.tasks:
+            task.cancel()
+
+
+class QueryServer():
+    """
+    Local JSON-over-HTTP server in front of one shared Events, so
+    scripts and the CLI don't each open events.db and fight over locks.
+    Reads (day, range, search, pages, journal changes) are batched onto
+    a few reader threads, identical queries in a batch run once. Writes
+    are batched onto a single writer thread and committed together in
+    one transaction, retried one by one if any of them fails.
+    Responses are encoded on the worker threads, the event loop only
+    moves bytes.
+    Listens on TCP (host, port) or on a Unix socket when unixPath is set.
+    """
+
+    def __init__(self, events, host=DEFAULT_HOST, port=DEFAULT_PORT, unixPath=None,
+                 readers=DEFAULT_READERS, batchSize=DEFAULT_BATCH_SIZE):
+        self.events = events
+        self.host = host
+        self.port = port
+        self.unixPath = unixPath
+        self.readExecutor = ThreadPoolExecutor(readers, thread_name_prefix="calen-read")
+        self.writeExecutor = ThreadPoolExecutor(1, thread_name_prefix="calen-write")
+        self.reads = Batcher(self.readExecutor, self.runReads, batchSize, readers)
+        self.writes = Batcher(self.writeExecutor, self.runWrites, batchSize, 1)
+        self.server = None
+
+    # routes -----------------------------------------------------------
+
+    def route(self, method, target, body):
+        """
+        Resolves a request to ("read" or "write", function, args).
+        Raises RequestError for anything malformed.
+        """
+        url = urlsplit(target)
+        params = dict(parse_qsl(url.query))
+        path = url.path.rstrip("/") or "/"
+        if method == "GET":
+            if path == "/day":
+                return "read", self.day, (parseTime(params, "date"),)
+            if path == "/range":
+                return "read", self.range, (parseTime(params, "start"), parseTime(params, "end"))
+            if path == "/search":
+                if not params.get("q"):
+                    raise RequestError(400, "Missing parameter: q")
+                return "read", self.search, (params["q"], parseInt(params, "limit", DEFAULT_SEARCH_LIMIT))
+            if path == "/events":
+                return "read", self.page, self.pageArgs(params)
+            if path == "/changes":
+                return "read", self.changes, (parseInt(params, "since", 0),
+                                              parseInt(params, "limit", -1))
+            if path == "/stats":
+                return "read", self.stats, ()
+        elif method == "POST":
+            data = self.jsonBody(body)
+            if path == "/events":
+                if not isinstance(data, dict) or "name" not in data or "date" not in data:
+                    raise RequestError(400, "An event needs a name and a date")
+                return "write", self.insert, (data,)
+            if path == "/sync":
+                if not isinstance(data, list):
+                    raise RequestError(400, "Expected a list of changes")
+                return "write", self.sync, (data,)
+            if path in ("/undo", "/redo"):
+                return "write", self.replay, (path[1:],)
+        elif method == "DELETE" and path.startswith("/events/"):
+            eventId = path[len("/events/"):]
+            if not eventId.isdigit():
+                raise RequestError(400, f"Bad event id: {eventId!r}")
+            return "write", self.delete, (int(eventId),)
+        if path in PATHS or path.startswith("/events/"):
+            raise RequestError(405, f"{method} not allowed on {path}")
+        raise RequestError(404, f"No route for {method} {path}")
+
+    def jsonBody(self, body):
+        try:
+            return json.loads(body or b"null")
+        except ValueError:
+            raise RequestError(400, "Body is not JSON") from None
+
+    def pageArgs(self, params):
+        filter = {}
+        for key in EVENT_FILTERS:
+            if key in ("start", "end") and key in params:
+                filter[key] = parseTime(params, key)
+            elif key in params:
+                filter[key] = params[key]
+        after = None
+        if "afterId" in params:
+            after = (params.get("afterStart"), parseInt(params, "afterId", None))
+        return filter, after, parseInt(params, "size", DEFAULT_PAGE_SIZE)
+
+    def day(self, date):
+        return [eventJson(row) for row in self.events.fetchDayEvents(date)]
+
+    def range(self, start, end):
+        return [eventJson(row) for row in self.events.fetchRangeEvents(start, end)]
+
+    def search(self, query, limit):
+        return [eventJson(row) for row in self.events.search(query, limit)]
+
+    def page(self, filter, after, pageSize):
+        return [eventJson(row) for row in self.events.fetchEventsPage(filter, after, pageSize)]
+
+    def changes(self, since, limit):
+        return self.events.journal.changesSince(since, None if limit < 0 else limit)
+
+    def stats(self):
+        return instrumentation.snapshot()
+
+    def insert(self, data):
+        return {"id": self.events.insertEvent(
+            data["name"], data["date"], data.get("rigidity"), data.get("location"),
+            datetime.fromisoformat(data["endDate"]) if data.get("endDate") else None,
+            data.get("rrule"), data.get("category"))}
+
+    def delete(self, eventId):
+        return {"deleted": self.events.deleteEvent(eventId)}
+
+    def replay(self, direction):
+        return {direction: getattr(self.events.journal, direction)()}
+
+    def sync(self, changes):
+        return {"applied": self.events.journal.apply(changes),
+                "seq": self.events.journal.lastSeq()}
+
+    def call(self, method, target, body=b""):
+        """
+        Runs one request synchronously, without the server, for the CLI
+        when no server is running. Returns (status, payload).
+        """
+        try:
+            _, function, args = self.route(method, target, body)
+            return 200, function(*args)
+        except RequestError as error:
+            return error.status, {"error": str(error)}
+        except CLIENT_ERRORS as error:
+            return 400, {"error": clientMessage(error)}
+
+    # batches ----------------------------------------------------------
+
+    def runReads(self, batch):
+        """
+        Runs a batch of reads on a reader thread. Requests with the same
+        function and arguments share one query and one encoding.
+        """
+        outcomes, done = [], {}
+        for key, function, args in batch:
+            if key not in done:
+                try:
+                    with measure(f"QueryServer.{function.__name__}"):
+                        done[key] = (False, json.dumps(function(*args)).encode())
+                except Exception as error:
+                    logging.exception("Query %s failed", key)
+                    done[key] = (True, error)
+            outcomes.append(done[key])
+        return outcomes
+
+    def runWrites(self, batch):
+        """
+        Runs a batch of writes on the writer thread in one transaction,
+        so they share one commit. If one fails the transaction is rolled
+        back and each is run (and committed) on its own, to fail only
+        that one. Undo/redo steps are transactions of their own, batches
+        holding one are always run singly.
+        Note a batch is also one undo step.
+        """
+        if len(batch) > 1 and all(function != self.replay for _, function, _ in batch):
+            try:
+                with self.events.transaction():
+                    return [self.runWrite(function, args) for _, function, args in batch]
+            except Exception:
+                logging.warning("Write batch of %d failed, retrying singly", len(batch))
+        outcomes = []
+        for _, function, args in batch:
+            try:
+                outcomes.append(self.runWrite(function, args))
+            except Exception as error:
+                logging.exception("Write %s failed", function.__name__)
+                outcomes.append((True, error))
+        return outcomes
+
+    def runWrite(self, function, args):
+        with measure(f"QueryServer.{function.__name__}"):
+            return False, json.dumps(function(*args)).encode()
+
+    # HTTP -------------------------------------------------------------
+
+    async def dispatch(self, method, target, body):
+        """
+        Returns (status, encoded JSON body) for one request.
+        """
+        try:
+            kind, function, args = self.route(method, target, body)
+            batcher = self.reads if kind == "read" else self.writes
+            key = (function.__name__, repr(args))
+            return 200, await batcher.submit(key, function, args)
+        except RequestError as error:
+            return error.status, json.dumps({"error": str(error)}).encode()
+        except CLIENT_ERRORS as error:
+            return 400, json.dumps({"error": clientMessage(error)}).encode()
+        except Exception as error:
+            return 500, json.dumps({"error": str(error)}).encode()
+
+    async def handleConnection(self, reader, writer):
+        """
+        Serves HTTP/1.1 requests on one connection, kept alive until the
+        client closes it or asks to.
+        """
+        try:
+            while True:
+                requestLine = await reader.readline()
+                if not requestLine:
+                    break
+                method, target, version = requestLine.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY_BYTES:
+                    status, body = 413, json.dumps({"error": "Body too large"}).encode()
+                    keepAlive = False
+                else:
+                    status, body = await self.dispatch(
+                        method, target, await reader.readexactly(length) if length else b"")
+                    keepAlive = (version == "HTTP/1.1"
+                                 and headers.get("connection", "").lower() != "close")
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+                    f"Connection: {'keep-alive' if keepAlive else 'close'}\r\n\r\n".encode()
+                    + body)
+                await writer.drain()
+                if not keepAlive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass  # client went away or sent something that isn't HTTP
+        finally:
+            writer.close()
+
+    async def serve(self):
+        self.reads.start()
+        self.writes.start()
+        if self.unixPath:
+            self.server = await asyncio.start_unix_server(self.handleConnection, self.unixPath)
+            address = f"unix:{self.unixPath}"
+        else:
+            self.server = await asyncio.start_server(self.handleConnection, self.host, self.port)
+            self.port = self.server.sockets[0].getsockname()[1]
+            address = f"http://{self.host}:{self.port}"
+        logging.info("Serving %s on %s", self.events.path, address)
+        print(f"Serving on {address}", flush=True)
+        try:
+            async with self.server:
+                await self.server.serve_forever()
+        finally:
+            self.reads.stop()
+            self.writes.stop()
+
+    def run(self):
+        """
+        Serves until interrupted.
+        """
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.readExecutor.shutdown()
+            self.writeExecutor.shutdown()